@@ -0,0 +1,208 @@
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+from pydantic_core import to_json
+from starlette.routing import Match
+
+from metrics import Histogram
+
+# Long-lived, probe or static (map tile) routes: they barely touch the pool and would only eat the slots
+EXEMPT_ROUTES = {"/healthz", "/readyz", "/metrics", "/api/faculty/stream", "/api/flash-news/updates", "/api/map/tiles/{version}/{zoom}/{x}/{y}.jpg"}
+LOGIN_ROUTES = {"/api/admin/login", "/api/faculty/login"}
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Idle buckets are dropped once the table gets this big
+MAX_BUCKETS = 10000
+
+
+class RouteLimiter:
+    """At most `limit` requests of one route at a time, plus a bounded FIFO of waiters.
+
+    A released slot is handed straight to the oldest waiter, so a burst drains in
+    arrival order. When the queue is full, or a waiter times out, the caller sheds
+    the request instead of letting it pile up on the DB pool.
+    """
+
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        # None when admitted, else why not ("queue_full" / "queue_timeout")
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return None
+        if len(self.waiters) >= self.queue_size:
+            return "queue_full"
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return None
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot arrived just as we gave up; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self.waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return "queue_timeout"
+
+    def release(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None) # slot changes hands, active stays the same
+                return
+        self.active -= 1
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: int):
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, rate: float, burst: int) -> float:
+        """0 if a token was taken, else seconds until the next one."""
+        now = time.monotonic()
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class AdmissionControl:
+    """Per-route concurrency limits with bounded queues, and per-client token
+    buckets on login and write routes. Rates are per minute; 0 disables a limit."""
+
+    def __init__(self, route_limits: dict[str, int], default_limit: int, queue_size: int, queue_timeout: float,
+                 retry_after: float, rates: dict[str, tuple[float, int]], trust_forwarded_for: bool = False):
+        self.route_limits = route_limits
+        self.default_limit = default_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.rates = {kind: (per_minute / 60, burst) for kind, (per_minute, burst) in rates.items() if per_minute > 0}
+        self.trust_forwarded_for = trust_forwarded_for
+        self.limiters: dict[str, RouteLimiter] = {}
+        self.buckets: dict[tuple[str, str], TokenBucket] = {}
+        self.admitted: dict[str, int] = defaultdict(int)
+        self.shed: dict[tuple[str, str], int] = defaultdict(int) # (route, reason) -> count
+        self.queue_wait = Histogram()
+
+    def limiter(self, template: str) -> Optional[RouteLimiter]:
+        limiter = self.limiters.get(template)
+        if limiter is None:
+            limit = self.route_limits.get(template, self.default_limit)
+            if limit <= 0:
+                return None
+            limiter = self.limiters[template] = RouteLimiter(limit, self.queue_size)
+        return limiter
+
+    def client(self, scope) -> str:
+        if self.trust_forwarded_for:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def rate_limit(self, kind: str, client: str) -> float:
+        if kind not in self.rates:
+            return 0.0
+        rate, burst = self.rates[kind]
+        if len(self.buckets) >= MAX_BUCKETS:
+            # A bucket idle for a full refill is the same as a new one
+            cutoff = time.monotonic() - max(b for _, b in self.rates.values()) / min(r for r, _ in self.rates.values())
+            self.buckets = {key: bucket for key, bucket in self.buckets.items() if bucket.updated > cutoff}
+        bucket = self.buckets.get((kind, client))
+        if bucket is None:
+            bucket = self.buckets[(kind, client)] = TokenBucket(burst)
+        return bucket.take(rate, burst)
+
+    def render(self) -> list[str]:
+        lines = ["# TYPE admission_admitted_total counter"]
+        lines += [f'admission_admitted_total{{route="{route}"}} {count}' for route, count in sorted(self.admitted.items())]
+        lines.append("# TYPE admission_shed_total counter")
+        lines += [f'admission_shed_total{{route="{route}",reason="{reason}"}} {count}' for (route, reason), count in sorted(self.shed.items())]
+        lines.append("# TYPE admission_active gauge")
+        lines += [f'admission_active{{route="{route}"}} {limiter.active}' for route, limiter in sorted(self.limiters.items())]
+        lines.append("# TYPE admission_queued gauge")
+        lines += [f'admission_queued{{route="{route}"}} {len(limiter.waiters)}' for route, limiter in sorted(self.limiters.items())]
+        lines.append("# TYPE admission_queue_wait_seconds histogram")
+        lines += self.queue_wait.render("admission_queue_wait_seconds")
+        return lines
+
+
+def match_route(scope):
+    # Same matching the router does next; we need the template before the handler runs
+    for route in scope["app"].router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+async def reject(send, status: int, detail: str, retry_after: float):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": to_json({"detail": detail})})
+
+
+class AdmissionMiddleware:
+    """Plain ASGI middleware in front of the handlers: 429 when a client is over
+    its rate, 503 when a route is saturated, both with Retry-After, both cheap."""
+
+    def __init__(self, app, control: AdmissionControl):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        route = match_route(scope)
+        template = getattr(route, "path", None)
+        if template is None or template in EXEMPT_ROUTES:
+            return await self.app(scope, receive, send)
+        # Lets MetricsMiddleware label shed responses by route as well
+        scope["route"] = route
+        control = self.control
+
+        kind = "login" if template in LOGIN_ROUTES else None if scope["method"] in SAFE_METHODS else "write"
+        if kind is not None:
+            wait = control.rate_limit(kind, control.client(scope))
+            if wait:
+                control.shed[(template, "rate_limited")] += 1
+                return await reject(send, 429, "Too many requests, slow down", wait)
+
+        limiter = control.limiter(template)
+        if limiter is None:
+            control.admitted[template] += 1
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        reason = await limiter.acquire(control.queue_timeout)
+        if reason is not None:
+            control.shed[(template, reason)] += 1
+            return await reject(send, 503, "Server busy, try again shortly", control.retry_after)
+        control.queue_wait.observe(time.perf_counter() - start)
+        control.admitted[template] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
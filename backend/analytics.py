@@ -0,0 +1,135 @@
+import time
+from typing import Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+# Roles that get their own "available_*" counter on the dashboard
+TRACKED_ROLES = {"HOD": "available_hods", "CC": "available_ccs"}
+
+
+def analytics_statement():
+    # All dashboard counts in one round trip using FILTER aggregates
+    available = models.Faculty.availability == True
+    return select(
+        func.count(models.Faculty.id).label("total_faculty"),
+        func.count(models.Faculty.id).filter(available).label("available_faculty"),
+        func.count(models.Faculty.id).filter(available, models.Faculty.role == "HOD").label("available_hods"),
+        func.count(models.Faculty.id).filter(available, models.Faculty.role == "CC").label("available_ccs"),
+        select(func.count(models.Location.id)).scalar_subquery().label("total_locations"),
+    )
+
+
+async def fetch_analytics(db: AsyncSession) -> dict:
+    row = (await db.execute(analytics_statement())).one()
+    return {
+        "total_faculty": row.total_faculty,
+        "total_locations": row.total_locations,
+        "available_faculty": row.available_faculty,
+        "unavailable_faculty": row.total_faculty - row.available_faculty,
+        "available_hods": row.available_hods,
+        "available_ccs": row.available_ccs,
+    }
+
+
+def with_schedule(data: dict, index, at) -> dict:
+    # Available means available at `at` by timetable, overrides and toggle (schedule.py), not the bare toggle
+    bits = index.available_bits(at)
+    available = index.count(bits)
+    data = {**data, "available_faculty": available, "unavailable_faculty": data["total_faculty"] - available}
+    for role, field in TRACKED_ROLES.items():
+        data[field] = index.count(bits, role)
+    return data
+
+
+class AnalyticsCounters:
+    """In-memory dashboard counters kept up to date by the write endpoints.
+
+    We keep (availability, role) per faculty id rather than bare counts so every
+    update is idempotent: applying the same change from the request path and again
+    from the faculty_changes event stream can't double count. A periodic
+    reconcile() rebuilds everything from the DB and reports any drift.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.last_reconciled_at: Optional[float] = None
+        self.last_drift: dict = {}
+        self._faculty: dict[int, tuple[bool, Optional[str]]] = {}
+        self._total_locations = 0
+        self._available = 0
+        self._available_by_role = {role: 0 for role in TRACKED_ROLES}
+
+    def _apply(self, state: tuple[bool, Optional[str]], sign: int):
+        availability, role = state
+        if availability:
+            self._available += sign
+            if role in self._available_by_role:
+                self._available_by_role[role] += sign
+
+    def upsert_faculty(self, faculty_id: int, availability: bool, role: Optional[str]):
+        if not self.ready:
+            return
+        old = self._faculty.get(faculty_id)
+        if old is not None:
+            self._apply(old, -1)
+        new = (bool(availability), role)
+        self._faculty[faculty_id] = new
+        self._apply(new, 1)
+
+    def remove_faculty(self, faculty_id: int):
+        if not self.ready:
+            return
+        old = self._faculty.pop(faculty_id, None)
+        if old is not None:
+            self._apply(old, -1)
+
+    def add_locations(self, count: int = 1):
+        if self.ready:
+            self._total_locations += count
+
+    def apply_event(self, event: dict):
+        # Deltas from events.py, i.e. writes made by any worker
+        if event.get("type") != "faculty" or "id" not in event:
+            return
+        if event.get("op") == "delete":
+            self.remove_faculty(event["id"])
+        else:
+            self.upsert_faculty(event["id"], event.get("availability"), event.get("role"))
+
+    def snapshot(self) -> dict:
+        total = len(self._faculty)
+        data = {
+            "total_faculty": total,
+            "total_locations": self._total_locations,
+            "available_faculty": self._available,
+            "unavailable_faculty": total - self._available,
+        }
+        for role, field in TRACKED_ROLES.items():
+            data[field] = self._available_by_role[role]
+        return data
+
+    async def reconcile(self, db: AsyncSession) -> dict:
+        rows = (await db.execute(select(models.Faculty.id, models.Faculty.availability, models.Faculty.role))).all()
+        total_locations = (await db.execute(select(func.count(models.Location.id)))).scalar_one()
+
+        before = self.snapshot() if self.ready else None
+        self._faculty = {}
+        self._available = 0
+        self._available_by_role = {role: 0 for role in TRACKED_ROLES}
+        for faculty_id, availability, role in rows:
+            state = (bool(availability), role)
+            self._faculty[faculty_id] = state
+            self._apply(state, 1)
+        self._total_locations = total_locations
+        self.ready = True
+        self.last_reconciled_at = time.time()
+
+        after = self.snapshot()
+        self.last_drift = {key: after[key] - before[key] for key in after if before and after[key] != before[key]}
+        return self.last_drift
+
+
+analytics_counters = AnalyticsCounters()
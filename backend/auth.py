@@ -0,0 +1,184 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import Header, HTTPException
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import AsyncSessionLocal
+from security import verify_password # whcih validates passwords
+from settings import settings
+
+# Password hashing is CPU bound and would block the event loop; it gets a small dedicated pool
+_password_pool = ThreadPoolExecutor(max_workers=settings.AUTH_THREADS, thread_name_prefix="verify-password")
+
+if settings.SESSION_SECRET:
+    _secret = settings.SESSION_SECRET.encode()
+else:
+    # Tokens then only survive until restart and only work on this worker
+    print("SESSION_SECRET is not set, using a random per-process secret for session tokens")
+    _secret = secrets.token_bytes(32)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_pool, verify_password, plain_password, hashed_password)
+
+
+# ---- Signed session tokens ----
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _unb64(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def issue_token(kind: str, subject) -> str:
+    # "<payload>.<hmac>", verified with no DB lookup
+    payload = {"kind": kind, "sub": subject, "exp": int(time.time()) + settings.SESSION_TTL_SECONDS}
+    body = _b64(json.dumps(payload, separators=(",", ":")).encode())
+    signature = _b64(hmac.new(_secret, body.encode(), hashlib.sha256).digest())
+    return f"{body}.{signature}"
+
+
+def verify_token(token: str) -> Optional[dict]:
+    try:
+        body, signature = token.split(".", 1)
+        expected = _b64(hmac.new(_secret, body.encode(), hashlib.sha256).digest())
+        # Bytes, not str: compare_digest raises TypeError on non-ASCII strings
+        if not hmac.compare_digest(signature.encode(), expected.encode()):
+            return None
+        payload = json.loads(_unb64(body))
+    except ValueError:
+        return None
+    if payload.get("exp", 0) < time.time():
+        return None
+    return payload
+
+
+def _session(authorization: Optional[str]) -> Optional[dict]:
+    if not authorization:
+        if settings.AUTH_REQUIRED:
+            raise HTTPException(status_code=401, detail="Login required", headers={"WWW-Authenticate": "Bearer"})
+        return None
+    scheme, _, token = authorization.partition(" ")
+    payload = verify_token(token) if scheme.lower() == "bearer" else None
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired session", headers={"WWW-Authenticate": "Bearer"})
+    return payload
+
+
+def admin_session(authorization: Optional[str]) -> Optional[dict]:
+    # The admin session behind an Authorization header, or None; never raises
+    scheme, _, token = (authorization or "").partition(" ")
+    payload = verify_token(token) if scheme.lower() == "bearer" else None
+    return payload if payload is not None and payload.get("kind") == "admin" else None
+
+
+# ---- FastAPI dependencies for the write endpoints ----
+def require_admin(authorization: Optional[str] = Header(None)) -> Optional[dict]:
+    session = _session(authorization)
+    if session is not None and session["kind"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return session
+
+
+def require_admin_token(authorization: Optional[str] = Header(None)) -> dict:
+    # Operational endpoints (bulk imports, /api/batch, map rebuilds, profiles...) always need a real
+    # admin token, even when AUTH_REQUIRED is off for the original write endpoints
+    session = admin_session(authorization)
+    if session is None:
+        raise HTTPException(status_code=401, detail="Admin login required", headers={"WWW-Authenticate": "Bearer"})
+    return session
+
+
+def require_faculty_or_admin(faculty_id: int, authorization: Optional[str] = Header(None)) -> Optional[dict]:
+    # Faculty may only edit their own record
+    session = _session(authorization)
+    if session is not None and session["kind"] == "faculty" and session["sub"] != faculty_id:
+        raise HTTPException(status_code=403, detail="You can only update your own profile")
+    return session
+
+
+# ---- Faculty username lookups ----
+# normalized username -> faculty_id, so a login burst at term start doesn't queue on the DB
+faculty_usernames: dict[str, int] = {}
+
+
+def normalize_username(username: str) -> str:
+    return username.lower().strip()
+
+
+async def load_faculty_usernames(db: AsyncSession):
+    result = await db.execute(select(models.FacultyUser.username, models.FacultyUser.faculty_id))
+    faculty_usernames.clear()
+    faculty_usernames.update({normalize_username(username): faculty_id for username, faculty_id in result.all()})
+
+
+async def lookup_faculty_username(db: AsyncSession, username: str) -> Optional[int]:
+    normalized = normalize_username(username)
+    faculty_id = faculty_usernames.get(normalized)
+    if faculty_id is not None:
+        return faculty_id
+
+    # Served by the lower(username) index (migrations/004)
+    stmt = select(models.FacultyUser.faculty_id).where(func.lower(models.FacultyUser.username) == normalized)
+    faculty_id = (await db.execute(stmt)).scalars().first()
+    if faculty_id is not None:
+        faculty_usernames[normalized] = faculty_id
+    return faculty_id
+
+
+def forget_faculty(faculty_id: int):
+    # faculty_users rows go with the faculty (ON DELETE CASCADE)
+    for username in [name for name, fid in faculty_usernames.items() if fid == faculty_id]:
+        del faculty_usernames[username]
+
+
+# Faculty added by any worker, whose usernames get read in shortly (a bulk import becomes one query)
+_pending_faculty: set[int] = set()
+
+
+async def _remember_pending():
+    ids = set(_pending_faculty)
+    _pending_faculty.clear()
+    try:
+        async with AsyncSessionLocal() as session:
+            stmt = select(models.FacultyUser.username, models.FacultyUser.faculty_id).where(models.FacultyUser.faculty_id.in_(ids))
+            for username, faculty_id in (await session.execute(stmt)).all():
+                faculty_usernames[normalize_username(username)] = faculty_id
+    except Exception as e:
+        print(f"Error loading faculty usernames: {e}")
+
+
+async def _reload_usernames():
+    try:
+        async with AsyncSessionLocal() as session:
+            await load_faculty_usernames(session)
+    except Exception as e:
+        print(f"Error loading faculty usernames: {e}")
+
+
+def apply_event(event: dict):
+    # Faculty deleted or added by any worker (events.py); a deleted one must stop being able to log in everywhere
+    if event.get("type") == "resync":
+        asyncio.ensure_future(_reload_usernames()) # deletes may have been missed while the listener was down
+        return
+    if event.get("type") != "faculty" or "id" not in event:
+        return
+    if event.get("op") == "delete":
+        forget_faculty(event["id"])
+        _pending_faculty.discard(event["id"])
+    elif event.get("op") == "insert":
+        if not _pending_faculty:
+            asyncio.get_running_loop().call_later(0.5, lambda: asyncio.ensure_future(_remember_pending()))
+        _pending_faculty.add(event["id"])
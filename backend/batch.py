@@ -0,0 +1,181 @@
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Optional
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models, schemas
+from news import news_expiry
+
+# entity -> (model, create schema, update schema, id type)
+ENTITIES = {
+    "faculty": (models.Faculty, schemas.FacultyCreate, schemas.FacultyBatchUpdate, int),
+    "location": (models.Location, schemas.LocationCreate, schemas.LocationUpdate, str),
+    "flash_news": (models.FlashNews, schemas.FlashNewsCreate, None, int), # news has no update endpoint either
+}
+
+
+@dataclass
+class PreparedOp:
+    index: int
+    op: str
+    entity: str
+    id: Optional[object] = None
+    values: dict = field(default_factory=dict)
+
+    @property
+    def group_key(self):
+        # Consecutive ops with the same key become one multi-row statement; order between groups is kept
+        return self.entity, self.op, tuple(sorted(self.values)) if self.op == "update" else ()
+
+
+@dataclass
+class BatchOutcome:
+    results: list[schemas.BatchOperationResult]
+    statements: int = 0
+    # Post-batch state for the in-memory indexes, read inside the same transaction
+    faculty_rows: list = field(default_factory=list) # models.Faculty rows
+    removed_faculty: set = field(default_factory=set)
+    location_rows: list = field(default_factory=list) # schemas.Location dicts
+    removed_locations: set = field(default_factory=set)
+    location_delta: int = 0
+    availability_changes: list = field(default_factory=list) # (faculty_id, new, previous or None for creates)
+    touched: set = field(default_factory=set) # entities changed
+
+
+class BatchFailed(Exception):
+    def __init__(self, op: PreparedOp, error: Exception):
+        super().__init__(f"Operation {op.index} ({op.op} {op.entity}) failed: {error}")
+        self.op = op
+        self.error = error
+
+
+def prepare(operations: list[schemas.BatchOperation]) -> list[PreparedOp]:
+    """Validate everything up front; nothing runs if any operation is malformed."""
+    prepared, errors = [], []
+    for index, operation in enumerate(operations):
+        _, create_schema, update_schema, id_type = ENTITIES[operation.entity]
+        try:
+            if operation.op == "create":
+                data = create_schema.model_validate(operation.data or {})
+                values = data.model_dump(exclude={"expires_at", "ttl_hours"})
+                if operation.entity == "flash_news":
+                    if not data.message.strip():
+                        raise ValueError("News message cannot be empty.")
+                    values = {"message": data.message.strip(), "expires_at": news_expiry(data)}
+                prepared.append(PreparedOp(index, "create", operation.entity, values.get("id"), values))
+                continue
+
+            if operation.id is None:
+                raise ValueError("'id' is required for update and delete")
+            entity_id = id_type(operation.id)
+            if operation.op == "delete":
+                prepared.append(PreparedOp(index, "delete", operation.entity, entity_id))
+                continue
+
+            if update_schema is None:
+                raise ValueError(f"{operation.entity} cannot be updated")
+            values = update_schema.model_validate(operation.data or {}).model_dump(exclude_unset=True)
+            if not values:
+                raise ValueError("No update data provided")
+            prepared.append(PreparedOp(index, "update", operation.entity, entity_id, values))
+        except (ValidationError, ValueError) as e:
+            errors.append({"index": index, "error": str(e)})
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+    return prepared
+
+
+async def run_group(db: AsyncSession, ops: list[PreparedOp], outcome: BatchOutcome):
+    entity, op = ops[0].entity, ops[0].op
+    model = ENTITIES[entity][0]
+    results = outcome.results
+    outcome.touched.add(entity)
+
+    if op == "create" and entity == "location":
+        # Existing ids (and repeats within the batch) come back as conflicts instead of failing everything
+        first = {}
+        for item in ops:
+            first.setdefault(item.id, item.index)
+        stmt = pg_insert(model).on_conflict_do_nothing(index_elements=[model.id]).returning(model.id)
+        created = set((await db.execute(stmt, [item.values for item in ops if first[item.id] == item.index])).scalars().all())
+        outcome.statements += 1
+        outcome.location_delta += len(created)
+        for item in ops:
+            status = "created" if first[item.id] == item.index and item.id in created else "conflict"
+            results.append(schemas.BatchOperationResult(index=item.index, status=status, id=item.id))
+
+    elif op == "create":
+        # One executemany; sort_by_parameter_order lines the generated ids up with the inputs
+        stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+        new_ids = (await db.execute(stmt, [item.values for item in ops])).scalars().all()
+        outcome.statements += 1
+        for item, new_id in zip(ops, new_ids):
+            results.append(schemas.BatchOperationResult(index=item.index, status="created", id=new_id))
+            if entity == "faculty":
+                outcome.availability_changes.append((new_id, item.values["availability"], None))
+
+    elif op == "update":
+        # Faculty availability edits also read the old value, for the history log
+        track = entity == "faculty" and "availability" in ops[0].values
+        columns = [model.id, model.availability] if track else [model.id]
+        found = (await db.execute(select(*columns).where(model.id.in_({item.id for item in ops})))).all()
+        existing = {row[0] for row in found}
+        rows = [{"id": item.id, **item.values} for item in ops if item.id in existing]
+        outcome.statements += 1
+        if track:
+            previous = dict(found)
+            outcome.availability_changes += [(item.id, item.values["availability"], previous[item.id]) for item in ops if item.id in existing]
+        if rows:
+            # ORM bulk UPDATE by primary key: a single executemany
+            await db.execute(update(model), rows)
+            outcome.statements += 1
+        for item in ops:
+            status = "updated" if item.id in existing else "not_found"
+            results.append(schemas.BatchOperationResult(index=item.index, status=status, id=item.id))
+
+    else: # delete
+        stmt = delete(model).where(model.id.in_({item.id for item in ops})).returning(model.id)
+        deleted = set((await db.execute(stmt)).scalars().all())
+        outcome.statements += 1
+        if entity == "location":
+            outcome.location_delta -= len(deleted)
+        first = {}
+        for item in ops:
+            first.setdefault(item.id, item.index)
+        for item in ops:
+            # A repeated id is only deleted once
+            status = "deleted" if item.id in deleted and first[item.id] == item.index else "not_found"
+            results.append(schemas.BatchOperationResult(index=item.index, status=status, id=item.id))
+
+
+async def run_batch(db: AsyncSession, operations: list[schemas.BatchOperation]) -> BatchOutcome:
+    """Run every operation in the caller's transaction (the caller commits)."""
+    prepared = prepare(operations)
+    outcome = BatchOutcome(results=[])
+    for _, group in groupby(prepared, key=lambda item: item.group_key):
+        ops = list(group)
+        try:
+            await run_group(db, ops, outcome)
+        except Exception as e:
+            raise BatchFailed(ops[0], e)
+    outcome.results.sort(key=lambda result: result.index)
+
+    # Read back what the in-memory indexes need, still inside the transaction
+    faculty_ids = {r.id for r, p in zip(outcome.results, prepared) if p.entity == "faculty" and r.id is not None}
+    if faculty_ids:
+        stmt = select(models.Faculty).where(models.Faculty.id.in_(faculty_ids)).execution_options(populate_existing=True)
+        outcome.faculty_rows = (await db.execute(stmt)).scalars().all()
+        outcome.removed_faculty = faculty_ids - {row.id for row in outcome.faculty_rows}
+        outcome.statements += 1
+    location_ids = {r.id for r, p in zip(outcome.results, prepared) if p.entity == "location" and r.id is not None}
+    if location_ids:
+        rows = (await db.execute(select(models.Location).where(models.Location.id.in_(location_ids)))).scalars().all()
+        outcome.location_rows = [schemas.Location.model_validate(row).model_dump() for row in rows]
+        outcome.removed_locations = location_ids - {row["id"] for row in outcome.location_rows}
+        outcome.statements += 1
+    return outcome
@@ -0,0 +1,262 @@
+"""Drives a running API with a class-change style traffic mix and reports latency.
+
+    python -m benchmarks.seed --faculty 3000 --locations 400
+    uvicorn main:app --workers 1 &
+    python -m benchmarks.loadtest --url http://localhost:8000 --concurrency 50 --duration 30 --save-baseline
+    # ...change something...
+    python -m benchmarks.loadtest --url http://localhost:8000 --concurrency 50 --duration 30 --compare
+
+Reports p50/p95/p99 latency and throughput per scenario, and DB statements per
+request. The statement count is the delta of db_query_duration_seconds_count
+on /metrics. --compare exits non-zero when p95 or throughput regress past
+--tolerance against the stored baseline.
+
+Requests shed by admission control (429/503 with Retry-After) are reported in
+their own column, not as errors: they mean the limits were hit, not that the
+server broke. The write scenarios all come from one client address, so start
+the API with RATE_LIMIT_WRITE_PER_MINUTE=0 unless the rate limiter is what
+you're measuring. route_lookup only picks seeded locations (they have a
+walkway graph, see benchmarks/seed.py).
+
+Logins, the SSE stream and bulk import/export are left out of the mix: they
+need credentials or long-lived connections and are not on the class-change
+hot path.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+# ---- Scenarios: each takes (client, ctx, rng) and returns the response ----
+async def kiosk_faculty(client, ctx, rng):
+    return await client.get("/api/faculty")
+
+async def kiosk_locations(client, ctx, rng):
+    return await client.get("/api/locations")
+
+async def ticker_news(client, ctx, rng):
+    return await client.get("/api/flash-news")
+
+async def faculty_by_id(client, ctx, rng):
+    return await client.get(f"/api/faculty/{rng.choice(ctx['faculty_ids'])}")
+
+async def faculty_filtered(client, ctx, rng):
+    params = {"role": rng.choice(["HOD", "CC"]), "availability": "true", "limit": 50}
+    return await client.get("/api/faculty", params=params)
+
+async def route_lookup(client, ctx, rng):
+    src, dst = rng.sample(ctx["route_ids"], 2)
+    return await client.get("/api/route", params={"from": src, "to": dst})
+
+async def availability_toggle(client, ctx, rng):
+    faculty_id = rng.choice(ctx["faculty_ids"])
+    return await client.put(f"/api/faculty/{faculty_id}/availability", json={"availability": rng.random() < 0.6})
+
+async def profile_update(client, ctx, rng):
+    faculty_id = rng.choice(ctx["faculty_ids"])
+    return await client.put(f"/api/faculty/{faculty_id}", json={"cabin_number": f"B-{rng.randint(100, 599)}"})
+
+async def admin_analytics(client, ctx, rng):
+    return await client.get("/api/analytics")
+
+async def news_create_delete(client, ctx, rng):
+    response = await client.post("/api/flash-news", json={"message": f"[bench] load test {rng.random():.6f}"})
+    if response.status_code == 201:
+        await client.delete(f"/api/flash-news/{response.json()['id']}")
+    return response
+
+async def location_create_update_delete(client, ctx, rng):
+    location_id = f"bench-load-{rng.getrandbits(40):x}"
+    response = await client.post("/api/locations", json={"id": location_id, "label": "Load test room"})
+    await client.put(f"/api/locations/{location_id}", json={"label": "Load test room (moved)"})
+    await client.delete(f"/api/locations/{location_id}")
+    return response
+
+async def faculty_create_delete(client, ctx, rng):
+    response = await client.post("/api/faculty", json={"name": "Bench Load Test", "availability": False})
+    if response.status_code == 201:
+        await client.delete(f"/api/faculty/{response.json()['id']}")
+    return response
+
+
+# Weights approximate a class change: mostly kiosk/phone reads, some toggles, a few admin edits
+MIX = {
+    kiosk_faculty: 25,
+    kiosk_locations: 20,
+    ticker_news: 10,
+    faculty_by_id: 10,
+    faculty_filtered: 6,
+    route_lookup: 10,
+    availability_toggle: 10,
+    profile_update: 3,
+    admin_analytics: 3,
+    news_create_delete: 1,
+    location_create_update_delete: 1,
+    faculty_create_delete: 1,
+}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+async def db_statement_count(client) -> float:
+    try:
+        text = (await client.get("/metrics")).text
+    except httpx.HTTPError:
+        return float("nan")
+    match = re.search(r"^db_query_duration_seconds_count (\S+)$", text, re.M)
+    return float(match.group(1)) if match else float("nan")
+
+
+async def load_context(client) -> dict:
+    faculty = (await client.get("/api/faculty")).json()
+    locations = (await client.get("/api/locations")).json()
+    if not faculty or len(locations) < 2:
+        sys.exit("Need some faculty and at least two locations, run `python -m benchmarks.seed` first")
+    # Seeded rooms are on the walkway graph; the load test's own bench-load-* rooms are not
+    route_ids = [loc["id"] for loc in locations if loc["id"].startswith("bench-") and not loc["id"].startswith("bench-load-")]
+    if len(route_ids) < 2:
+        sys.exit("Need at least two seeded locations for route_lookup, run `python -m benchmarks.seed` first")
+    return {"faculty_ids": [f["id"] for f in faculty], "location_ids": [loc["id"] for loc in locations], "route_ids": route_ids}
+
+
+async def run(url: str, concurrency: int, duration: float, seed: int) -> dict:
+    latencies: dict[str, list[float]] = {fn.__name__: [] for fn in MIX}
+    errors: dict[str, int] = {fn.__name__: 0 for fn in MIX}
+    shed: dict[str, int] = {fn.__name__: 0 for fn in MIX}
+    scenarios, weights = list(MIX), list(MIX.values())
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=30.0, limits=limits) as client:
+        ctx = await load_context(client)
+        statements_before = await db_statement_count(client)
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(seed + worker_id)
+            while time.perf_counter() < deadline:
+                scenario = rng.choices(scenarios, weights)[0]
+                start = time.perf_counter()
+                rejected = False
+                try:
+                    response = await scenario(client, ctx, rng)
+                    # Admission control said no (rate limit / saturated route): counted, but not an error
+                    rejected = response.status_code in (429, 503) and "retry-after" in response.headers
+                    failed = response.status_code >= 500 and not rejected
+                except httpx.HTTPError:
+                    failed = True
+                if rejected:
+                    # Kept out of the latencies: instant rejections would flatter p95 and throughput
+                    shed[scenario.__name__] += 1
+                    continue
+                latencies[scenario.__name__].append(time.perf_counter() - start)
+                errors[scenario.__name__] += failed
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        statements_after = await db_statement_count(client)
+
+    report = {"url": url, "concurrency": concurrency, "duration_s": round(elapsed, 2), "scenarios": {}}
+    all_latencies = []
+    for name, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        all_latencies += values
+        report["scenarios"][name] = summarize(values, elapsed, errors[name], shed[name])
+    all_latencies.sort()
+    report["total"] = summarize(all_latencies, elapsed, sum(errors.values()), sum(shed.values()))
+    # Scenarios that chain calls (create+delete) count as one request here, so this is an upper bound
+    report["total"]["db_statements_per_request"] = round((statements_after - statements_before) / max(len(all_latencies), 1), 2)
+    return report
+
+
+def summarize(sorted_latencies: list[float], elapsed: float, error_count: int, shed_count: int) -> dict:
+    return {
+        "requests": len(sorted_latencies),
+        "errors": error_count,
+        "shed": shed_count,
+        "throughput_rps": round(len(sorted_latencies) / elapsed, 1),
+        "p50_ms": round(percentile(sorted_latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(sorted_latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(sorted_latencies, 99) * 1000, 2),
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{'scenario':<32} {'reqs':>7} {'err':>5} {'shed':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = list(report["scenarios"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        print(f"{name:<32} {row['requests']:>7} {row['errors']:>5} {row.get('shed', 0):>5} {row['throughput_rps']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+    print(f"\nDB statements per request: {report['total']['db_statements_per_request']}")
+    if report["total"].get("shed"):
+        print(f"{report['total']['shed']} requests were shed by admission control (429/503); raise the limits if that's not what you're testing")
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, row in list(report["scenarios"].items()) + [("TOTAL", report["total"])]:
+        base = baseline["total"] if name == "TOTAL" else baseline["scenarios"].get(name)
+        if not base:
+            continue
+        if row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {row['p95_ms']}ms")
+        if row["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {row['throughput_rps']} rps")
+    base_statements = baseline["total"].get("db_statements_per_request")
+    if base_statements and report["total"]["db_statements_per_request"] > base_statements * (1 + tolerance):
+        regressions.append(f"DB statements per request {base_statements} -> {report['total']['db_statements_per_request']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", type=Path, help="write the JSON report here")
+    parser.add_argument("--save-baseline", action="store_true", help=f"store this run as {BASELINE_PATH.name}")
+    parser.add_argument("--compare", action="store_true", help="compare against the stored baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression ratio (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.url, args.concurrency, args.duration, args.seed))
+    print_report(report)
+
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline stored in {args.baseline}")
+    if args.compare:
+        if not args.baseline.exists():
+            sys.exit(f"No baseline at {args.baseline}, run with --save-baseline first")
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
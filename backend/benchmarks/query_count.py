@@ -0,0 +1,109 @@
+"""Counts the SQL statements each mutating endpoint sends to Postgres.
+
+Run from backend/ against a disposable database (the .env one is used):
+
+    python -m benchmarks.query_count
+
+It creates and removes its own "bench-*" rows. Exits non-zero if any endpoint
+issues more statements than EXPECTED, so it can gate a CI job. Only statements
+on the request's own session (the one get_db hands out) count; the snapshot,
+bundle and search rebuilds a write kicks off run on their own sessions, at
+their own pace, and would make the numbers depend on timing.
+"""
+import asyncio
+import sys
+import uuid
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import AsyncSessionLocal, async_engine, get_db
+from main import app
+
+# (method, path template, json body, statements before the RETURNING rewrite, statements now)
+EXPECTED = [
+    ("POST", "/api/locations", "location_body", 2, 1),
+    ("PUT", "/api/locations/{location_id}", {"label": "Bench Room (renamed)"}, 2, 1),
+    ("POST", "/api/faculty", "faculty_body", 2, 1),
+    ("PUT", "/api/faculty/{faculty_id}/availability", {"availability": False}, 2, 1),
+    ("PUT", "/api/faculty/{faculty_id}", {"designation": "Professor"}, 2, 1),
+    ("PUT", "/api/faculty/999999999/availability", {"availability": True}, 1, 1), # 404 path
+    ("DELETE", "/api/faculty/{faculty_id}", None, 2, 1),
+    ("DELETE", "/api/locations/{location_id}", None, 2, 1),
+    ("POST", "/api/flash-news", {"message": "bench news"}, 1, 1),
+    ("DELETE", "/api/flash-news/{news_id}", None, 2, 1),
+]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        self.connections = set() # connections the request sessions ran on
+
+    def reset(self):
+        self.count = 0
+        self.connections.clear()
+
+    def on_begin(self, session, transaction, connection):
+        if session.info.get("bench_request"):
+            self.connections.add(connection)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if conn in self.connections:
+            self.count += 1
+
+
+async def request_db():
+    # get_db, with the session marked so its connection gets counted
+    async with AsyncSessionLocal() as session:
+        session.sync_session.info["bench_request"] = True
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def run() -> int:
+    counter = StatementCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    event.listen(Session, "after_begin", counter.on_begin)
+    app.dependency_overrides[get_db] = request_db
+
+    location_id = f"bench-{uuid.uuid4().hex[:8]}"
+    ids = {"location_id": location_id}
+    bodies = {
+        "location_body": {"id": location_id, "label": "Bench Room", "subtitle": "benchmark", "type": "location"},
+        "faculty_body": {"name": "Bench Faculty", "availability": True, "location_id": location_id},
+    }
+
+    failures = 0
+    print(f"{'endpoint':<48} {'status':>6} {'before':>6} {'now':>4} {'expected':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for method, template, body, before, expected in EXPECTED:
+            path = template.format(**ids)
+            json_body = bodies.get(body, body) if isinstance(body, str) else body
+
+            counter.reset()
+            response = await client.request(method, path, json=json_body)
+            used = counter.count
+
+            if response.status_code == 201 and "faculty" in path:
+                ids["faculty_id"] = response.json()["id"]
+            elif response.status_code == 201 and "flash-news" in path:
+                ids["news_id"] = response.json()["id"]
+
+            ok = used <= expected
+            failures += not ok
+            print(f"{method + ' ' + template:<48} {response.status_code:>6} {before:>6} {used:>4} {expected:>8}{'' if ok else '  <-- regression'}")
+
+    total_before = sum(row[3] for row in EXPECTED)
+    total_expected = sum(row[4] for row in EXPECTED)
+    print(f"\nstatements per full cycle: {total_before} before -> {total_expected} expected")
+    await async_engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
@@ -0,0 +1,149 @@
+"""Seeds a synthetic campus into the configured (.env) database.
+
+    python -m benchmarks.seed --faculty 3000 --locations 400 --news 50
+
+Every seeded location id starts with "bench-", every seeded faculty member
+sits in one of those locations and every seeded walkway node is labelled
+"[bench] ...", so --reset removes exactly what a previous run added and nothing
+else. Use a disposable database all the same.
+
+The walkway graph gives every seeded location a door on its block/floor
+corridor, with stairs between floors and walkways between the blocks' ground
+floors, so any two seeded locations have a route. The API loads the graph at
+startup: seed before starting it (or POST /api/route/reload).
+"""
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import delete, insert, or_, select
+
+import models
+from bulk import batches
+from database import AsyncSessionLocal, async_engine
+
+PREFIX = "bench-"
+SCHOOLS = ["SOCSE", "SOM", "SOD", "SOE", "SOIST"]
+DEPARTMENTS = ["CSE", "ECE", "ME", "CE", "MBA", "Design", "IT", "Physics", "Maths"]
+DESIGNATIONS = ["Professor", "Assistant Professor", "Trainer", "Lecturer"]
+ROLES = ["NA"] * 12 + ["CC"] * 4 + ["Reviewer", "Academic Coordinator", "HOD"]
+BLOCKS = ["A", "B", "C", "D", "E"]
+FIRST = ["Anita", "Rahul", "Priya", "Vikram", "Meera", "Arjun", "Kavya", "Sanjay", "Divya", "Karthik", "Lakshmi", "Rohan"]
+LAST = ["Rao", "Sharma", "Iyer", "Nair", "Reddy", "Gupta", "Menon", "Patel", "Das", "Kumar", "Hegde", "Joshi"]
+NODE_LABEL = "[bench]"
+COURSES = ["DSA", "DBMS", "OS", "CN", "ML", "AI", "Compilers", "Maths-I", "Physics", "Design Thinking", "Finance"]
+
+
+def make_locations(count: int, rng: random.Random) -> list[dict]:
+    rows = []
+    for i in range(count):
+        block = rng.choice(BLOCKS)
+        floor = rng.randint(0, 5)
+        kind = rng.choices(["Classroom", "Lab", "Cabin", "Washroom", "Lift"], weights=[40, 20, 30, 5, 5])[0]
+        rows.append({
+            "id": f"{PREFIX}{block}{floor}{i:04d}",
+            "label": f"{block}-{floor}{i % 100:02d} {kind}",
+            "subtitle": f"Block {block}, floor {floor}",
+            "type": "location",
+        })
+    return rows
+
+
+def make_faculty(count: int, location_ids: list[str], rng: random.Random) -> list[dict]:
+    rows = []
+    for i in range(count):
+        rows.append({
+            "name": f"{rng.choice(FIRST)} {rng.choice(LAST)} {i:05d}",
+            "department": rng.choice(DEPARTMENTS),
+            "school": rng.choice(SCHOOLS),
+            "designation": rng.choice(DESIGNATIONS),
+            "role": rng.choice(ROLES),
+            "courses_taken": rng.sample(COURSES, rng.randint(1, 3)),
+            "cabin_number": f"{rng.choice(BLOCKS)}-{rng.randint(100, 599)}",
+            "phone_number": f"9{rng.randint(100000000, 999999999)}",
+            "availability": rng.random() < 0.6,
+            "location_id": rng.choice(location_ids),
+        })
+    return rows
+
+
+async def seed_walkways(session, location_rows: list[dict]):
+    # One corridor hub per block/floor, room doors along it; the id encodes block and floor (see make_locations)
+    hubs = {}
+    for block_index, block in enumerate(BLOCKS):
+        for floor in range(6):
+            stmt = insert(models.WalkwayNode).values(
+                label=f"{NODE_LABEL} Block {block} floor {floor} corridor", floor=floor, x=block_index * 100.0, y=0.0, kind="corridor",
+            ).returning(models.WalkwayNode.id)
+            hubs[block, floor] = (await session.execute(stmt)).scalar_one()
+
+    doors, edges = [], []
+    for i, row in enumerate(location_rows):
+        block, floor = row["id"][len(PREFIX)], int(row["id"][len(PREFIX) + 1])
+        doors.append((row, hubs[block, floor], {
+            "location_id": row["id"], "label": f"{NODE_LABEL} {row['label']}", "floor": floor,
+            "x": BLOCKS.index(block) * 100.0 + (i % 30) * 3.0, "y": 6.0, "kind": "room",
+        }))
+    stmt = insert(models.WalkwayNode).returning(models.WalkwayNode.id, sort_by_parameter_order=True)
+    for batch in batches(doors):
+        door_ids = (await session.execute(stmt, [node for _, _, node in batch])).scalars().all()
+        # Straight-line distance (distance_m null) from the door to its corridor hub
+        edges += [{"from_node_id": hub, "to_node_id": door_id, "kind": "walk"} for (_, hub, _), door_id in zip(batch, door_ids)]
+
+    for block in BLOCKS:
+        for floor in range(5):
+            edges.append({"from_node_id": hubs[block, floor], "to_node_id": hubs[block, floor + 1], "distance_m": 8.0, "kind": "stairs"})
+    for a, b in zip(BLOCKS, BLOCKS[1:]):
+        edges.append({"from_node_id": hubs[a, 0], "to_node_id": hubs[b, 0], "kind": "walk"})
+    for batch in batches(edges):
+        await session.execute(insert(models.WalkwayEdge), batch)
+
+
+async def reset(session):
+    bench_locations = models.Location.id.startswith(PREFIX)
+    # Edges go with their nodes (ON DELETE CASCADE)
+    await session.execute(delete(models.WalkwayNode).where(or_(
+        models.WalkwayNode.label.startswith(NODE_LABEL),
+        models.WalkwayNode.location_id.in_(select(models.Location.id).where(bench_locations)),
+    )))
+    await session.execute(delete(models.Faculty).where(models.Faculty.location_id.startswith(PREFIX)))
+    await session.execute(delete(models.Location).where(bench_locations))
+    await session.execute(delete(models.FlashNews).where(models.FlashNews.message.startswith("[bench]")))
+
+
+async def seed(faculty: int, locations: int, news: int, seed_value: int, only_reset: bool = False):
+    rng = random.Random(seed_value)
+    async with AsyncSessionLocal() as session:
+        await reset(session)
+        if not only_reset:
+            location_rows = make_locations(max(locations, 1), rng)
+            for batch in batches(location_rows):
+                await session.execute(insert(models.Location), batch)
+            await seed_walkways(session, location_rows)
+            faculty_rows = make_faculty(faculty, [row["id"] for row in location_rows], rng)
+            for batch in batches(faculty_rows):
+                await session.execute(insert(models.Faculty), batch)
+            news_rows = [{"message": f"[bench] Notice {i}: room change for {rng.choice(COURSES)}"} for i in range(news)]
+            for batch in batches(news_rows):
+                await session.execute(insert(models.FlashNews), batch)
+        await session.commit()
+    await async_engine.dispose()
+    if only_reset:
+        print("Removed seeded benchmark rows")
+    else:
+        print(f"Seeded {faculty} faculty, {max(locations, 1)} locations, {news} news items (seed={seed_value})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faculty", type=int, default=2000)
+    parser.add_argument("--locations", type=int, default=300)
+    parser.add_argument("--news", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed, same seed -> same campus")
+    parser.add_argument("--reset", action="store_true", help="only remove previously seeded rows")
+    args = parser.parse_args()
+    asyncio.run(seed(args.faculty, args.locations, args.news, args.seed, only_reset=args.reset))
+
+
+if __name__ == "__main__":
+    main()
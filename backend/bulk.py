@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select
+
+import models
+from database import AsyncSessionLocal
+
+# Rows per multi-row INSERT and per server-side cursor fetch
+BATCH_SIZE = 500
+# List columns are written/read as "a;b;c" inside one CSV cell
+CSV_LIST_SEPARATOR = ";"
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def request_format(request: Request, fmt: Optional[str]) -> str:
+    if fmt:
+        fmt = fmt.lower()
+    else:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        fmt = "ndjson" if content_type in NDJSON_TYPES else "csv" if content_type == "text/csv" else None
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson (or pass ?format=csv|ndjson)")
+    return fmt
+
+
+async def iter_lines(request: Request) -> AsyncIterator[bytes]:
+    # Split the streamed body into lines without buffering the whole upload; decoding is per row (parse_upload)
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if pending:
+        yield pending.rstrip(b"\r")
+
+
+def _csv_record(header: list[str], values: list[str], list_fields: set[str]) -> dict:
+    record = {}
+    for key, value in zip(header, values):
+        value = value.strip()
+        if key in list_fields:
+            record[key] = [item.strip() for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+        elif value != "":
+            record[key] = value # empty cells fall back to the schema default
+    return record
+
+
+async def parse_upload(request: Request, fmt: str, schema: type[BaseModel], list_fields: set[str] = frozenset()):
+    """Validate every row against the create schema.
+
+    Returns (valid, errors) where valid is a list of (line_number, model) and errors
+    is a list of {"line", "error"}. Note CSV rows are parsed line by line, so quoted
+    cells can't contain newlines.
+    """
+    valid: list[tuple[int, BaseModel]] = []
+    errors: list[dict] = []
+    header = None
+    line_no = 0
+
+    async for raw in iter_lines(request):
+        line_no += 1
+        try:
+            # Only the first line can carry a BOM; a bad byte fails just this row
+            line = raw.decode("utf-8-sig" if line_no == 1 else "utf-8", errors="strict")
+        except UnicodeDecodeError as e:
+            errors.append({"line": line_no, "error": f"Invalid UTF-8 at byte {e.start}"})
+            continue
+        if not line.strip():
+            continue
+        try:
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                if header is None:
+                    header = [h.strip() for h in values]
+                    continue
+                record = _csv_record(header, values, list_fields)
+            else:
+                record = json.loads(line)
+            valid.append((line_no, schema(**record)))
+        except ValidationError as e:
+            errors.append({"line": line_no, "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+        except (ValueError, TypeError) as e:
+            errors.append({"line": line_no, "error": str(e)})
+    return valid, errors
+
+
+def batches(items: list, size: int = BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _csv_line(values: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+async def stream_export(model, schema: type[BaseModel], order_by, fmt: str) -> AsyncIterator[str]:
+    """Yield rows straight from a server-side cursor instead of scalars().all().
+
+    Opens its own session because the body is still streaming after the
+    endpoint (and its get_db dependency) has returned.
+    """
+    fields = list(schema.model_fields)
+    if fmt == "csv":
+        yield _csv_line(fields)
+
+    async with AsyncSessionLocal() as session:
+        stmt = select(model).order_by(*order_by).execution_options(yield_per=BATCH_SIZE)
+        result = await session.stream_scalars(stmt)
+        async for row in result:
+            data = schema.model_validate(row, from_attributes=True).model_dump(mode="json")
+            if fmt == "csv":
+                yield _csv_line([
+                    CSV_LIST_SEPARATOR.join(value) if isinstance(value, list) else ("" if value is None else value)
+                    for value in (data[field] for field in fields)
+                ])
+            else:
+                yield json.dumps(data, separators=(",", ":")) + "\n"
+
+
+async def existing_location_ids(db, location_ids: set[str]) -> set[str]:
+    # Single FK check pass for a whole upload
+    if not location_ids:
+        return set()
+    result = await db.execute(select(models.Location.id).where(models.Location.id.in_(location_ids)))
+    return set(result.scalars().all())
@@ -0,0 +1,51 @@
+import asyncio
+import gzip
+import hashlib
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    import brotli
+except ImportError: # optional: gzip only without it
+    brotli = None
+
+
+@dataclass
+class EncodedBundle:
+    """The kiosk bundle, encoded once per rebuild in every format we serve."""
+    raw: bytes
+    etag: str
+    encodings: dict[str, bytes] = field(default_factory=dict) # content-coding -> body
+
+    def pick(self, accept_encoding: Optional[str]) -> tuple[Optional[str], bytes]:
+        accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+        for coding in ("br", "gzip"):
+            if coding in accepted and coding in self.encodings:
+                return coding, self.encodings[coding]
+        return None, self.raw
+
+
+def join_bundle(locations: bytes, faculty: bytes, flash_news: bytes) -> bytes:
+    # Splice the already-encoded list bodies, nothing gets re-serialized
+    return b'{"locations":' + locations + b',"faculty":' + faculty + b',"flash_news":' + flash_news + b"}"
+
+
+def encode_bundle(raw: bytes) -> EncodedBundle:
+    # Content hash, so identical rebuilds (and other workers) hand out the same ETag
+    bundle = EncodedBundle(raw=raw, etag='"' + hashlib.sha256(raw).hexdigest()[:32] + '"')
+    bundle.encodings["gzip"] = gzip.compress(raw, compresslevel=9, mtime=0)
+    if brotli is not None:
+        bundle.encodings["br"] = brotli.compress(raw, quality=11)
+    return bundle
+
+
+async def build_bundle(locations: bytes, faculty: bytes, flash_news: bytes) -> EncodedBundle:
+    # Max-level compression of a few MB takes a while; keep it off the event loop
+    return await asyncio.to_thread(encode_bundle, join_bundle(locations, faculty, flash_news))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
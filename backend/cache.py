@@ -0,0 +1,135 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from pydantic import TypeAdapter
+
+
+class DirectoryCache:
+    """Small in-process read-through cache for the directory list endpoints.
+
+    Entries hold the already-encoded JSON body (plus whatever the endpoint needs
+    alongside it, e.g. a next-page cursor), so a hit skips the DB round trip,
+    ORM hydration and pydantic validation. Every key belongs to a tag ("faculty",
+    "locations", "flash_news") and write endpoints drop a whole tag at once.
+    Entries are bounded both by count (LRU) and by age (TTL), the TTL being the
+    upper bound on staleness when another worker process did the write.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, str, Any]] = OrderedDict()
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self._lock_users: dict[Hashable, int] = {} # requests holding or queued on each lock
+        self._generations: dict[str, int] = {}
+        self._listeners: list[Callable[[str, bool], None]] = []
+        self._pending: set[str] = set() # tags with a coalesced remote invalidation scheduled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, body = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    def set(self, key: Hashable, tag: str, body: Any):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, tag, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, tag: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        full_key = (tag, key)
+        body = self.get(full_key)
+        if body is not None:
+            self.hits += 1
+            return body
+
+        # Single flight: concurrent misses for the same key wait for one loader
+        lock = self._locks.setdefault(full_key, asyncio.Lock())
+        self._lock_users[full_key] = self._lock_users.get(full_key, 0) + 1
+        try:
+            async with lock:
+                body = self.get(full_key)
+                if body is not None:
+                    self.hits += 1
+                    return body
+                self.misses += 1
+                generation = self._generations.get(tag, 0)
+                body = await loader()
+                # Don't store a body that was loaded while a write invalidated the tag
+                if self._generations.get(tag, 0) == generation:
+                    self.set(full_key, tag, body)
+            return body
+        finally:
+            # Only once nobody is queued on it any more (a new lock then would mean a second loader),
+            # and also when the loader raised, or error-heavy keys would pile up here
+            self._lock_users[full_key] -= 1
+            if not self._lock_users[full_key]:
+                del self._lock_users[full_key]
+                del self._locks[full_key]
+
+    def add_listener(self, listener: Callable[[str, bool], None]):
+        # Called with (tag, remote) on every invalidation, for things derived from the same data.
+        # remote=True means another worker made the write (we heard about it via NOTIFY)
+        self._listeners.append(listener)
+
+    def invalidate(self, tag: str, remote: bool = False):
+        self._generations[tag] = self._generations.get(tag, 0) + 1
+        stale = [key for key, (_, entry_tag, _) in self._entries.items() if entry_tag == tag]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += 1
+        for listener in self._listeners:
+            listener(tag, remote)
+
+    def invalidate_soon(self, tag: str, delay: float = 0.1):
+        # Remote writes: a burst of NOTIFY events (e.g. a bulk import on another worker) becomes one invalidation
+        if tag in self._pending:
+            return
+        self._pending.add(tag)
+
+        def flush():
+            self._pending.discard(tag)
+            self.invalidate(tag, remote=True)
+        asyncio.get_running_loop().call_later(delay, flush)
+
+    def clear(self):
+        for tag in list(self._generations):
+            self._generations[tag] += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+_adapters: dict[type, TypeAdapter] = {}
+
+
+def encode_list(schema: type, rows) -> bytes:
+    # Validate ORM rows straight into JSON bytes (pydantic-core does the encoding)
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(list[schema])
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
@@ -1,13 +1,23 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base
 from settings import settings
+from metrics import TimedQueuePool, install_query_hooks
 
 # Create the async engine
 async_engine = create_async_engine(
     settings.DATABASE_URL_ASYNC,
-    echo=True, # Set to False in production
+    echo=settings.DB_ECHO,
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=False,
 )
 
+# Per-statement timings and slow query log for /metrics
+install_query_hooks(async_engine, settings.SLOW_QUERY_MS)
+
 # Create a session-maker
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
@@ -0,0 +1,139 @@
+import asyncio
+import json
+from typing import Callable, Optional
+
+import asyncpg
+from sqlalchemy import event as sa_event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from settings import settings
+
+# Channel the faculty trigger (migrations/003) publishes on
+FACULTY_CHANNEL = "faculty_changes"
+SUBSCRIBER_QUEUE_SIZE = 256
+RECONNECT_DELAY_SECONDS = 5.0
+
+# Server pids of this process's pooled connections: a NOTIFY sent from one of them is a write we made ourselves
+local_backend_pids: set[int] = set()
+
+
+def track_local_backends(engine: AsyncEngine):
+    @sa_event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pid = dbapi_connection.driver_connection.get_server_pid()
+        connection_record.info["backend_pid"] = pid
+        local_backend_pids.add(pid)
+
+    @sa_event.listens_for(engine.sync_engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        local_backend_pids.discard(connection_record.info.pop("backend_pid", None))
+
+
+class FacultyEventBroadcaster:
+    """Fans out Postgres NOTIFY events to every open stream.
+
+    One dedicated asyncpg connection LISTENs on the faculty channel for the whole
+    process, and every SSE subscriber gets its own bounded queue. A subscriber that
+    falls behind gets a single "resync" event instead of blocking everyone else.
+    """
+
+    def __init__(self, channel: str = FACULTY_CHANNEL):
+        self.channel = channel
+        self._conn: Optional[asyncpg.Connection] = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self._hooks: list[tuple[Callable[[dict], None], bool]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    def add_hook(self, hook: Callable[[dict], None], remote_only: bool = False):
+        # In-process consumers (e.g. cache invalidation). remote_only: skip the echo of our own writes,
+        # for hooks whose work the write endpoint already did
+        self._hooks.append((hook, remote_only))
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict, local: bool = False):
+        for hook, remote_only in self._hooks:
+            if local and remote_only:
+                continue
+            try:
+                hook(event)
+            except Exception as e:
+                print(f"Error in faculty event hook: {e}")
+
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow reader: throw its backlog away and tell it to refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+
+    def _on_notify(self, conn, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            print(f"Ignoring malformed {channel} payload: {payload!r}")
+            return
+        event.setdefault("type", "faculty")
+        self.publish(event, local=pid in local_backend_pids)
+
+    async def _connect(self):
+        self._conn = await asyncpg.connect(
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            database=settings.DB_DATABASE,
+        )
+        await self._conn.add_listener(self.channel, self._on_notify)
+
+    async def _run(self):
+        # Keep one LISTEN connection alive, reconnecting if the DB drops it
+        while not self._closing:
+            try:
+                if not self.connected:
+                    await self._connect()
+                    # Anything could have changed while we were disconnected
+                    self.publish({"type": "resync"})
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error on {self.channel} listener connection: {e}")
+                self._conn = None
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    def start(self):
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._closing = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.connected:
+            await self._conn.close()
+        self._conn = None
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event.get('type', 'faculty')}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+faculty_events = FacultyEventBroadcaster()
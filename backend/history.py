@@ -0,0 +1,247 @@
+import asyncio
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Date, Float, String, and_, cast, column, func, insert, literal, or_, select, true, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import AsyncSessionLocal
+from schedule import campus_tz
+from settings import settings
+
+GRANULARITIES = ("hour", "day")
+FLUSH_BATCH_SIZE = 1000
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    # Buckets follow campus local time, like date_trunc(granularity, ts, CAMPUS_TIMEZONE)
+    local = at.astimezone(campus_tz).replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        local = local.replace(hour=0)
+    return local.astimezone(timezone.utc)
+
+
+def rollup_upsert():
+    stmt = pg_insert(models.AvailabilityRollup)
+    table = models.AvailabilityRollup
+    return stmt.on_conflict_do_update(
+        index_elements=[table.granularity, table.bucket_start, table.department, table.role],
+        set_={
+            "went_available": table.went_available + stmt.excluded.went_available,
+            "went_unavailable": table.went_unavailable + stmt.excluded.went_unavailable,
+        },
+    )
+
+
+def sample_statement(slot: datetime):
+    """One snapshot of current occupancy, added to the hour and day buckets in a single statement.
+
+    last_sample_at guards the slot, so when several workers sample the same slot
+    only the first one counts.
+    """
+    table = models.AvailabilityRollup
+    granularity = values(column("granularity", String), name="g").data([(g,) for g in GRANULARITIES])
+    department = func.coalesce(models.Faculty.department, "")
+    role = func.coalesce(models.Faculty.role, "")
+    bucket = func.date_trunc(granularity.c.granularity, literal(slot), settings.CAMPUS_TIMEZONE)
+    rows = (
+        select(
+            granularity.c.granularity,
+            bucket,
+            department,
+            role,
+            literal(1),
+            func.count().filter(models.Faculty.availability.is_(True)),
+            func.count(),
+            literal(slot),
+        )
+        .select_from(models.Faculty)
+        .join(granularity, true())
+        .group_by(granularity.c.granularity, bucket, department, role)
+    )
+    stmt = pg_insert(table).from_select(
+        ["granularity", "bucket_start", "department", "role", "samples", "available_sum", "total_sum", "last_sample_at"], rows,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[table.granularity, table.bucket_start, table.department, table.role],
+        set_={
+            "samples": table.samples + 1,
+            "available_sum": table.available_sum + stmt.excluded.available_sum,
+            "total_sum": table.total_sum + stmt.excluded.total_sum,
+            "last_sample_at": stmt.excluded.last_sample_at,
+        },
+        where=or_(table.last_sample_at.is_(None), table.last_sample_at < stmt.excluded.last_sample_at),
+    )
+
+
+class AvailabilityHistory:
+    """Append-only availability log, written off the request path.
+
+    Endpoints call record() (a put_nowait, never awaits the DB). A background
+    task drains the queue every HISTORY_FLUSH_SECONDS or FLUSH_BATCH_SIZE events,
+    and writes the batch plus its rollup deltas in one transaction: one
+    executemany INSERT into the month partitions, one executemany UPSERT into
+    the hourly/daily buckets. If the queue is full (DB down for a long time),
+    events are dropped and counted rather than growing memory without bound.
+    """
+
+    def __init__(self, queue_size: int = 10000):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self.samples = 0
+        self._partitions: set[date] = set()
+        self._tasks: list[asyncio.Task] = []
+        self._batch: list[dict] = [] # taken off the queue, not written yet
+        self._writing: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def record(self, faculty_id: int, department: Optional[str], role: Optional[str], availability: bool,
+               source: str, previous: Optional[bool] = None):
+        if not settings.HISTORY_ENABLED or (previous is not None and previous == availability):
+            return # disabled, or not a change
+        try:
+            self.queue.put_nowait({
+                "faculty_id": faculty_id,
+                "department": department,
+                "role": role,
+                "availability": availability,
+                "source": source,
+                "changed_at": datetime.now(timezone.utc),
+            })
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _ensure_partitions(self, db: AsyncSession, events: list[dict]):
+        # Partition bounds are UTC months (migrations/009), changed_at is UTC too
+        for month in {event["changed_at"].date().replace(day=1) for event in events} - self._partitions:
+            await db.execute(select(func.ensure_availability_events_partition(cast(month, Date))))
+            self._partitions.add(month)
+
+    async def write(self, db: AsyncSession, events: list[dict]):
+        await self._ensure_partitions(db, events)
+        await db.execute(insert(models.AvailabilityEvent), events)
+
+        deltas = Counter()
+        for event in events:
+            for granularity in GRANULARITIES:
+                key = (granularity, bucket_start(event["changed_at"], granularity), event["department"] or "", event["role"] or "")
+                deltas[key + (event["availability"],)] += 1
+        rows = {}
+        for (granularity, start, department, role, available), count in deltas.items():
+            row = rows.setdefault((granularity, start, department, role), {
+                "granularity": granularity, "bucket_start": start, "department": department, "role": role,
+                "went_available": 0, "went_unavailable": 0,
+            })
+            row["went_available" if available else "went_unavailable"] += count
+        await db.execute(rollup_upsert(), list(rows.values()))
+        await db.commit()
+        self.written += len(events)
+
+    async def _flush_forever(self):
+        # _closing as well as cancel(): wait_for can swallow a cancel that lands as queue.get() returns
+        while not self._closing:
+            self._batch = [await self.queue.get()]
+            # Gather whatever else arrives in the flush window
+            deadline = asyncio.get_running_loop().time() + settings.HISTORY_FLUSH_SECONDS
+            while len(self._batch) < FLUSH_BATCH_SIZE and not self._closing:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            events, self._batch = self._batch, []
+            # Shielded: stop() waits for a write in progress instead of cutting it off
+            self._writing = asyncio.ensure_future(self._write_batch(events))
+            await asyncio.shield(self._writing)
+
+    async def _write_batch(self, events: list[dict]):
+        try:
+            async with AsyncSessionLocal() as session:
+                await self.write(session, events)
+        except Exception as e:
+            print(f"Error writing {len(events)} availability events: {e}")
+            self.dropped += len(events)
+
+    async def sample(self, db: AsyncSession, at: Optional[datetime] = None):
+        now = at or datetime.now(timezone.utc)
+        step = settings.HISTORY_SAMPLE_SECONDS
+        slot = datetime.fromtimestamp(now.timestamp() // step * step, timezone.utc)
+        await db.execute(sample_statement(slot))
+        await db.commit()
+        self.samples += 1
+
+    async def _sample_forever(self):
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    await self.sample(session)
+            except Exception as e:
+                print(f"Error sampling availability: {e}")
+            await asyncio.sleep(settings.HISTORY_SAMPLE_SECONDS)
+
+    def start(self):
+        self._closing = False
+        self._tasks = [asyncio.create_task(self._flush_forever()), asyncio.create_task(self._sample_forever())]
+
+    async def stop(self):
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._writing is not None:
+            await self._writing
+        # The batch the flusher was still gathering plus whatever is queued gets one last write
+        events, self._batch = self._batch, []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        if events:
+            await self._write_batch(events)
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "written": self.written, "dropped": self.dropped, "samples": self.samples}
+
+
+availability_history = AvailabilityHistory(settings.HISTORY_QUEUE_SIZE)
+
+
+async def fetch_trend(db: AsyncSession, granularity: str, since: datetime, until: datetime,
+                      department: Optional[str], role: Optional[str]) -> list[dict]:
+    table = models.AvailabilityRollup
+    where = [table.granularity == granularity, table.bucket_start >= bucket_start(since, granularity), table.bucket_start < until]
+    if department is not None:
+        where.append(table.department == department)
+    if role is not None:
+        where.append(table.role == role)
+    # Averages are per group (a group that first shows up mid-bucket has fewer samples), then summed over groups
+    samples = cast(func.nullif(table.samples, 0), Float)
+    stmt = (
+        select(
+            table.bucket_start,
+            func.sum(cast(table.available_sum, Float) / samples).label("avg_available"),
+            func.sum(cast(table.total_sum, Float) / samples).label("avg_total"),
+            func.sum(table.available_sum).label("available_sum"),
+            func.sum(table.total_sum).label("total_sum"),
+            func.sum(table.went_available).label("went_available"),
+            func.sum(table.went_unavailable).label("went_unavailable"),
+        )
+        .where(and_(*where))
+        .group_by(table.bucket_start)
+        .order_by(table.bucket_start)
+    )
+    buckets = []
+    for row in (await db.execute(stmt)).all():
+        buckets.append({
+            "bucket_start": row.bucket_start,
+            "avg_available": round(row.avg_available, 2) if row.avg_available is not None else None,
+            "avg_total": round(row.avg_total, 2) if row.avg_total is not None else None,
+            "availability_ratio": round(row.available_sum / row.total_sum, 4) if row.total_sum else None,
+            "went_available": row.went_available,
+            "went_unavailable": row.went_unavailable,
+        })
+    return buckets
@@ -1,14 +1,231 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import math
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse, PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from security import verify_password # whcih validates passwords
 from sqlalchemy import select,update,insert,delete,func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased, joinedload
+from typing import Optional
 
-import models, schemas
-from database import get_db, async_engine
+import models, schemas, routing, bulk, auth
+from batch import BatchFailed, run_batch
+from bundle import build_bundle, etag_matches
+from datetime import datetime, timedelta
+from auth import require_admin, require_admin_token, require_faculty_or_admin
+from analytics import analytics_counters, fetch_analytics, with_schedule
+from events import FacultyEventBroadcaster, faculty_events, format_sse, track_local_backends
+from news import NEWS_CHANNEL, active_news, fetch_news_delta, news_expiry, news_feed, news_version, prune_expired_news
+from schedule import PAST_QUERY_GRACE, SCHEDULE_CHANNEL, availability_index, campus_tz, load_availability_index, reload_soon
+from history import availability_history, fetch_trend
+from spatial import LOCATION_CHANNEL, load_location_grid, location_grid
+from search import load_search_index, load_search_locations, search_index
+from tiles import MapTiles, verify_image
+from cache import DirectoryCache
+from snapshots import DirectorySnapshot
+from shared_snapshot import SharedSnapshotStore
+from warmup import readiness, warm_pool
+from responses import FastJSONResponse
+from metrics import metrics, MetricsMiddleware
+from admission import AdmissionControl, AdmissionMiddleware
+from profiling import Profiler, ProfilingMiddleware
+from pagination import ListSpec, decode_cursor, escape_like
+from database import get_db, async_engine, AsyncSessionLocal
+from settings import settings
 
-app = FastAPI(title="Insider Navs API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the walkway graph once; /api/route never touches the DB after this
+    try:
+        async with AsyncSessionLocal() as session:
+            await routing.load_campus_graph(session, precompute=settings.ROUTE_PRECOMPUTE)
+    except Exception as e:
+        print(f"Error loading campus graph: {e}")
+    try:
+        async with AsyncSessionLocal() as session:
+            await auth.load_faculty_usernames(session)
+    except Exception as e:
+        print(f"Error loading faculty usernames: {e}")
+    try:
+        async with AsyncSessionLocal() as session:
+            await load_location_grid(session)
+    except Exception as e:
+        print(f"Error loading location grid: {e}")
+    try:
+        async with AsyncSessionLocal() as session:
+            await load_availability_index(session)
+    except Exception as e:
+        print(f"Error loading availability schedules: {e}")
+    try:
+        async with AsyncSessionLocal() as session:
+            await load_search_index(session)
+    except Exception as e:
+        print(f"Error loading search index: {e}")
+    if settings.LIVE_EVENTS_ENABLED:
+        # Changes made by other workers arrive here too, so drop our cached faculty lists (our own writes already did)
+        faculty_events.add_hook(lambda event: directory_cache.invalidate_soon("faculty"), remote_only=True)
+        faculty_events.add_hook(analytics_counters.apply_event)
+        faculty_events.add_hook(availability_index.apply_event)
+        faculty_events.add_hook(search_index.apply_event, remote_only=True) # local writes upsert it directly
+        faculty_events.add_hook(auth.apply_event)
+        faculty_events.start()
+        # News written by other workers (or pruned) wakes our long-poll requests too
+        news_events.add_hook(lambda event: directory_cache.invalidate_soon("flash_news"), remote_only=True)
+        news_events.add_hook(news_feed.changed, remote_only=True)
+        news_events.start()
+        # Timetable/override edits: our own endpoints rebuild the index right away, other workers' arrive here
+        schedule_events.add_hook(reload_soon, remote_only=True)
+        schedule_events.start()
+        # Locations added/moved by other workers: /api/locations/nearest, route labels and search follow
+        location_events.add_hook(lambda event: directory_cache.invalidate_soon("locations"), remote_only=True)
+        location_events.add_hook(reload_locations_soon, remote_only=True)
+        location_events.start()
+    reconcile_task = None
+    if settings.ANALYTICS_COUNTERS_ENABLED:
+        reconcile_task = asyncio.create_task(reconcile_analytics_forever())
+    prune_task = None
+    if settings.FLASH_NEWS_PRUNE_SECONDS > 0:
+        prune_task = asyncio.create_task(prune_news_forever())
+    if settings.HISTORY_ENABLED:
+        availability_history.start()
+    rebuild_task = asyncio.create_task(rebuild_search_forever()) if settings.SEARCH_REBUILD_SECONDS > 0 else None
+    map_task = asyncio.create_task(ensure_map_tiles()) if map_tiles.available else None
+    # Serve right away; /readyz says 503 until the pool and snapshots are warm
+    warmup_task = asyncio.create_task(warm_up())
+    yield
+    warmup_task.cancel()
+    if reconcile_task:
+        reconcile_task.cancel()
+    if prune_task:
+        prune_task.cancel()
+    if rebuild_task:
+        rebuild_task.cancel()
+    if map_task:
+        map_task.cancel()
+    map_tiles.shutdown()
+    if settings.HISTORY_ENABLED:
+        await availability_history.stop() # flushes what's still queued
+    if settings.LIVE_EVENTS_ENABLED:
+        await faculty_events.stop()
+        await news_events.stop()
+        await schedule_events.stop()
+        await location_events.stop()
+    await async_engine.dispose()
+
+async def reconcile_analytics_forever():
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                drift = await analytics_counters.reconcile(session)
+            if drift:
+                print(f"Analytics counters drifted from the DB, corrected: {drift}")
+        except Exception as e:
+            print(f"Error reconciling analytics counters: {e}")
+        await asyncio.sleep(settings.ANALYTICS_RECONCILE_SECONDS)
+
+async def prune_news_forever():
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                pruned = await prune_expired_news(session)
+            if pruned:
+                directory_cache.invalidate("flash_news")
+                news_feed.changed()
+        except Exception as e:
+            print(f"Error pruning expired flash news: {e}")
+        await asyncio.sleep(settings.FLASH_NEWS_PRUNE_SECONDS)
+
+async def reload_location_indexes():
+    # Everything derived from the locations table; our own writes update these directly
+    async with AsyncSessionLocal() as session:
+        await load_location_grid(session)
+        await routing.load_location_labels(session)
+        await load_search_locations(session) # faculty documents don't depend on locations
+
+_locations_reload_pending = False
+
+def reload_locations_soon(event: Optional[dict] = None, delay: float = 0.5):
+    """Location writes made by other workers (migrations/011): one rebuild per burst."""
+    global _locations_reload_pending
+    if _locations_reload_pending:
+        return
+    _locations_reload_pending = True
+
+    async def reload():
+        global _locations_reload_pending
+        await asyncio.sleep(delay)
+        _locations_reload_pending = False
+        try:
+            await reload_location_indexes()
+        except Exception as e:
+            print(f"Error reloading location indexes: {e}")
+
+    asyncio.ensure_future(reload())
+
+async def rebuild_search_forever():
+    # Safety net in case a NOTIFY was missed (listener reconnecting, live events disabled)
+    while True:
+        await asyncio.sleep(settings.SEARCH_REBUILD_SECONDS)
+        try:
+            async with AsyncSessionLocal() as session:
+                await load_location_grid(session)
+                await routing.load_location_labels(session)
+                await load_search_index(session) # faculty too, in case a faculty NOTIFY was missed
+        except Exception as e:
+            print(f"Error rebuilding search index: {e}")
+
+async def ensure_map_tiles():
+    # The last uploaded map wins over the configured one; slice it if the store doesn't match it yet
+    source = map_tiles.source_path if os.path.exists(map_tiles.source_path) else settings.MAP_SOURCE_PATH
+    if not source:
+        return
+    try:
+        if not await asyncio.to_thread(map_tiles.is_current, source):
+            built = await map_tiles.rebuild(source, wait=False) # another worker may already be on it
+            if built:
+                print(f"Built map tiles: {built}")
+    except Exception as e:
+        print(f"Error building map tiles: {e}")
+
+news_events = FacultyEventBroadcaster(NEWS_CHANNEL)
+schedule_events = FacultyEventBroadcaster(SCHEDULE_CHANNEL)
+location_events = FacultyEventBroadcaster(LOCATION_CHANNEL)
+# Lets the event hooks tell the NOTIFY echo of our own writes from other workers' writes
+track_local_backends(async_engine)
+map_tiles = MapTiles(settings.MAP_TILE_STORE)
+map_uploads: set[asyncio.Task] = set() # strong refs to running rebuilds
+
+app = FastAPI(title="Insider Navs API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+directory_cache = DirectoryCache(max_entries=settings.CACHE_MAX_ENTRIES, ttl_seconds=settings.CACHE_TTL_SECONDS)
+
+profiler = Profiler(settings.PROFILING_SAMPLE_RATE, settings.PROFILING_INTERVAL_MS / 1000, settings.PROFILING_KEEP)
+# Inside admission control: shed requests aren't worth a profile
+if settings.PROFILING_ENABLED:
+    profiler.install(async_engine)
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+admission = AdmissionControl(
+    route_limits=settings.ADMISSION_ROUTE_LIMITS,
+    default_limit=settings.ADMISSION_DEFAULT_LIMIT,
+    queue_size=settings.ADMISSION_QUEUE_SIZE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    rates={
+        "login": (settings.RATE_LIMIT_LOGIN_PER_MINUTE, settings.RATE_LIMIT_LOGIN_BURST),
+        "write": (settings.RATE_LIMIT_WRITE_PER_MINUTE, settings.RATE_LIMIT_WRITE_BURST),
+    },
+    trust_forwarded_for=settings.TRUST_FORWARDED_FOR,
+)
+# Innermost middleware, so shed 429/503s still get CORS headers and show up in /metrics
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, control=admission)
+    metrics.add_renderer(admission.render)
 
 # Configure CORS (Cross-Origin Resource Sharing) allowing React frontend to make requests to py fast backend
 app.add_middleware(
@@ -17,43 +234,549 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After", "X-Profile-Id"],
 )
 
+# Per-route latency/status/in-flight for /metrics
+app.add_middleware(MetricsMiddleware)
+metrics.add_renderer(lambda: [
+    "# TYPE directory_cache_hits_total counter",
+    f"directory_cache_hits_total {directory_cache.hits}",
+    "# TYPE directory_cache_misses_total counter",
+    f"directory_cache_misses_total {directory_cache.misses}",
+])
+metrics.add_renderer(lambda: [
+    "# TYPE availability_history_queued gauge",
+    f"availability_history_queued {availability_history.queue.qsize()}",
+    "# TYPE availability_history_written_total counter",
+    f"availability_history_written_total {availability_history.written}",
+    "# TYPE availability_history_dropped_total counter",
+    f"availability_history_dropped_total {availability_history.dropped}",
+])
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Liveness: the process is up and the event loop answers
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"status": "ok"}
+
+# Readiness: only once the startup warmup finished, so the load balancer holds traffic until then
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    return FastJSONResponse(readiness.status(), status_code=200 if readiness.ready else 503)
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Insider Navs API!"}
 
+FACULTY_LIST = ListSpec(models.Faculty, schemas.Faculty, ("name", "id"))
+LOCATION_LIST = ListSpec(models.Location, schemas.Location, ("label", "id"))
+FLASH_NEWS_LIST = ListSpec(models.FlashNews, schemas.FlashNews, ("id",), descending=True)
+# Many-to-one, so joinedload is a single LEFT OUTER JOIN without row fan-out
+FACULTY_WITH_LOCATION_LIST = ListSpec(models.Faculty, schemas.FacultyWithLocation, ("name", "id"), options=(joinedload(models.Faculty.location),))
+
+
+async def build_full_list(spec: ListSpec, db: AsyncSession) -> bytes:
+    body, _ = await spec.fetch_page(db, [], None, None, None)
+    return body
+
+shared_store = SharedSnapshotStore(settings.SHARED_SNAPSHOT_PATH) if settings.SHARED_SNAPSHOT_PATH else None
+snapshots = {
+    "faculty": DirectorySnapshot("faculty", lambda db: build_full_list(FACULTY_LIST, db), settings.SNAPSHOT_MAX_AGE_SECONDS, shared_store),
+    "locations": DirectorySnapshot("locations", lambda db: build_full_list(LOCATION_LIST, db), settings.SNAPSHOT_MAX_AGE_SECONDS, shared_store),
+}
+async def build_kiosk_bundle(db: AsyncSession):
+    global bundle_shared_generation
+    if shared_store is not None:
+        bundle_shared_generation = shared_store.current_generation()
+    locations = await snapshots["locations"].get()
+    faculty = await snapshots["faculty"].get()
+    flash_news, _ = await FLASH_NEWS_LIST.fetch_page(db, [active_news()], None, None, None)
+    return await build_bundle(locations, faculty, flash_news)
+
+kiosk_bundle = DirectorySnapshot("bundle", build_kiosk_bundle, settings.SNAPSHOT_MAX_AGE_SECONDS)
+bundle_shared_generation = None
+metrics.add_renderer(lambda: [
+    "# TYPE snapshot_hits_total counter",
+    *[f'snapshot_hits_total{{snapshot="{name}"}} {snapshot.hits}' for name, snapshot in {**snapshots, "bundle": kiosk_bundle}.items()],
+    "# TYPE snapshot_misses_total counter",
+    *[f'snapshot_misses_total{{snapshot="{name}"}} {snapshot.misses}' for name, snapshot in {**snapshots, "bundle": kiosk_bundle}.items()],
+    "# TYPE snapshot_rebuild_failing gauge",
+    *[f'snapshot_rebuild_failing{{snapshot="{name}"}} {snapshot.failures}' for name, snapshot in {**snapshots, "bundle": kiosk_bundle}.items()],
+])
+
+async def current_bundle():
+    # In shared mode another worker may have republished the lists this bundle was built from
+    if shared_store is not None and shared_store.current_generation() != bundle_shared_generation:
+        kiosk_bundle.invalidate()
+    return await kiosk_bundle.get()
+
+def hot_statements() -> list:
+    # Statement shapes most requests use; binds don't change the SQL, so ids that match nothing are enough
+    return [
+        FACULTY_LIST.statement([], None, None, 1), # paged lists: LIMIT is a bind, one prepare covers every page size
+        FACULTY_LIST.statement([], None, ["", 0], 1), # ...and every page after the first
+        LOCATION_LIST.statement([], None, None, 1),
+        FLASH_NEWS_LIST.statement([active_news()], None, None, None),
+        select(models.Faculty).where(models.Faculty.id == -1),
+        select(models.Location).options(joinedload(models.Location.faculty)).where(models.Location.id == ""),
+    ]
+
+async def warm_up():
+    connections = min(settings.WARMUP_CONNECTIONS, settings.DB_POOL_SIZE)
+    while True:
+        if connections > 0:
+            await readiness.step("pool", lambda: warm_pool(async_engine, connections, hot_statements()))
+        # The pre-encoded bodies kiosks ask for first
+        for name, snapshot in snapshots.items():
+            await readiness.step(f"snapshot:{name}", snapshot.get)
+        await readiness.step("bundle", current_bundle)
+        if not readiness.failed:
+            break
+        await asyncio.sleep(settings.WARMUP_RETRY_SECONDS) # e.g. the DB isn't reachable yet
+    readiness.mark_ready()
+
+directory_cache.add_listener(lambda tag, remote: snapshots[tag].invalidate(remote) if tag in snapshots else None)
+directory_cache.add_listener(lambda tag, remote: kiosk_bundle.invalidate() if tag in ("faculty", "locations", "flash_news") else None)
+# The joined list goes stale when either side changes
+directory_cache.add_listener(lambda tag, remote: directory_cache.invalidate("faculty_locations", remote) if tag in ("faculty", "locations") else None)
+
+
+async def list_response(spec: ListSpec, tag: str, db: AsyncSession, where: list, key: tuple,
+                        fields: Optional[str], limit: Optional[int], cursor: Optional[str], stream: bool):
+    # Shared by the directory list endpoints: projection, keyset paging, streaming and caching
+    if tag in snapshots and not (where or fields or limit or cursor or stream):
+        # The common kiosk request: hand out the pre-encoded bytes
+        return Response(content=await snapshots[tag].get(), media_type="application/json")
+
+    columns = spec.parse_fields(fields)
+    if stream:
+        return StreamingResponse(spec.stream_json(where, columns), media_type="application/json")
+
+    after = decode_cursor(cursor, spec.sort_columns()) if cursor else None
+    body, next_cursor = await directory_cache.get_or_load(
+        tag, key + (fields, limit, cursor),
+        lambda: spec.fetch_page(db, where, columns, after, limit),
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.get("/api/locations", response_model=list[schemas.Location])
-async def get_locations(db: AsyncSession = Depends(get_db)):
+async def get_locations(
+    fields: Optional[str] = None, # e.g. fields=id,label
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None, # X-Next-Cursor from the previous page
+    stream: bool = False, # stream the full list from a server-side cursor
+    db: AsyncSession = Depends(get_db)
+):
     try:
-        result = await db.execute(select(models.Location).order_by(models.Location.label))
-        locations = result.scalars().all()
-        return locations
+        return await list_response(LOCATION_LIST, "locations", db, [], (), fields, limit, cursor, stream)
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def available_now(availability: Optional[bool]) -> Optional[int]:
+    # Who is available right now (schedule.py); also part of the cache key, so a timetable boundary isn't served stale
+    if availability is None or availability_index.built_at is None:
+        return None
+    return availability_index.available_bits(datetime.now(campus_tz))
+
+def faculty_filters(school, department, role, designation, availability, name_prefix, available_bits=None) -> list:
+    where = []
+    if school:
+        where.append(models.Faculty.school == school)
+    if department:
+        where.append(models.Faculty.department == department)
+    if role:
+        where.append(models.Faculty.role == role)
+    if designation:
+        where.append(models.Faculty.designation == designation)
+    if availability is not None and available_bits is not None:
+        available = models.Faculty.id.in_(availability_index.ids_of(available_bits))
+        where.append(available if availability else ~available)
+    elif availability is not None:
+        where.append(models.Faculty.availability == availability) # index not loaded: the manual toggle
+    if name_prefix:
+        # Matches the lower(name) text_pattern_ops index
+        where.append(func.lower(models.Faculty.name).like(escape_like(name_prefix.lower()) + "%", escape="\\"))
+    return where
+
 @app.get("/api/faculty", response_model=list[schemas.Faculty])
-async def get_faculty(db: AsyncSession = Depends(get_db)):
+async def get_faculty(
+    school: Optional[str] = None,
+    department: Optional[str] = None,
+    role: Optional[str] = None,
+    designation: Optional[str] = None,
+    availability: Optional[bool] = None,
+    name_prefix: Optional[str] = None,
+    fields: Optional[str] = None, # e.g. fields=id,name,department,designation
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None, # X-Next-Cursor from the previous page
+    stream: bool = False, # stream the full list from a server-side cursor
+    db: AsyncSession = Depends(get_db)
+):
+    available_bits = available_now(availability)
+    where = faculty_filters(school, department, role, designation, availability, name_prefix, available_bits)
     try:
-        result = await db.execute(select(models.Faculty).order_by(models.Faculty.name))
-        faculty = result.scalars().all()
-        return faculty
+        key = (school, department, role, designation, availability, name_prefix, available_bits)
+        return await list_response(FACULTY_LIST, "faculty", db, where, key, fields, limit, cursor, stream)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# GET Faculty with their location embedded, same filters and paging as /api/faculty
+@app.get("/api/faculty/with-location", response_model=list[schemas.FacultyWithLocation])
+async def get_faculty_with_location(
+    school: Optional[str] = None,
+    department: Optional[str] = None,
+    role: Optional[str] = None,
+    designation: Optional[str] = None,
+    availability: Optional[bool] = None,
+    name_prefix: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    available_bits = available_now(availability)
+    where = faculty_filters(school, department, role, designation, availability, name_prefix, available_bits)
+    try:
+        key = (school, department, role, designation, availability, name_prefix, available_bits)
+        # No field projection here: the embedded location is a relationship, not a column
+        return await list_response(FACULTY_WITH_LOCATION_LIST, "faculty_locations", db, where, key, None, limit, cursor, stream)
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# GET Live faculty availability/profile changes as Server-Sent Events
+@app.get("/api/faculty/stream")
+async def stream_faculty_events(request: Request):
+    if not settings.LIVE_EVENTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Live events are disabled")
+
+    async def event_stream():
+        queue = faculty_events.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.SSE_KEEPALIVE_SECONDS)
+                    yield format_sse(event)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n" # stops proxies from closing an idle stream
+        finally:
+            faculty_events.unsubscribe(queue)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
+
 @app.get("/api/flash-news", response_model=list[schemas.FlashNews])
-async def get_flash_news(db: AsyncSession = Depends(get_db)):
+async def get_flash_news(
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None, # X-Next-Cursor from the previous page
+    stream: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
     try:
-        result = await db.execute(select(models.FlashNews).order_by(models.FlashNews.id.desc()))
-        news = result.scalars().all()
-        return news
+        return await list_response(FLASH_NEWS_LIST, "flash_news", db, [active_news()], (), fields, limit, cursor, stream)
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail="Internal server error")
+
+# GET Flash news changes since the ticker's last poll; with wait>0 the request is held until something changes
+@app.get("/api/flash-news/updates", response_model=schemas.FlashNewsDelta, responses={204: {"description": "Nothing changed"}})
+async def get_flash_news_updates(
+    since_id: int = 0,
+    version: Optional[int] = None, # from the previous response; omit on the first call
+    wait: float = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        if version is not None:
+            # Don't hold a pooled connection while parked; get_db only checks one out on first use
+            changed = await news_feed.wait(version, min(wait, settings.FLASH_NEWS_LONG_POLL_SECONDS)) if wait else await news_feed.current() != version
+            if not changed:
+                return Response(status_code=204)
+        items, active_ids = await fetch_news_delta(db, since_id)
+        latest_id = max(active_ids[-1] if active_ids else 0, since_id)
+        # Derived from the rows being returned, so any worker can answer the next poll
+        return schemas.FlashNewsDelta(version=news_version(active_ids), latest_id=latest_id, items=items, active_ids=active_ids)
+    except Exception as e:
+        print(f"Error fetching flash news updates: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# GET Locations, faculty and flash news in one pre-compressed, content-hashed body for kiosks
+@app.get("/api/bundle")
+async def get_bundle(request: Request):
+    try:
+        bundle = await current_bundle()
+    except Exception as e:
+        print(f"Error building kiosk bundle: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    # no-cache = always revalidate; an unchanged kiosk costs one 304 with no body
+    headers = {"ETag": bundle.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), bundle.etag):
+        return Response(status_code=304, headers=headers)
+    coding, body = bundle.pick(request.headers.get("accept-encoding"))
+    if coding:
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# GET Current bundle version, for kiosks that poll before deciding to refetch
+@app.get("/api/bundle/version")
+async def get_bundle_version():
+    try:
+        bundle = await current_bundle()
+    except Exception as e:
+        print(f"Error building kiosk bundle: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    return {"version": bundle.etag.strip('"'), "sizes": {"raw": len(bundle.raw), **{k: len(v) for k, v in bundle.encodings.items()}}}
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    stats = directory_cache.stats()
+    # The unfiltered lists and the kiosk bundle are served from snapshots, which never touch directory_cache
+    stats["snapshots"] = {name: snapshot.stats() for name, snapshot in {**snapshots, "bundle": kiosk_bundle}.items()}
+    stats["search_index"] = search_index.stats()
+    if shared_store is not None:
+        stats["shared_snapshot"] = shared_store.stats()
+    return stats
     
+# GET Typeahead over faculty and locations from the in-memory index, e.g. /api/search?q=shar&types=faculty
+@app.get("/api/search", response_model=list[schemas.SearchResult])
+async def search_directory(
+    q: str = Query(..., max_length=100),
+    types: Optional[str] = None, # comma separated: faculty,location (default both)
+    limit: int = Query(10, ge=1, le=50),
+):
+    wanted = {t.strip() for t in types.split(",") if t.strip()} if types else None
+    if wanted and not wanted <= {"faculty", "location"}:
+        raise HTTPException(status_code=400, detail="types must be faculty and/or location")
+    return search_index.search(q, wanted, limit)
+
+# GET Campus map tile layout; clients fill tile_url with the zoom/x/y they need
+@app.get("/api/map")
+async def get_map():
+    try:
+        summary = map_tiles.summary()
+    except ValueError as e:
+        print(f"Error reading map tiles: {e}")
+        raise HTTPException(status_code=503, detail="Map tiles are unavailable")
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No map tiles yet")
+    # The version changes with every new map, so this small document is the only thing clients revalidate
+    return FastJSONResponse({**summary, "building": map_tiles.building, "last_error": map_tiles.last_error}, headers={"Cache-Control": "no-cache"})
+
+# GET One map tile, served straight from the mmap'd store
+@app.get("/api/map/tiles/{version}/{zoom}/{x}/{y}.jpg")
+async def get_map_tile(request: Request, version: str, zoom: int, x: int, y: int):
+    try:
+        found = map_tiles.store.tile(version, zoom, x, y)
+    except ValueError as e:
+        print(f"Error reading map tiles: {e}")
+        raise HTTPException(status_code=503, detail="Map tiles are unavailable")
+    if found is None:
+        raise HTTPException(status_code=404, detail="Tile not found")
+    body, tile_hash = found
+    # The map version is in the URL, so a tile URL never changes content: cache it for good
+    headers = {"ETag": f'"{tile_hash}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="image/jpeg", headers=headers)
+
+# POST Upload a new campus map (raw image body); the pyramid is rebuilt in the background
+@app.post("/api/map", status_code=202, dependencies=[Depends(require_admin_token)])
+async def upload_map(request: Request):
+    if not map_tiles.available:
+        raise HTTPException(status_code=503, detail="Map tiling is not available (Pillow is not installed)")
+    max_bytes = int(settings.MAP_MAX_UPLOAD_MB * 1024 * 1024)
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Map image is larger than {settings.MAP_MAX_UPLOAD_MB} MB")
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Map image is larger than {settings.MAP_MAX_UPLOAD_MB} MB")
+    try:
+        await asyncio.to_thread(verify_image, bytes(data))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Not a readable image: {e}")
+    try:
+        await asyncio.to_thread(map_tiles.save_source, bytes(data))
+    except Exception as e:
+        print(f"Error saving uploaded map: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def rebuild():
+        try:
+            print(f"Built map tiles: {await map_tiles.rebuild(map_tiles.source_path)}")
+        except Exception as e:
+            print(f"Error building map tiles: {e}")
+
+    task = asyncio.create_task(rebuild())
+    map_uploads.add(task)
+    task.add_done_callback(map_uploads.discard)
+    return {"status": "building", "bytes": len(data)}
+
+# GET Recent request profiles (newest first), see profiling.py
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin_token)])
+async def list_profiles():
+    return [profile.summary() for profile in reversed(profiler.profiles)]
+
+# GET One profile: JSON with the sampled stacks, or format=folded for flame graph tools
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(require_admin_token)])
+async def get_profile(profile_id: str, format: str = Query("json", pattern="^(json|folded)$")):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (only the most recent ones are kept)")
+    if format == "folded":
+        headers = {"Content-Disposition": f'attachment; filename="profile-{profile.id}.folded"'}
+        return PlainTextResponse(profile.folded(), headers=headers)
+    return {**profile.summary(), "stacks": [{"stack": list(stack), "samples": count} for stack, count in profile.stacks.most_common()]}
+
+@app.get("/api/route", response_model=schemas.RouteResult)
+async def get_route(from_location: str = Query(..., alias="from"), to_location: str = Query(..., alias="to")):
+    if from_location == to_location:
+        raise HTTPException(status_code=400, detail="Please select different locations for 'from' and 'to'.")
+    try:
+        return routing.campus_graph.route(from_location, to_location, routing.location_labels)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Location '{e.args[0]}' is not on the walkway map.")
+    except routing.RouteNotFound:
+        raise HTTPException(status_code=404, detail="No walkable route between these locations.")
+
+# POST Reload the walkway graph after nodes/edges are edited
+@app.post("/api/route/reload", dependencies=[Depends(require_admin_token)])
+async def reload_route_graph(db: AsyncSession = Depends(get_db)):
+    try:
+        graph = await routing.load_campus_graph(db, precompute=settings.ROUTE_PRECOMPUTE)
+        return {"nodes": len(graph.nodes), "locations": len(graph.location_nodes)}
+    except Exception as e:
+        print(f"Error reloading campus graph: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# POST Bulk import faculty (CSV or NDJSON body, one faculty per row)
+@app.post("/api/faculty/bulk", response_model=schemas.BulkImportResult, dependencies=[Depends(require_admin_token)])
+async def bulk_import_faculty(request: Request, format: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    fmt = bulk.request_format(request, format)
+    try:
+        valid, errors = await bulk.parse_upload(request, fmt, schemas.FacultyCreate, list_fields={"courses_taken"})
+
+        known_locations = await bulk.existing_location_ids(db, {f.location_id for _, f in valid if f.location_id})
+        rows = []
+        for line, faculty in valid:
+            if faculty.location_id and faculty.location_id not in known_locations:
+                errors.append({"line": line, "error": f"Location ID '{faculty.location_id}' does not exist."})
+                continue
+            rows.append(faculty.model_dump())
+
+        # Multi-row INSERTs in batches, one transaction for the whole upload
+        inserted = []
+        insert_stmt = insert(models.Faculty).returning(models.Faculty)
+        for batch in bulk.batches(rows):
+            result = await db.execute(insert_stmt, batch)
+            inserted.extend(result.scalars().all())
+        await db.commit()
+
+        if inserted:
+            directory_cache.invalidate("faculty")
+        for faculty in inserted:
+            analytics_counters.upsert_faculty(faculty.id, faculty.availability, faculty.role)
+            availability_index.set_faculty(faculty.id, faculty.availability, faculty.role)
+            availability_history.record(faculty.id, faculty.department, faculty.role, faculty.availability, "bulk")
+            search_index.upsert_faculty(faculty)
+
+        errors.sort(key=lambda err: err["line"])
+        return schemas.BulkImportResult(inserted=len(inserted), skipped=len(errors), errors=errors)
+    except HTTPException as http_exc:
+        await db.rollback()
+        raise http_exc
+    except Exception as e:
+        await db.rollback()
+        print(f"Error bulk importing faculty: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# GET Export all faculty as CSV / NDJSON, streamed from a server-side cursor
+@app.get("/api/faculty/export")
+async def export_faculty(format: str = "ndjson"):
+    fmt = format.lower()
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    rows = bulk.stream_export(models.Faculty, schemas.Faculty, (models.Faculty.name, models.Faculty.id), fmt)
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="faculty.{fmt}"'}
+    return StreamingResponse(rows, media_type=media_type, headers=headers)
+
+# POST Bulk import locations (CSV or NDJSON body, one location per row)
+@app.post("/api/locations/bulk", response_model=schemas.BulkImportResult, dependencies=[Depends(require_admin_token)])
+async def bulk_import_locations(request: Request, format: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    fmt = bulk.request_format(request, format)
+    try:
+        valid, errors = await bulk.parse_upload(request, fmt, schemas.LocationCreate)
+
+        rows, lines = [], {}
+        for line, location in valid:
+            if location.id in lines:
+                errors.append({"line": line, "error": f"Location ID '{location.id}' is repeated (first seen on line {lines[location.id]})."})
+                continue
+            lines[location.id] = line
+            rows.append(location.model_dump())
+
+        # Existing ids are skipped by ON CONFLICT instead of a pre-check SELECT per row
+        inserted_ids = set()
+        insert_stmt = pg_insert(models.Location).on_conflict_do_nothing(index_elements=[models.Location.id]).returning(models.Location.id)
+        for batch in bulk.batches(rows):
+            result = await db.execute(insert_stmt, batch)
+            inserted_ids.update(result.scalars().all())
+        await db.commit()
+
+        for location_id, line in lines.items():
+            if location_id not in inserted_ids:
+                errors.append({"line": line, "error": f"Location ID '{location_id}' already exists."})
+        if inserted_ids:
+            directory_cache.invalidate("locations")
+            analytics_counters.add_locations(len(inserted_ids))
+        for row in rows:
+            if row["id"] in inserted_ids:
+                location_grid.upsert(row)
+                search_index.upsert_location(row)
+                routing.set_location_label(row["id"], row["label"])
+
+        errors.sort(key=lambda err: err["line"])
+        return schemas.BulkImportResult(inserted=len(inserted_ids), skipped=len(errors), errors=errors)
+    except HTTPException as http_exc:
+        await db.rollback()
+        raise http_exc
+    except Exception as e:
+        await db.rollback()
+        print(f"Error bulk importing locations: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# GET Export all locations as CSV / NDJSON, streamed from a server-side cursor
+@app.get("/api/locations/export")
+async def export_locations(format: str = "ndjson"):
+    fmt = format.lower()
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    rows = bulk.stream_export(models.Location, schemas.Location, (models.Location.label, models.Location.id), fmt)
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="locations.{fmt}"'}
+    return StreamingResponse(rows, media_type=media_type, headers=headers)
+
 @app.get("/api/faculty/{faculty_id}", response_model=schemas.Faculty)
 async def get_faculty_by_id(faculty_id: int, db: AsyncSession = Depends(get_db)):
     try:
@@ -81,10 +804,12 @@ async def admin_login(login_data: schemas.UserLogin, db: AsyncSession = Depends(
         if not admin_user:
             return schemas.LoginResponse(success=False, message="Invalid username or password")
 
-        if not verify_password(login_data.password, admin_user.password):
+        # Hash check runs on the auth thread pool so it doesn't block other requests
+        if not await auth.verify_password_async(login_data.password, admin_user.password):
             return schemas.LoginResponse(success=False, message="Invalid username or password")
 
-        return schemas.LoginResponse(success=True, message="Login successful", username=admin_user.username)
+        token = auth.issue_token("admin", admin_user.username)
+        return schemas.LoginResponse(success=True, message="Login successful", username=admin_user.username, token=token)
 
     except Exception as e:
         print(e)
@@ -93,14 +818,13 @@ async def admin_login(login_data: schemas.UserLogin, db: AsyncSession = Depends(
 @app.post("/api/faculty/login", response_model=schemas.LoginResponse)
 async def faculty_login(login_data: schemas.FacultyUsernameLogin, db: AsyncSession = Depends(get_db)):
     try:
-        stmt = select(models.FacultyUser).where(models.FacultyUser.username == login_data.username.lower().strip())
-        result = await db.execute(stmt)
-        faculty_user = result.scalar_one_or_none()
+        faculty_id = await auth.lookup_faculty_username(db, login_data.username)
 
-        if not faculty_user:
+        if faculty_id is None:
             return schemas.LoginResponse(success=False, message="Invalid faculty username")
 
-        return schemas.LoginResponse(success=True, message="Login successful", faculty_id=faculty_user.faculty_id)
+        token = auth.issue_token("faculty", faculty_id)
+        return schemas.LoginResponse(success=True, message="Login successful", faculty_id=faculty_id, token=token)
 
     except Exception as e:
         print(e)
@@ -108,30 +832,34 @@ async def faculty_login(login_data: schemas.FacultyUsernameLogin, db: AsyncSessi
     
 
 # PUT Update Faculty Availability
-@app.put("/api/faculty/{faculty_id}/availability", response_model=schemas.Faculty)
+@app.put("/api/faculty/{faculty_id}/availability", response_model=schemas.Faculty, dependencies=[Depends(require_faculty_or_admin)])
 async def update_faculty_availability(
     faculty_id: int,
     availability_update: schemas.FacultyAvailabilityUpdate,
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        # 1. Check if faculty exists
-        get_stmt = select(models.Faculty).where(models.Faculty.id == faculty_id)
-        result = await db.execute(get_stmt)
-        db_faculty = result.scalar_one_or_none()
-        if db_faculty is None:
-            raise HTTPException(status_code=404, detail="Faculty not found")
-
-        # 2. Update the availability
+        # Single statement: no row back means the faculty doesn't exist
+        # Self-join on the pre-update row so the old value comes back too (for the history log)
+        before = aliased(models.Faculty)
         update_stmt = (
             update(models.Faculty)
-            .where(models.Faculty.id == faculty_id)
+            .where(models.Faculty.id == faculty_id, before.id == models.Faculty.id)
             .values(availability=availability_update.availability)
-            .returning(models.Faculty) # Return the updated record
+            .returning(models.Faculty, before.availability) # Return the updated record
         )
         updated_result = await db.execute(update_stmt)
+        row = updated_result.one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Faculty not found")
+        updated_faculty, previous = row
+
         await db.commit() # Save changes to the database
-        updated_faculty = updated_result.scalar_one() # Get the single updated row
+        directory_cache.invalidate("faculty")
+        analytics_counters.upsert_faculty(updated_faculty.id, updated_faculty.availability, updated_faculty.role)
+        availability_index.set_faculty(updated_faculty.id, updated_faculty.availability, updated_faculty.role)
+        availability_history.record(updated_faculty.id, updated_faculty.department, updated_faculty.role,
+                                    updated_faculty.availability, "availability", previous)
 
         return updated_faculty
     except HTTPException as http_exc:
@@ -144,27 +872,20 @@ async def update_faculty_availability(
 
 
 # PUT Update Faculty Profile
-@app.put("/api/faculty/{faculty_id}", response_model=schemas.Faculty)
+@app.put("/api/faculty/{faculty_id}", response_model=schemas.Faculty, dependencies=[Depends(require_faculty_or_admin)])
 async def update_faculty_profile(
     faculty_id: int,
     profile_update: schemas.FacultyProfileUpdate,
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        # 1. Check if faculty exists
-        get_stmt = select(models.Faculty).where(models.Faculty.id == faculty_id)
-        result = await db.execute(get_stmt)
-        db_faculty = result.scalar_one_or_none()
-        if db_faculty is None:
-            raise HTTPException(status_code=404, detail="Faculty not found")
-
-        # 2. Create a dictionary of fields to update, excluding None values
+        # 1. Create a dictionary of fields to update, excluding None values
         update_data = profile_update.model_dump(exclude_unset=True)
 
         if not update_data:
              raise HTTPException(status_code=400, detail="No update data provided")
 
-        # 3. Perform the update
+        # 2. Perform the update; no row back means the faculty doesn't exist
         update_stmt = (
             update(models.Faculty)
             .where(models.Faculty.id == faculty_id)
@@ -172,8 +893,15 @@ async def update_faculty_profile(
             .returning(models.Faculty)
         )
         updated_result = await db.execute(update_stmt)
+        updated_faculty = updated_result.scalar_one_or_none()
+        if updated_faculty is None:
+            raise HTTPException(status_code=404, detail="Faculty not found")
+
         await db.commit()
-        updated_faculty = updated_result.scalar_one()
+        directory_cache.invalidate("faculty")
+        analytics_counters.upsert_faculty(updated_faculty.id, updated_faculty.availability, updated_faculty.role)
+        availability_index.set_faculty(updated_faculty.id, updated_faculty.availability, updated_faculty.role)
+        search_index.upsert_faculty(updated_faculty)
 
         return updated_faculty
     except HTTPException as http_exc:
@@ -185,23 +913,72 @@ async def update_faculty_profile(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# GET The k closest locations (optionally of one type) to a location or a map point, from the in-memory grid
+@app.get("/api/locations/nearest", response_model=list[schemas.NearbyLocation])
+async def get_nearest_locations(
+    from_location: Optional[str] = Query(None, alias="from"),
+    x: Optional[float] = None,
+    y: Optional[float] = None,
+    floor: int = 0,
+    type: Optional[str] = None,
+    k: int = Query(5, ge=1, le=50),
+):
+    if from_location:
+        point = location_grid.points.get(from_location)
+        if point is None:
+            raise HTTPException(status_code=404, detail=f"Location '{from_location}' is not placed on the map.")
+        x, y, floor, _ = point
+    elif x is None or y is None:
+        raise HTTPException(status_code=400, detail="Pass either 'from' or both 'x' and 'y'.")
+    elif not (math.isfinite(x) and math.isfinite(y)):
+        raise HTTPException(status_code=400, detail="'x' and 'y' must be finite numbers.")
+
+    nearest = location_grid.nearest(x, y, floor, k, type, exclude=from_location)
+    return [{**location_grid.details[location_id], "distance_m": round(dist, 1)} for dist, location_id in nearest]
+
+# GET One location with everyone sitting there
+@app.get("/api/locations/{location_id}/faculty", response_model=schemas.LocationWithFaculty)
+async def get_location_faculty(location_id: str, db: AsyncSession = Depends(get_db)):
+    try:
+        # One query: the location LEFT JOINed to its faculty (ix_faculty_location_id), 404 falls out of the same row set
+        stmt = (
+            select(models.Location)
+            .options(joinedload(models.Location.faculty))
+            .where(models.Location.id == location_id)
+        )
+        location = (await db.execute(stmt)).unique().scalar_one_or_none()
+        if location is None:
+            raise HTTPException(status_code=404, detail="Location not found")
+        return location
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        print(f"Error fetching faculty for location ID {location_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # POST Create a new Location
-@app.post("/api/locations", response_model=schemas.Location, status_code=201) # 201 Created
+@app.post("/api/locations", response_model=schemas.Location, status_code=201, dependencies=[Depends(require_admin)]) # 201 Created
 async def create_location(location_data: schemas.LocationCreate, db: AsyncSession = Depends(get_db)):
     try:
-        get_stmt = select(models.Location).where(models.Location.id == location_data.id)
-        existing = await db.execute(get_stmt)
-        if existing.scalar_one_or_none():
-            raise HTTPException(status_code=400, detail=f"Location ID '{location_data.id}' already exists.")
-
+        # ON CONFLICT instead of a pre-check SELECT: nothing returned means the id is taken
         insert_stmt = (
-            insert(models.Location)
+            pg_insert(models.Location)
             .values(**location_data.model_dump())
+            .on_conflict_do_nothing(index_elements=[models.Location.id])
             .returning(models.Location) 
         )
         result = await db.execute(insert_stmt)
+        new_location = result.scalar_one_or_none()
+        if new_location is None:
+            raise HTTPException(status_code=400, detail=f"Location ID '{location_data.id}' already exists.")
+
         await db.commit()
-        new_location = result.scalar_one()
+        directory_cache.invalidate("locations")
+        analytics_counters.add_locations(1)
+        location = schemas.Location.model_validate(new_location).model_dump()
+        location_grid.upsert(location)
+        search_index.upsert_location(location)
+        routing.set_location_label(new_location.id, new_location.label)
         return new_location
     except HTTPException as http_exc:
         await db.rollback()
@@ -212,19 +989,13 @@ async def create_location(location_data: schemas.LocationCreate, db: AsyncSessio
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # PUT Update an existing Location
-@app.put("/api/locations/{location_id}", response_model=schemas.Location)
+@app.put("/api/locations/{location_id}", response_model=schemas.Location, dependencies=[Depends(require_admin)])
 async def update_location(
     location_id: str,
     location_update: schemas.LocationUpdate,
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        get_stmt = select(models.Location).where(models.Location.id == location_id)
-        result = await db.execute(get_stmt)
-        db_location = result.scalar_one_or_none()
-        if db_location is None:
-            raise HTTPException(status_code=404, detail="Location not found")
-
         update_data = location_update.model_dump(exclude_unset=True)
         if not update_data:
              raise HTTPException(status_code=400, detail="No update data provided")
@@ -236,8 +1007,16 @@ async def update_location(
             .returning(models.Location)
         )
         updated_result = await db.execute(update_stmt)
+        updated_location = updated_result.scalar_one_or_none()
+        if updated_location is None:
+            raise HTTPException(status_code=404, detail="Location not found")
+
         await db.commit()
-        updated_location = updated_result.scalar_one()
+        directory_cache.invalidate("locations")
+        location = schemas.Location.model_validate(updated_location).model_dump()
+        location_grid.upsert(location)
+        search_index.upsert_location(location)
+        routing.set_location_label(updated_location.id, updated_location.label)
 
         return updated_location
     except HTTPException as http_exc:
@@ -250,18 +1029,20 @@ async def update_location(
 
 
 # DELETE a Location
-@app.delete("/api/locations/{location_id}", response_model=schemas.DeleteResponse)
+@app.delete("/api/locations/{location_id}", response_model=schemas.DeleteResponse, dependencies=[Depends(require_admin)])
 async def delete_location(location_id: str, db: AsyncSession = Depends(get_db)):
     try:
-        get_stmt = select(models.Location).where(models.Location.id == location_id)
-        result = await db.execute(get_stmt)
-        db_location = result.scalar_one_or_none()
-        if db_location is None:
+        delete_stmt = delete(models.Location).where(models.Location.id == location_id).returning(models.Location.id)
+        result = await db.execute(delete_stmt)
+        if result.scalar_one_or_none() is None:
             raise HTTPException(status_code=404, detail="Location not found")
 
-        delete_stmt = delete(models.Location).where(models.Location.id == location_id)
-        await db.execute(delete_stmt)
         await db.commit()
+        directory_cache.invalidate("locations")
+        analytics_counters.add_locations(-1)
+        location_grid.remove(location_id)
+        search_index.remove("location", location_id)
+        routing.forget_location(location_id)
 
         return schemas.DeleteResponse(success=True, message="Location deleted successfully")
     except HTTPException as http_exc:
@@ -277,16 +1058,10 @@ async def delete_location(location_id: str, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # POST Create new Faculty
-@app.post("/api/faculty", response_model=schemas.Faculty, status_code=201)
+@app.post("/api/faculty", response_model=schemas.Faculty, status_code=201, dependencies=[Depends(require_admin)])
 async def create_faculty(faculty_data: schemas.FacultyCreate, db: AsyncSession = Depends(get_db)):
     try:
-        if faculty_data.location_id:
-            loc_stmt = select(models.Location).where(models.Location.id == faculty_data.location_id)
-            loc_result = await db.execute(loc_stmt)
-            if not loc_result.scalar_one_or_none():
-                 raise HTTPException(status_code=400, detail=f"Location ID '{faculty_data.location_id}' does not exist.")
-
-        # Insert new faculty member
+        # Insert new faculty member; a bad location_id is caught by the FK below, not a pre-check SELECT
         insert_stmt = (
             insert(models.Faculty)
             .values(**faculty_data.model_dump())
@@ -294,32 +1069,41 @@ async def create_faculty(faculty_data: schemas.FacultyCreate, db: AsyncSession =
         )
         result = await db.execute(insert_stmt)
         await db.commit()
+        directory_cache.invalidate("faculty")
         new_faculty = result.scalar_one()
+        analytics_counters.upsert_faculty(new_faculty.id, new_faculty.availability, new_faculty.role)
+        availability_index.set_faculty(new_faculty.id, new_faculty.availability, new_faculty.role)
+        availability_history.record(new_faculty.id, new_faculty.department, new_faculty.role, new_faculty.availability, "create")
+        search_index.upsert_faculty(new_faculty)
         return new_faculty
     except HTTPException as http_exc:
         await db.rollback()
         raise http_exc
     except Exception as e:
         await db.rollback()
+        if "violates foreign key constraint" in str(e).lower():
+             raise HTTPException(status_code=400, detail=f"Location ID '{faculty_data.location_id}' does not exist.")
         print(f"Error creating faculty: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 # DELETE Faculty
-@app.delete("/api/faculty/{faculty_id}", response_model=schemas.DeleteResponse)
+@app.delete("/api/faculty/{faculty_id}", response_model=schemas.DeleteResponse, dependencies=[Depends(require_admin)])
 async def delete_faculty(faculty_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        get_stmt = select(models.Faculty).where(models.Faculty.id == faculty_id)
-        result = await db.execute(get_stmt)
-        db_faculty = result.scalar_one_or_none()
-        if db_faculty is None:
+        # Delete the faculty member; no row back means it didn't exist
+        # The ON DELETE CASCADE in the faculty_users table definition should chumma handle this.
+        delete_stmt = delete(models.Faculty).where(models.Faculty.id == faculty_id).returning(models.Faculty.id)
+        result = await db.execute(delete_stmt)
+        if result.scalar_one_or_none() is None:
             raise HTTPException(status_code=404, detail="Faculty not found")
 
-        # 2. Delete the faculty member
-        # The ON DELETE CASCADE in the faculty_users table definition should chumma handle this.
-        delete_stmt = delete(models.Faculty).where(models.Faculty.id == faculty_id)
-        await db.execute(delete_stmt)
         await db.commit()
+        directory_cache.invalidate("faculty")
+        analytics_counters.remove_faculty(faculty_id)
+        auth.forget_faculty(faculty_id)
+        availability_index.remove_faculty(faculty_id)
+        search_index.remove("faculty", faculty_id)
 
         return schemas.DeleteResponse(success=True, message="Faculty member deleted successfully")
     except HTTPException as http_exc:
@@ -332,8 +1116,117 @@ async def delete_faculty(faculty_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# GET Who is available at a given time (default now), from the in-memory schedule index
+@app.get("/api/availability", response_model=schemas.AvailabilityAt)
+async def get_availability_at(
+    at: Optional[datetime] = None,
+    within_minutes: int = Query(0, ge=0, le=7 * 24 * 60),
+    role: Optional[str] = None,
+):
+    if at is None:
+        at = datetime.now(campus_tz)
+    elif at.tzinfo is None:
+        at = at.replace(tzinfo=campus_tz) # naive times are campus local time
+    if at < datetime.now(campus_tz) - PAST_QUERY_GRACE:
+        raise HTTPException(status_code=400, detail="'at' must not be in the past; ended overrides aren't kept.")
+    faculty_ids = availability_index.available_ids(at, within_minutes, role)
+    return schemas.AvailabilityAt(at=at, within_minutes=within_minutes, role=role, count=len(faculty_ids), faculty_ids=faculty_ids)
+
+async def read_schedule(db: AsyncSession, faculty_id: int) -> schemas.FacultyScheduleData:
+    weekly = (await db.execute(
+        select(models.FacultySchedule)
+        .where(models.FacultySchedule.faculty_id == faculty_id)
+        .order_by(models.FacultySchedule.weekday, models.FacultySchedule.start_minute)
+    )).scalars().all()
+    overrides = (await db.execute(
+        select(models.AvailabilityOverride)
+        .where(models.AvailabilityOverride.faculty_id == faculty_id, models.AvailabilityOverride.ends_at > func.now())
+        .order_by(models.AvailabilityOverride.starts_at)
+    )).scalars().all()
+    return schemas.FacultyScheduleData(
+        faculty_id=faculty_id,
+        weekly=[schemas.ScheduleEntry(weekday=w.weekday, start_minute=w.start_minute, end_minute=w.end_minute, available=w.available) for w in weekly],
+        overrides=[schemas.AvailabilityOverride.model_validate(o) for o in overrides],
+    )
+
+# GET Weekly timetable and upcoming overrides for one faculty member
+@app.get("/api/faculty/{faculty_id}/schedule", response_model=schemas.FacultyScheduleData)
+async def get_faculty_schedule(faculty_id: int, db: AsyncSession = Depends(get_db)):
+    try:
+        return await read_schedule(db, faculty_id)
+    except Exception as e:
+        print(f"Error fetching schedule for faculty ID {faculty_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# PUT Replace the weekly timetable for a faculty member
+@app.put("/api/faculty/{faculty_id}/schedule", response_model=schemas.FacultyScheduleData, dependencies=[Depends(require_faculty_or_admin)])
+async def replace_faculty_schedule(faculty_id: int, entries: list[schemas.ScheduleEntry], db: AsyncSession = Depends(get_db)):
+    try:
+        # An empty timetable inserts nothing, so the foreign key can't catch a bad id here
+        if (await db.execute(select(models.Faculty.id).where(models.Faculty.id == faculty_id))).scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Faculty not found")
+        await db.execute(delete(models.FacultySchedule).where(models.FacultySchedule.faculty_id == faculty_id))
+        if entries:
+            await db.execute(insert(models.FacultySchedule), [{"faculty_id": faculty_id, **entry.model_dump()} for entry in entries])
+        await db.commit()
+        # Timetables change a few times a term, a full rebuild keeps the index simple
+        await load_availability_index(db)
+        return await read_schedule(db, faculty_id)
+    except HTTPException as http_exc:
+        await db.rollback()
+        raise http_exc
+    except Exception as e:
+        await db.rollback()
+        if "violates foreign key constraint" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Faculty not found")
+        print(f"Error replacing schedule for faculty ID {faculty_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# POST Add a one-off override (leave, exam duty, extra office hours)
+@app.post("/api/faculty/{faculty_id}/overrides", response_model=schemas.AvailabilityOverride, status_code=201, dependencies=[Depends(require_faculty_or_admin)])
+async def create_availability_override(faculty_id: int, override_data: schemas.AvailabilityOverrideCreate, db: AsyncSession = Depends(get_db)):
+    try:
+        insert_stmt = (
+            insert(models.AvailabilityOverride)
+            .values(faculty_id=faculty_id, **override_data.model_dump())
+            .returning(models.AvailabilityOverride)
+        )
+        new_override = (await db.execute(insert_stmt)).scalar_one()
+        await db.commit()
+        await load_availability_index(db)
+        return new_override
+    except Exception as e:
+        await db.rollback()
+        if "violates foreign key constraint" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Faculty not found")
+        print(f"Error creating override for faculty ID {faculty_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# DELETE Remove a one-off override
+@app.delete("/api/faculty/{faculty_id}/overrides/{override_id}", response_model=schemas.DeleteResponse, dependencies=[Depends(require_faculty_or_admin)])
+async def delete_availability_override(faculty_id: int, override_id: int, db: AsyncSession = Depends(get_db)):
+    try:
+        delete_stmt = (
+            delete(models.AvailabilityOverride)
+            .where(models.AvailabilityOverride.id == override_id, models.AvailabilityOverride.faculty_id == faculty_id)
+            .returning(models.AvailabilityOverride.id)
+        )
+        if (await db.execute(delete_stmt)).scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Override not found")
+        await db.commit()
+        await load_availability_index(db)
+        return schemas.DeleteResponse(success=True, message="Override deleted successfully")
+    except HTTPException as http_exc:
+        await db.rollback()
+        raise http_exc
+    except Exception as e:
+        await db.rollback()
+        print(f"Error deleting override ID {override_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 # POST Create new Flash News item
-@app.post("/api/flash-news", response_model=schemas.FlashNews, status_code=201)
+@app.post("/api/flash-news", response_model=schemas.FlashNews, status_code=201, dependencies=[Depends(require_admin)])
 async def create_flash_news(news_data: schemas.FlashNewsCreate, db: AsyncSession = Depends(get_db)):
     try:
         if not news_data.message or not news_data.message.strip():
@@ -341,11 +1234,13 @@ async def create_flash_news(news_data: schemas.FlashNewsCreate, db: AsyncSession
 
         insert_stmt = (
             insert(models.FlashNews)
-            .values(message=news_data.message.strip())
+            .values(message=news_data.message.strip(), expires_at=news_expiry(news_data))
             .returning(models.FlashNews)
         )
         result = await db.execute(insert_stmt)
         await db.commit()
+        directory_cache.invalidate("flash_news")
+        news_feed.changed()
         new_news = result.scalar_one()
         return new_news
     except HTTPException as http_exc:
@@ -358,20 +1253,18 @@ async def create_flash_news(news_data: schemas.FlashNewsCreate, db: AsyncSession
 
 
 # DELETE Flash News item
-@app.delete("/api/flash-news/{news_id}", response_model=schemas.DeleteResponse)
+@app.delete("/api/flash-news/{news_id}", response_model=schemas.DeleteResponse, dependencies=[Depends(require_admin)])
 async def delete_flash_news(news_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        # 1. Check if news item exists
-        get_stmt = select(models.FlashNews).where(models.FlashNews.id == news_id)
-        result = await db.execute(get_stmt)
-        db_news = result.scalar_one_or_none()
-        if db_news is None:
+        # Delete the news item; no row back means it didn't exist
+        delete_stmt = delete(models.FlashNews).where(models.FlashNews.id == news_id).returning(models.FlashNews.id)
+        result = await db.execute(delete_stmt)
+        if result.scalar_one_or_none() is None:
             raise HTTPException(status_code=404, detail="Flash news item not found")
 
-        # 2. Delete the news item
-        delete_stmt = delete(models.FlashNews).where(models.FlashNews.id == news_id)
-        await db.execute(delete_stmt)
         await db.commit()
+        directory_cache.invalidate("flash_news")
+        news_feed.changed()
 
         return schemas.DeleteResponse(success=True, message="Flash news item deleted successfully")
     except HTTPException as http_exc:
@@ -382,55 +1275,106 @@ async def delete_flash_news(news_id: int, db: AsyncSession = Depends(get_db)):
         print(f"Error deleting flash news ID {news_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
     
+# POST Mixed create/update/delete operations in one transaction (admin tools)
+@app.post("/api/batch", response_model=schemas.BatchResult, dependencies=[Depends(require_admin_token)])
+async def run_batch_operations(batch_request: schemas.BatchRequest, db: AsyncSession = Depends(get_db)):
+    try:
+        outcome = await run_batch(db, batch_request.operations)
+        await db.commit()
+    except HTTPException as http_exc:
+        await db.rollback()
+        raise http_exc
+    except BatchFailed as e:
+        await db.rollback()
+        if "violates" in str(e.error).lower(): # FK / unique / not-null: the client's data, not our bug
+            raise HTTPException(status_code=400, detail=str(e))
+        print(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    except Exception as e:
+        await db.rollback()
+        print(f"Error running batch: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    # Same bookkeeping as the single-item endpoints, once for the whole batch
+    for tag, entity in (("faculty", "faculty"), ("locations", "location"), ("flash_news", "flash_news")):
+        if entity in outcome.touched:
+            directory_cache.invalidate(tag)
+    current = {}
+    for faculty in outcome.faculty_rows:
+        analytics_counters.upsert_faculty(faculty.id, faculty.availability, faculty.role)
+        availability_index.set_faculty(faculty.id, faculty.availability, faculty.role)
+        search_index.upsert_faculty(faculty)
+        current[faculty.id] = (faculty.department, faculty.role)
+    for faculty_id, availability, previous in outcome.availability_changes:
+        if faculty_id in current:
+            availability_history.record(faculty_id, *current[faculty_id], availability, "batch", previous)
+    for faculty_id in outcome.removed_faculty:
+        analytics_counters.remove_faculty(faculty_id)
+        availability_index.remove_faculty(faculty_id)
+        auth.forget_faculty(faculty_id)
+        search_index.remove("faculty", faculty_id)
+    for location in outcome.location_rows:
+        location_grid.upsert(location)
+        search_index.upsert_location(location)
+        routing.set_location_label(location["id"], location["label"])
+    for location_id in outcome.removed_locations:
+        location_grid.remove(location_id)
+        search_index.remove("location", location_id)
+        routing.forget_location(location_id)
+    if outcome.location_delta:
+        analytics_counters.add_locations(outcome.location_delta)
+    if "flash_news" in outcome.touched:
+        news_feed.changed()
+
+    return schemas.BatchResult(statements=outcome.statements, results=outcome.results)
+
+# GET Availability over time from the hourly/daily rollups, e.g. HODs by hour this week
+@app.get("/api/analytics/availability-trend", response_model=schemas.AvailabilityTrend)
+async def get_availability_trend(
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    since: Optional[datetime] = None, # default: Monday 00:00 this week, campus time
+    until: Optional[datetime] = None, # default: now
+    department: Optional[str] = None,
+    role: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    now = datetime.now(campus_tz)
+    if since is None:
+        since = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    if until is None:
+        until = now
+    since = since if since.tzinfo else since.replace(tzinfo=campus_tz)
+    until = until if until.tzinfo else until.replace(tzinfo=campus_tz)
+    try:
+        buckets = await fetch_trend(db, granularity, since, until, department, role)
+        return schemas.AvailabilityTrend(granularity=granularity, since=since, until=until, department=department, role=role, buckets=buckets)
+    except Exception as e:
+        print(f"Error fetching availability trend: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # GET Analytics Data
 @app.get("/api/analytics", response_model=schemas.AnalyticsData)
 async def get_analytics(db: AsyncSession = Depends(get_db)):
     try:
-        # total faculty count
-        total_faculty_stmt = select(func.count(models.Faculty.id))
-        total_faculty_res = await db.execute(total_faculty_stmt)
-        total_faculty = total_faculty_res.scalar_one_or_none() or 0
-
-        # total locations count
-        total_locations_stmt = select(func.count(models.Location.id))
-        total_locations_res = await db.execute(total_locations_stmt)
-        total_locations = total_locations_res.scalar_one_or_none() or 0
-
-        # available faculty count
-        available_faculty_stmt = select(func.count(models.Faculty.id)).where(models.Faculty.availability == True)
-        available_faculty_res = await db.execute(available_faculty_stmt)
-        available_faculty = available_faculty_res.scalar_one_or_none() or 0
-
-        #available HODs count
-        available_hods_stmt = select(func.count(models.Faculty.id)).where(
-            models.Faculty.availability == True,
-            models.Faculty.role == 'HOD'
-        )
-        available_hods_res = await db.execute(available_hods_stmt)
-        available_hods = available_hods_res.scalar_one_or_none() or 0
-
-        # available CCs count
-        available_ccs_stmt = select(func.count(models.Faculty.id)).where(
-            models.Faculty.availability == True,
-            models.Faculty.role == 'CC'
-        )
-        available_ccs_res = await db.execute(available_ccs_stmt)
-        available_ccs = available_ccs_res.scalar_one_or_none() or 0
-
-        # cal unavailable faculty
-        unavailable_faculty = total_faculty - available_faculty
-
-        #  response object
-        analytics_data = schemas.AnalyticsData(
-            total_faculty=total_faculty,
-            total_locations=total_locations, 
-            available_faculty=available_faculty,
-            unavailable_faculty=unavailable_faculty,
-            available_hods=available_hods,
-            available_ccs=available_ccs
-        )
-        return analytics_data
+        if settings.ANALYTICS_COUNTERS_ENABLED and analytics_counters.ready:
+            data = analytics_counters.snapshot()
+        else:
+            # One round trip: every count comes from a FILTER aggregate in the same SELECT
+            data = await fetch_analytics(db)
+        if availability_index.built_at is not None:
+            data = with_schedule(data, availability_index, datetime.now(campus_tz))
+        return schemas.AnalyticsData(**data)
 
     except Exception as e:
         print(f"Error fetching analytics data: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error fetching analytics")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error fetching analytics")
+
+# POST Rebuild the in-memory analytics counters from the DB
+@app.post("/api/analytics/reconcile", dependencies=[Depends(require_admin_token)])
+async def reconcile_analytics(db: AsyncSession = Depends(get_db)):
+    try:
+        drift = await analytics_counters.reconcile(db)
+        return {"drift": drift, "counters": analytics_counters.snapshot()}
+    except Exception as e:
+        print(f"Error reconciling analytics counters: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
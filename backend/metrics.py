@@ -0,0 +1,160 @@
+import logging
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+slow_query_log = logging.getLogger("insider_navs.slow_query")
+
+# Upper bounds in seconds, Prometheus style (+Inf is implicit)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def render(self, name: str, labels: str = "") -> list[str]:
+        sep = "," if labels else ""
+        lines, cumulative = [], 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        wrap = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{wrap} {self.total:.6f}")
+        lines.append(f"{name}_count{wrap} {self.count}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self.request_latency: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.status_counts: dict[tuple[str, str, int], int] = defaultdict(int)
+        self.in_flight = 0
+        self.query_latency = Histogram()
+        self.slow_queries = 0
+        self.pool_wait = Histogram()
+        self.pool = None
+        self._extra_renderers = []
+
+    def add_renderer(self, renderer):
+        # Other modules (cache, admission control, ...) append their own lines
+        self._extra_renderers.append(renderer)
+
+    def render(self) -> str:
+        lines = [
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.request_latency.items()):
+            lines += histogram.render("http_request_duration_seconds", f'method="{method}",route="{route}"')
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route, status), count in sorted(self.status_counts.items()):
+            lines.append(f'http_responses_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+        lines.append("# TYPE db_query_duration_seconds histogram")
+        lines += self.query_latency.render("db_query_duration_seconds")
+        lines.append("# TYPE db_slow_queries_total counter")
+        lines.append(f"db_slow_queries_total {self.slow_queries}")
+
+        if self.pool is not None:
+            lines += [
+                "# TYPE db_pool_size gauge",
+                f"db_pool_size {self.pool.size()}",
+                "# TYPE db_pool_checked_out gauge",
+                f"db_pool_checked_out {self.pool.checkedout()}",
+                "# TYPE db_pool_overflow gauge",
+                f"db_pool_overflow {self.pool.overflow()}",
+                "# TYPE db_pool_checked_in gauge",
+                f"db_pool_checked_in {self.pool.checkedin()}",
+            ]
+        lines.append("# TYPE db_pool_wait_seconds histogram")
+        lines += self.pool_wait.render("db_pool_wait_seconds")
+
+        for renderer in self._extra_renderers:
+            lines += renderer()
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware (no BaseHTTPMiddleware) so streaming responses pass
+    straight through. Latency is labelled by route template, not raw path, to keep
+    the label set bounded."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            metrics.request_latency[(method, template)].observe(time.perf_counter() - start)
+            metrics.status_counts[(method, template, status)] += 1
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # Records how long each checkout waited for a free connection
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.pool_wait.observe(time.perf_counter() - start)
+
+
+def install_query_hooks(engine, slow_query_ms: float):
+    sync_engine = engine.sync_engine
+    metrics.pool = sync_engine.pool
+    slow_seconds = slow_query_ms / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        metrics.query_latency.observe(elapsed)
+        if elapsed >= slow_seconds:
+            metrics.slow_queries += 1
+            slow_query_log.warning("slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:500])
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        # Failed statements never reach after_cursor_execute; keep the stack balanced
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
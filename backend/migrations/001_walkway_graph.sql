@@ -0,0 +1,23 @@
+-- Walkway graph used by the /api/route engine (routing.py).
+-- Nodes are corridor points, room doors, stair and lift landings; edges are the walkable links between them.
+
+CREATE TABLE IF NOT EXISTS walkway_nodes (
+    id SERIAL PRIMARY KEY,
+    location_id TEXT REFERENCES locations(id) ON DELETE SET NULL,
+    label TEXT,
+    floor INTEGER NOT NULL DEFAULT 0,
+    x DOUBLE PRECISION NOT NULL DEFAULT 0,
+    y DOUBLE PRECISION NOT NULL DEFAULT 0,
+    kind TEXT DEFAULT 'corridor'
+);
+
+CREATE TABLE IF NOT EXISTS walkway_edges (
+    id SERIAL PRIMARY KEY,
+    from_node_id INTEGER NOT NULL REFERENCES walkway_nodes(id) ON DELETE CASCADE,
+    to_node_id INTEGER NOT NULL REFERENCES walkway_nodes(id) ON DELETE CASCADE,
+    distance_m DOUBLE PRECISION,
+    kind TEXT DEFAULT 'walk',
+    one_way BOOLEAN DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS ix_walkway_nodes_location_id ON walkway_nodes (location_id);
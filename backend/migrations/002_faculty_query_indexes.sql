@@ -0,0 +1,8 @@
+-- Indexes backing the filtered/paginated GET /api/faculty query.
+
+CREATE INDEX IF NOT EXISTS ix_faculty_availability_role ON faculty (availability, role);
+CREATE INDEX IF NOT EXISTS ix_faculty_school_department ON faculty (school, department);
+-- (name, id) is the keyset pagination order
+CREATE INDEX IF NOT EXISTS ix_faculty_name_id ON faculty (name, id);
+-- name prefix search: lower(name) LIKE 'abc%'
+CREATE INDEX IF NOT EXISTS ix_faculty_lower_name_prefix ON faculty (lower(name) text_pattern_ops);
@@ -0,0 +1,33 @@
+-- Publish a small delta on the faculty_changes channel whenever a faculty row changes.
+-- events.py LISTENs on this channel once per API process and fans the events out over SSE.
+
+CREATE OR REPLACE FUNCTION notify_faculty_change() RETURNS trigger AS $$
+DECLARE
+    row_data faculty%ROWTYPE;
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+        RETURN NULL; -- no-op update, nothing to push
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        row_data := OLD;
+    ELSE
+        row_data := NEW;
+    END IF;
+
+    PERFORM pg_notify('faculty_changes', json_build_object(
+        'op', lower(TG_OP),
+        'id', row_data.id,
+        'availability', row_data.availability,
+        'role', row_data.role
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS faculty_change_notify ON faculty;
+CREATE TRIGGER faculty_change_notify
+    AFTER INSERT OR DELETE OR UPDATE ON faculty
+    FOR EACH ROW
+    WHEN (pg_trigger_depth() = 0)
+    EXECUTE FUNCTION notify_faculty_change();
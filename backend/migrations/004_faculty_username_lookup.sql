@@ -0,0 +1,2 @@
+-- faculty_login matches usernames case-insensitively: lower(username) = lower(input)
+CREATE INDEX IF NOT EXISTS ix_faculty_users_lower_username ON faculty_users (lower(username));
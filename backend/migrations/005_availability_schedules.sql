@@ -0,0 +1,23 @@
+-- Weekly timetables and one-off overrides behind GET /api/availability (schedule.py).
+
+CREATE TABLE IF NOT EXISTS faculty_schedules (
+    id SERIAL PRIMARY KEY,
+    faculty_id INTEGER NOT NULL REFERENCES faculty(id) ON DELETE CASCADE,
+    weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6), -- 0 = Monday
+    start_minute SMALLINT NOT NULL CHECK (start_minute BETWEEN 0 AND 1440),
+    end_minute SMALLINT NOT NULL CHECK (end_minute BETWEEN 0 AND 1440),
+    available BOOLEAN NOT NULL DEFAULT FALSE,
+    CHECK (end_minute > start_minute)
+);
+CREATE INDEX IF NOT EXISTS ix_faculty_schedules_faculty_id ON faculty_schedules (faculty_id);
+
+CREATE TABLE IF NOT EXISTS availability_overrides (
+    id SERIAL PRIMARY KEY,
+    faculty_id INTEGER NOT NULL REFERENCES faculty(id) ON DELETE CASCADE,
+    starts_at TIMESTAMPTZ NOT NULL,
+    ends_at TIMESTAMPTZ NOT NULL,
+    available BOOLEAN NOT NULL DEFAULT FALSE,
+    reason TEXT,
+    CHECK (ends_at > starts_at)
+);
+CREATE INDEX IF NOT EXISTS ix_availability_overrides_faculty_id ON availability_overrides (faculty_id);
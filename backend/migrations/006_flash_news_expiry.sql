@@ -0,0 +1,22 @@
+-- Expiry for flash news plus a NOTIFY so every API process can wake its long-poll requests (news.py).
+
+ALTER TABLE flash_news ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE flash_news ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ; -- NULL = stays up until deleted
+CREATE INDEX IF NOT EXISTS ix_flash_news_expires_at ON flash_news (expires_at);
+
+CREATE OR REPLACE FUNCTION notify_flash_news_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('flash_news_changes', json_build_object(
+        'type', 'flash_news',
+        'op', lower(TG_OP),
+        'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS flash_news_change_notify ON flash_news;
+CREATE TRIGGER flash_news_change_notify
+    AFTER INSERT OR DELETE ON flash_news
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_flash_news_change();
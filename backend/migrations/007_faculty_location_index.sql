@@ -0,0 +1,4 @@
+-- Backs the faculty <-> location joins (/api/faculty/with-location, /api/locations/{id}/faculty)
+-- and the FK check when a location is deleted.
+
+CREATE INDEX IF NOT EXISTS ix_faculty_location_id ON faculty (location_id);
@@ -0,0 +1,12 @@
+-- Map placement for locations, used by the in-memory grid behind /api/locations/nearest (spatial.py).
+
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS building TEXT;
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS floor SMALLINT;
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS x DOUBLE PRECISION; -- campus map metres, same frame as walkway_nodes
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS y DOUBLE PRECISION;
+
+-- Seed placement from the walkway graph where a room already has a node on it
+UPDATE locations l
+SET x = n.x, y = n.y, floor = n.floor
+FROM walkway_nodes n
+WHERE n.location_id = l.id AND l.x IS NULL;
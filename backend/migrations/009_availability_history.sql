@@ -0,0 +1,46 @@
+-- Availability change log (partitioned by month) and the hourly/daily rollups behind
+-- GET /api/analytics/availability-trend. Both are written by history.py.
+
+CREATE TABLE IF NOT EXISTS availability_events (
+    id BIGSERIAL,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    faculty_id INTEGER NOT NULL, -- no FK: history outlives deleted faculty
+    department TEXT,
+    role TEXT,
+    availability BOOLEAN NOT NULL,
+    source TEXT,
+    PRIMARY KEY (id, changed_at)
+) PARTITION BY RANGE (changed_at);
+
+CREATE INDEX IF NOT EXISTS ix_availability_events_faculty ON availability_events (faculty_id, changed_at);
+
+-- Creates the partition holding month_start (a UTC month) if it doesn't exist; history.py calls this for every new month it writes
+CREATE OR REPLACE FUNCTION ensure_availability_events_partition(month_start DATE) RETURNS void AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month_start)::date;
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF availability_events FOR VALUES FROM (%L) TO (%L)',
+        'availability_events_' || to_char(start_date, 'YYYY_MM'),
+        start_date::timestamp AT TIME ZONE 'UTC',
+        (start_date + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_availability_events_partition((now() AT TIME ZONE 'UTC')::date);
+SELECT ensure_availability_events_partition((now() AT TIME ZONE 'UTC' + interval '1 month')::date);
+
+CREATE TABLE IF NOT EXISTS availability_rollups (
+    granularity TEXT NOT NULL CHECK (granularity IN ('hour', 'day')),
+    bucket_start TIMESTAMPTZ NOT NULL,
+    department TEXT NOT NULL DEFAULT '',
+    role TEXT NOT NULL DEFAULT '',
+    samples INTEGER NOT NULL DEFAULT 0,
+    available_sum INTEGER NOT NULL DEFAULT 0,
+    total_sum INTEGER NOT NULL DEFAULT 0,
+    went_available INTEGER NOT NULL DEFAULT 0,
+    went_unavailable INTEGER NOT NULL DEFAULT 0,
+    last_sample_at TIMESTAMPTZ,
+    PRIMARY KEY (granularity, bucket_start, department, role)
+);
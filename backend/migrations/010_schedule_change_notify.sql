@@ -0,0 +1,25 @@
+-- Tell every API process when timetables or overrides change, so each one rebuilds its
+-- availability index (schedule.py). Statement level: replacing a timetable is one event, not one per row.
+
+CREATE OR REPLACE FUNCTION notify_schedule_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('schedule_changes', json_build_object(
+        'type', 'schedule',
+        'table', TG_TABLE_NAME,
+        'op', lower(TG_OP)
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS faculty_schedules_change_notify ON faculty_schedules;
+CREATE TRIGGER faculty_schedules_change_notify
+    AFTER INSERT OR UPDATE OR DELETE ON faculty_schedules
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_schedule_change();
+
+DROP TRIGGER IF EXISTS availability_overrides_change_notify ON availability_overrides;
+CREATE TRIGGER availability_overrides_change_notify
+    AFTER INSERT OR UPDATE OR DELETE ON availability_overrides
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_schedule_change();
@@ -0,0 +1,19 @@
+-- Tell every API process when locations change, so each one rebuilds the indexes derived from
+-- them: the nearest-location grid (spatial.py), route labels and the search index. Statement level:
+-- a bulk import is one event, not one per row.
+
+CREATE OR REPLACE FUNCTION notify_location_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('location_changes', json_build_object(
+        'type', 'location',
+        'op', lower(TG_OP)
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS locations_change_notify ON locations;
+CREATE TRIGGER locations_change_notify
+    AFTER INSERT OR UPDATE OR DELETE ON locations
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_location_change();
@@ -0,0 +1,33 @@
+-- Same faculty_changes payload as 003, plus "indexed": whether a field the /api/search index
+-- uses (search.py) changed. Availability-only toggles then don't make every worker re-read the row.
+
+CREATE OR REPLACE FUNCTION notify_faculty_change() RETURNS trigger AS $$
+DECLARE
+    row_data faculty%ROWTYPE;
+    indexed boolean := true;
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+        RETURN NULL; -- no-op update, nothing to push
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        row_data := OLD;
+    ELSE
+        row_data := NEW;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        indexed := (NEW.name, NEW.department, NEW.designation, NEW.courses_taken, NEW.cabin_number, NEW.location_id)
+            IS DISTINCT FROM (OLD.name, OLD.department, OLD.designation, OLD.courses_taken, OLD.cabin_number, OLD.location_id);
+    END IF;
+
+    PERFORM pg_notify('faculty_changes', json_build_object(
+        'op', lower(TG_OP),
+        'id', row_data.id,
+        'availability', row_data.availability,
+        'role', row_data.role,
+        'indexed', indexed
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ARRAY, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, Boolean, Text, ARRAY, ForeignKey, Float, Index, DateTime, func
+from sqlalchemy.orm import relationship
 from database import Base
 
 class Location(Base):
@@ -8,6 +9,14 @@ class Location(Base):
     label = Column(Text, nullable=False)
     subtitle = Column(Text)
     type = Column(Text, default='location')
+    building = Column(Text)
+    floor = Column(SmallInteger)
+    # Campus map coordinates in metres (same frame as walkway_nodes); NULL = not placed on the map yet
+    x = Column(Float)
+    y = Column(Float)
+
+    # lazy="raise": loads must be explicit (joinedload/selectinload), no accidental N+1 per row
+    faculty = relationship("Faculty", back_populates="location", lazy="raise", order_by="Faculty.name")
 
 class Faculty(Base):
     __tablename__ = "faculty"
@@ -22,14 +31,25 @@ class Faculty(Base):
     cabin_number = Column(Text)
     phone_number = Column(Text)
     availability = Column(Boolean, default=False)
-    location_id = Column(Text, ForeignKey("locations.id"))
+    location_id = Column(Text, ForeignKey("locations.id"), index=True)
+
+    location = relationship("Location", back_populates="faculty", lazy="raise")
+
+    __table_args__ = (
+        Index("ix_faculty_availability_role", "availability", "role"),
+        Index("ix_faculty_school_department", "school", "department"),
+        Index("ix_faculty_name_id", "name", "id"), # keyset pagination order
+        Index("ix_faculty_lower_name_prefix", func.lower(name).label("lower_name"), postgresql_ops={"lower_name": "text_pattern_ops"}),
+    )
 
 class FlashNews(Base):
     __tablename__ = "flash_news"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     message = Column(Text, nullable=False)
-    
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), index=True) # NULL = stays up until deleted
+
 class AdminUser(Base):
     __tablename__ = "admin_users"
 
@@ -42,4 +62,80 @@ class FacultyUser(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     username = Column(Text, unique=True, nullable=False)
-    faculty_id = Column(Integer, ForeignKey("faculty.id"), unique=True)
\ No newline at end of file
+    faculty_id = Column(Integer, ForeignKey("faculty.id"), unique=True)
+
+    __table_args__ = (
+        Index("ix_faculty_users_lower_username", func.lower(username)),
+    )
+
+class WalkwayNode(Base):
+    __tablename__ = "walkway_nodes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    location_id = Column(Text, ForeignKey("locations.id", ondelete="SET NULL")) # null for corridor/junction points
+    label = Column(Text)
+    floor = Column(Integer, nullable=False, default=0)
+    x = Column(Float, nullable=False, default=0) # metres on the campus map
+    y = Column(Float, nullable=False, default=0)
+    kind = Column(Text, default='corridor') # corridor / room / stairs / elevator
+
+class WalkwayEdge(Base):
+    __tablename__ = "walkway_edges"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    from_node_id = Column(Integer, ForeignKey("walkway_nodes.id", ondelete="CASCADE"), nullable=False)
+    to_node_id = Column(Integer, ForeignKey("walkway_nodes.id", ondelete="CASCADE"), nullable=False)
+    distance_m = Column(Float) # falls back to straight line distance when null
+    kind = Column(Text, default='walk') # walk / stairs / elevator
+    one_way = Column(Boolean, default=False)
+
+
+class FacultySchedule(Base):
+    __tablename__ = "faculty_schedules"
+
+    # Recurring weekly interval, in campus local time
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    faculty_id = Column(Integer, ForeignKey("faculty.id", ondelete="CASCADE"), nullable=False, index=True)
+    weekday = Column(SmallInteger, nullable=False) # 0 = Monday
+    start_minute = Column(SmallInteger, nullable=False) # minutes since midnight
+    end_minute = Column(SmallInteger, nullable=False)
+    available = Column(Boolean, nullable=False, default=False) # free or busy during this interval
+
+class AvailabilityOverride(Base):
+    __tablename__ = "availability_overrides"
+
+    # One-off exception (leave, exam duty, extra office hours), wins over the weekly schedule
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    faculty_id = Column(Integer, ForeignKey("faculty.id", ondelete="CASCADE"), nullable=False, index=True)
+    starts_at = Column(DateTime(timezone=True), nullable=False)
+    ends_at = Column(DateTime(timezone=True), nullable=False)
+    available = Column(Boolean, nullable=False, default=False)
+    reason = Column(Text)
+
+class AvailabilityEvent(Base):
+    __tablename__ = "availability_events"
+    # Append-only, one partition per month (migrations/009); written in batches by history.py
+    __table_args__ = {"postgresql_partition_by": "RANGE (changed_at)"}
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    changed_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    faculty_id = Column(Integer, nullable=False) # no FK: history outlives deleted faculty
+    department = Column(Text)
+    role = Column(Text)
+    availability = Column(Boolean, nullable=False) # the new value
+    source = Column(Text) # which endpoint made the change
+
+class AvailabilityRollup(Base):
+    __tablename__ = "availability_rollups"
+
+    # One row per (hour or day, department, role); '' stands for NULL so the key stays unique
+    granularity = Column(Text, primary_key=True) # 'hour' | 'day'
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    department = Column(Text, primary_key=True, default="")
+    role = Column(Text, primary_key=True, default="")
+    samples = Column(Integer, nullable=False, default=0) # occupancy snapshots taken in this bucket
+    available_sum = Column(Integer, nullable=False, default=0)
+    total_sum = Column(Integer, nullable=False, default=0)
+    went_available = Column(Integer, nullable=False, default=0)
+    went_unavailable = Column(Integer, nullable=False, default=0)
+    last_sample_at = Column(DateTime(timezone=True))
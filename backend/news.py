@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import AsyncSessionLocal
+from settings import settings
+
+# Channel the flash_news trigger (migrations/006) publishes on
+NEWS_CHANNEL = "flash_news_changes"
+# Re-read the live set at least this often while tickers are parked, in case a NOTIFY was missed
+VERSION_MAX_AGE_SECONDS = 5.0
+
+
+def news_expiry(news_data) -> Optional[datetime]:
+    # Explicit expiry, else ttl_hours, else the default TTL (0 = never)
+    if news_data.expires_at is not None:
+        return news_data.expires_at
+    ttl_hours = news_data.ttl_hours or settings.FLASH_NEWS_DEFAULT_TTL_HOURS
+    return datetime.now(timezone.utc) + timedelta(hours=ttl_hours) if ttl_hours else None
+
+
+def active_news():
+    # Items without an expiry stay up until an admin deletes them
+    return or_(models.FlashNews.expires_at.is_(None), models.FlashNews.expires_at > func.now())
+
+
+def news_version(active_ids: list[int]) -> int:
+    # Same live items -> same number on every worker; 48 bits stays exact in a JS number
+    digest = hashlib.blake2b(",".join(map(str, active_ids)).encode(), digest_size=6).digest()
+    return int.from_bytes(digest, "big")
+
+
+class NewsFeed:
+    """Change tracking for the flash-news ticker.
+
+    `version` is `news_version()` of the live item ids as last read from the DB,
+    so it means the same thing whichever worker a client lands on. Creates,
+    deletes and prunes this process hears about (directly or via NOTIFY) mark it
+    stale and wake long-poll requests parked on `wait()`; it is also re-read when
+    the next item expires and every VERSION_MAX_AGE_SECONDS. A ticker that is up
+    to date therefore costs one idle request per timeout and an empty 204 reply.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._dirty = True
+        self._checked_at = 0.0 # monotonic
+        self._next_expiry: Optional[float] = None # epoch seconds
+        self._refresh_lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+
+    def changed(self, event: Optional[dict] = None):
+        self._dirty = True
+        # Wake everyone parked on the current event, later waiters get a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _stale(self) -> bool:
+        return (self.version is None or self._dirty
+                or time.monotonic() - self._checked_at >= VERSION_MAX_AGE_SECONDS
+                or (self._next_expiry is not None and time.time() >= self._next_expiry))
+
+    async def current(self) -> int:
+        if self._stale():
+            async with self._refresh_lock: # one query for everyone who noticed at once
+                if self._stale():
+                    self._dirty = False # a change landing during the read marks it dirty again
+                    checked_at = time.monotonic()
+                    stmt = select(models.FlashNews.id, models.FlashNews.expires_at).where(active_news()).order_by(models.FlashNews.id)
+                    async with AsyncSessionLocal() as session:
+                        rows = (await session.execute(stmt)).all()
+                    expiries = [expires_at.timestamp() for _, expires_at in rows if expires_at is not None]
+                    self.version = news_version([news_id for news_id, _ in rows])
+                    self._next_expiry = min(expiries) if expiries else None
+                    self._checked_at = checked_at
+        return self.version
+
+    async def wait(self, version: int, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            changed = self._changed
+            if await self.current() != version:
+                return True
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            # Wake up for the next expiry too, so expired items leave tickers on time rather than at the next prune
+            step = min(remaining, VERSION_MAX_AGE_SECONDS)
+            if self._next_expiry is not None:
+                step = min(step, max(self._next_expiry - time.time(), 0.25))
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=step)
+            except asyncio.TimeoutError:
+                pass
+
+
+news_feed = NewsFeed()
+
+
+async def fetch_news_delta(db: AsyncSession, since_id: int) -> tuple[list, list[int]]:
+    # New items since since_id, plus the ids still live so the client can drop removed/expired ones
+    rows = (await db.execute(select(models.FlashNews).where(active_news()).order_by(models.FlashNews.id))).scalars().all()
+    return [row for row in rows if row.id > since_id], [row.id for row in rows]
+
+
+async def prune_expired_news(db: AsyncSession) -> int:
+    result = await db.execute(
+        delete(models.FlashNews).where(models.FlashNews.expires_at <= func.now()).returning(models.FlashNews.id)
+    )
+    pruned = len(result.all())
+    await db.commit()
+    return pruned
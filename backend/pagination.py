@@ -0,0 +1,135 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+from pydantic_core import to_json
+from sqlalchemy import BigInteger, SmallInteger, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import encode_list
+from database import AsyncSessionLocal
+
+# Rows fetched per round trip when streaming a full dump
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(*values) -> str:
+    # Opaque keyset cursor: the sort key of the last row on the page
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def cursor_value_ok(value, column) -> bool:
+    # Cursor values go straight into the keyset comparison; a wrong type would only fail in the DB (a 500)
+    python_type = column.type.python_type
+    if python_type is int:
+        bits = 63 if isinstance(column.type, BigInteger) else 15 if isinstance(column.type, SmallInteger) else 31
+        return type(value) is int and -2 ** bits <= value < 2 ** bits # not bool
+    if python_type is str:
+        return isinstance(value, str) and "\x00" not in value # Postgres text can't hold NUL
+    return False
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    # columns: the sort key columns, in order
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns) or not all(map(cursor_value_ok, values, columns)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def escape_like(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@dataclass
+class ListSpec:
+    """How one list endpoint is sorted and projected.
+
+    sort_keys are column names; the keyset cursor is the tuple of those values
+    for the last row. They must end in a unique column (id) so pages never
+    overlap. All keys share one direction, which keeps the row-value comparison
+    index friendly. options are loader options (e.g. joinedload) applied to
+    full-row pages so embedded relationships come back in the same query.
+    """
+    model: type
+    schema: type
+    sort_keys: tuple[str, ...]
+    descending: bool = False
+    options: tuple = ()
+
+    def sort_columns(self) -> list:
+        return [getattr(self.model, key) for key in self.sort_keys]
+
+    def order_by(self):
+        columns = self.sort_columns()
+        return [column.desc() for column in columns] if self.descending else columns
+
+    def parse_fields(self, fields: Optional[str]) -> Optional[list[str]]:
+        # fields=id,name,department -> the columns to SELECT; sort keys always come along for the cursor
+        if not fields:
+            return None
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.schema.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+        for key in reversed(self.sort_keys):
+            if key not in names:
+                names.insert(0, key)
+        return names
+
+    def statement(self, where: list, fields: Optional[list[str]], after: Optional[list], limit: Optional[int]):
+        if fields:
+            stmt = select(*[getattr(self.model, name) for name in fields])
+        else:
+            stmt = select(self.model).options(*self.options)
+        if where:
+            stmt = stmt.where(*where)
+        if after:
+            key = tuple_(*self.sort_columns())
+            stmt = stmt.where(key < tuple_(*after) if self.descending else key > tuple_(*after))
+        stmt = stmt.order_by(*self.order_by())
+        if limit:
+            stmt = stmt.limit(limit + 1) # one extra row tells us if there's a next page
+        return stmt
+
+    async def fetch_page(self, db: AsyncSession, where: list, fields: Optional[list[str]],
+                         after: Optional[list], limit: Optional[int]) -> tuple[bytes, Optional[str]]:
+        result = await db.execute(self.statement(where, fields, after, limit))
+        # Projected rows skip ORM hydration and pydantic entirely
+        rows = [row._asdict() for row in result.all()] if fields else result.scalars().unique().all()
+
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            values = [last[key] if fields else getattr(last, key) for key in self.sort_keys]
+            next_cursor = encode_cursor(*values)
+        body = to_json(rows) if fields else encode_list(self.schema, rows)
+        return body, next_cursor
+
+    async def stream_json(self, where: list, fields: Optional[list[str]]) -> AsyncIterator[bytes]:
+        """Full dump as a JSON array, straight from a server-side cursor.
+
+        Opens its own session since the body outlives the request's dependencies.
+        """
+        async with AsyncSessionLocal() as session:
+            stmt = self.statement(where, fields, None, None).execution_options(yield_per=STREAM_BATCH_SIZE)
+            result = await session.stream(stmt)
+            yield b"["
+            first = True
+            async for partition in result.partitions():
+                rows = [row._asdict() for row in partition] if fields else [row[0] for row in partition]
+                chunk = to_json(rows) if fields else encode_list(self.schema, rows)
+                if len(chunk) <= 2:
+                    continue
+                # Splice "[a,b]" chunks into one array
+                yield (b"" if first else b",") + chunk[1:-1]
+                first = False
+            yield b"]"
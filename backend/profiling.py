@@ -0,0 +1,246 @@
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Optional
+
+import fastapi.routing
+from sqlalchemy import event
+
+import auth
+import pagination
+from responses import FastJSONResponse
+
+# The request being profiled, if any. SQLAlchemy's greenlets share the task's context, so the DB hooks see it too
+current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+    def __init__(self, scope, reason: str, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.reason = reason # "header" or "sampled"
+        self.interval = interval
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.route = None
+        self.status = None
+        self.total_seconds = 0.0
+        self.db_seconds = 0.0
+        self.db_statements = 0
+        self.serialize_seconds = 0.0
+        self.stacks: Counter = Counter() # root..leaf tuple of frame labels -> samples
+
+    def add_serialization(self, start: float):
+        self.serialize_seconds += time.perf_counter() - start
+
+    def finish(self, scope, status: Optional[int]):
+        self.total_seconds = time.perf_counter() - self._start
+        self.route = getattr(scope.get("route"), "path", None)
+        self.status = status
+
+    def summary(self) -> dict:
+        handler = max(self.total_seconds - self.db_seconds - self.serialize_seconds, 0.0)
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack[-1]] += count
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "total_ms": round(self.total_seconds * 1000, 2),
+            "db_ms": round(self.db_seconds * 1000, 2),
+            "db_statements": self.db_statements,
+            "serialize_ms": round(self.serialize_seconds * 1000, 2),
+            "handler_ms": round(handler * 1000, 2),
+            "samples": sum(self.stacks.values()),
+            "interval_ms": self.interval * 1000,
+            "hot_functions": [{"function": name, "samples": count} for name, count in leaves.most_common(10)],
+        }
+
+    def folded(self) -> str:
+        # Brendan Gregg's folded format, straight into flamegraph.pl / speedscope
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """Statistical profiles of single requests, for an admin to pull afterwards.
+
+    A sampler thread looks at the event loop thread's stack every `interval` and
+    walks it outward; if it reaches the middleware frame of a request being
+    profiled, the stack is counted for that request. Stacks of other requests
+    (and the idle loop) never match, so concurrent traffic doesn't pollute a
+    profile, and samples only land while the request is actually on the CPU.
+    Time spent awaiting the DB shows up in db_ms instead (cursor execute hooks).
+
+    Nothing here is installed unless PROFILING_ENABLED; the thread sleeps (and
+    the interpreter's switch interval is back to normal) unless a profiled
+    request is in flight. Native code holding the GIL (pydantic-core, orjson)
+    gets few samples, which is what the serialization phase timer is for.
+    """
+
+    def __init__(self, sample_rate: float, interval: float, keep: int):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.profiles: deque[RequestProfile] = deque(maxlen=keep)
+        self._active: dict[int, tuple[object, RequestProfile]] = {} # id(anchor frame) -> (frame, profile)
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread: Optional[int] = None
+        self._switch_interval = sys.getswitchinterval()
+
+    def wanted(self, scope) -> Optional[str]:
+        # Admin header first, then the sampling rate
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return "header" if value == b"1" and self._is_admin(scope) else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def _is_admin(self, scope) -> bool:
+        # Always needs a real admin token, even when AUTH_REQUIRED is off
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                return auth.admin_session(value.decode("latin-1")) is not None
+        return False
+
+    # ---- sampling ----
+    def begin(self, anchor, profile: RequestProfile):
+        self._loop_thread = threading.get_ident()
+        if not self._active:
+            # The sampler can only look when the loop thread hands over the GIL; make that happen every interval.
+            # Process-wide, so concurrent requests slow down a little until the last profile ends (see settings)
+            sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._active[id(anchor)] = (anchor, profile)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample_forever, name="request-profiler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def end(self, anchor, profile: RequestProfile):
+        self._active.pop(id(anchor), None)
+        if not self._active:
+            self._wake.clear()
+            sys.setswitchinterval(self._switch_interval)
+        self.profiles.append(profile)
+
+    def _sample_forever(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = []
+            while frame is not None:
+                entry = self._active.get(id(frame))
+                if entry is not None and entry[0] is frame:
+                    entry[1].stacks[tuple(reversed(stack))] += 1
+                    break
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return next((profile for profile in self.profiles if profile.id == profile_id), None)
+
+    # ---- phase hooks ----
+    def install(self, engine):
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if current_profile.get() is not None:
+                conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            profile = current_profile.get()
+            starts = conn.info.get("profile_start")
+            if profile is not None and starts:
+                profile.db_seconds += time.perf_counter() - starts.pop()
+                profile.db_statements += 1
+
+        @event.listens_for(sync_engine, "handle_error")
+        def handle_error(context):
+            starts = context.connection.info.get("profile_start") if context.connection is not None else None
+            if current_profile.get() is not None and starts:
+                starts.pop()
+
+        # Serialization = response_model validation/dump (FastAPI), our JSON encoder, and pre-encoded list bodies
+        serialize_response = fastapi.routing.serialize_response
+
+        async def timed_serialize_response(**kwargs):
+            profile = current_profile.get()
+            if profile is None:
+                return await serialize_response(**kwargs)
+            start = time.perf_counter()
+            try:
+                return await serialize_response(**kwargs)
+            finally:
+                profile.add_serialization(start)
+
+        fastapi.routing.serialize_response = timed_serialize_response
+
+        def timed(function):
+            def wrapper(*args, **kwargs):
+                profile = current_profile.get()
+                if profile is None:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    profile.add_serialization(start)
+            return wrapper
+
+        FastJSONResponse.render = timed(FastJSONResponse.render)
+        pagination.encode_list = timed(pagination.encode_list)
+
+
+class ProfilingMiddleware:
+    """Plain ASGI middleware; requests that aren't profiled go straight through.
+    Profiled responses carry X-Profile-Id for /api/admin/profiles/{id}."""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        reason = self.profiler.wanted(scope)
+        if reason is None:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope, reason, self.profiler.interval)
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        token = current_profile.set(profile)
+        anchor = sys._getframe() # the sampler attributes any stack passing through this frame to this request
+        self.profiler.begin(anchor, profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.finish(scope, status)
+            self.profiler.end(anchor, profile)
+            current_profile.reset(token)
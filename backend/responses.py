@@ -0,0 +1,17 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError: # optional: fall back to the stdlib encoder
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: orjson when it's installed, stdlib json otherwise."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,267 @@
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+# Average indoor walking pace, used for the "estimated_time_min" shown in RouteSteps
+WALKING_SPEED_M_PER_MIN = 80.0
+# Heading change (degrees) at a junction before we tell the user to turn
+TURN_THRESHOLD_DEG = 35.0
+
+VERTICAL_KINDS = ("stairs", "elevator")
+
+
+class RouteNotFound(Exception):
+    pass
+
+
+@dataclass
+class Node:
+    id: int
+    location_id: Optional[str]
+    label: Optional[str]
+    floor: int
+    x: float
+    y: float
+
+
+class CampusGraph:
+    """In-memory walkway graph. Nodes are stored densely (index 0..n-1) so the
+    optional next-hop table can be plain lists instead of nested dicts."""
+
+    def __init__(self, nodes: list[Node], edges: list[tuple[int, int, Optional[float], str, bool]], precompute: bool = False):
+        self.nodes = nodes
+        self.index = {node.id: i for i, node in enumerate(nodes)}
+        self.adj: list[list[tuple[int, float, str]]] = [[] for _ in nodes]
+        self.radj: list[list[tuple[int, float, str]]] = [[] for _ in nodes]
+        self.location_nodes: dict[str, int] = {}
+
+        for i, node in enumerate(nodes):
+            if node.location_id and node.location_id not in self.location_nodes:
+                self.location_nodes[node.location_id] = i
+
+        for from_id, to_id, distance, kind, one_way in edges:
+            a, b = self.index.get(from_id), self.index.get(to_id)
+            if a is None or b is None:
+                continue
+            if distance is None:
+                distance = self._straight_line(a, b)
+            self._add_edge(a, b, distance, kind)
+            if not one_way:
+                self._add_edge(b, a, distance, kind)
+
+        # next_hop[dst][src] -> node index to step to from src when heading to dst
+        self.next_hop: dict[int, list[int]] = {}
+        if precompute:
+            for dst in set(self.location_nodes.values()):
+                self.next_hop[dst] = self._next_hops_towards(dst)
+
+    def _add_edge(self, a: int, b: int, distance: float, kind: str):
+        self.adj[a].append((b, distance, kind))
+        self.radj[b].append((a, distance, kind))
+
+    def _straight_line(self, a: int, b: int) -> float:
+        na, nb = self.nodes[a], self.nodes[b]
+        return math.hypot(na.x - nb.x, na.y - nb.y)
+
+    def _heuristic(self, a: int, b: int) -> float:
+        # Only admissible on the same floor; across floors we fall back to Dijkstra ordering
+        if self.nodes[a].floor != self.nodes[b].floor:
+            return 0.0
+        return self._straight_line(a, b)
+
+    def _next_hops_towards(self, dst: int) -> list[int]:
+        # Dijkstra from dst over reversed edges; the parent of every node is its next hop
+        dist = [math.inf] * len(self.nodes)
+        hop = [-1] * len(self.nodes)
+        dist[dst] = 0.0
+        heap = [(0.0, dst)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, w, _ in self.radj[u]:
+                nd = d + w
+                if nd < dist[v]:
+                    dist[v] = nd
+                    hop[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return hop
+
+    def _astar(self, src: int, dst: int) -> list[int]:
+        g = {src: 0.0}
+        parent = {src: -1}
+        heap = [(self._heuristic(src, dst), src)]
+        closed = set()
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u == dst:
+                break
+            if u in closed:
+                continue
+            closed.add(u)
+            for v, w, _ in self.adj[u]:
+                nd = g[u] + w
+                if nd < g.get(v, math.inf):
+                    g[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd + self._heuristic(v, dst), v))
+        if dst not in parent:
+            raise RouteNotFound()
+        path = [dst]
+        while parent[path[-1]] != -1:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    def shortest_path(self, src: int, dst: int) -> list[int]:
+        hops = self.next_hop.get(dst)
+        if hops is None:
+            return self._astar(src, dst)
+
+        # O(path length) walk over the precomputed table
+        path = [src]
+        while path[-1] != dst:
+            nxt = hops[path[-1]]
+            if nxt == -1:
+                raise RouteNotFound()
+            path.append(nxt)
+        return path
+
+    def _edge(self, a: int, b: int) -> tuple[float, str]:
+        best = None
+        for v, w, kind in self.adj[a]:
+            if v == b and (best is None or w < best[0]):
+                best = (w, kind)
+        return best
+
+    def route(self, from_location_id: str, to_location_id: str, labels: dict[str, str]) -> dict:
+        src = self.location_nodes.get(from_location_id)
+        dst = self.location_nodes.get(to_location_id)
+        if src is None or dst is None:
+            raise KeyError(from_location_id if src is None else to_location_id)
+
+        path = self.shortest_path(src, dst)
+        from_name = labels.get(from_location_id, from_location_id)
+        to_name = labels.get(to_location_id, to_location_id)
+        steps, distance = self._build_steps(path, from_name, to_name)
+
+        return {
+            "from": {"id": from_location_id, "name": from_name, "floor": self.nodes[src].floor},
+            "to": {"id": to_location_id, "name": to_name, "floor": self.nodes[dst].floor},
+            "distance_m": round(distance),
+            "estimated_time_min": max(1, math.ceil(distance / WALKING_SPEED_M_PER_MIN)),
+            "steps": steps,
+        }
+
+    def _turn(self, a: int, b: int, c: int) -> Optional[str]:
+        na, nb, nc = self.nodes[a], self.nodes[b], self.nodes[c]
+        v1 = (nb.x - na.x, nb.y - na.y)
+        v2 = (nc.x - nb.x, nc.y - nb.y)
+        if v1 == (0, 0) or v2 == (0, 0):
+            return None
+        angle = math.degrees(math.atan2(v1[0] * v2[1] - v1[1] * v2[0], v1[0] * v2[0] + v1[1] * v2[1]))
+        if abs(angle) < TURN_THRESHOLD_DEG:
+            return None
+        side = "left" if angle > 0 else "right"
+        return f"Turn slightly {side}" if abs(angle) < 60 else f"Turn {side}"
+
+    def _build_steps(self, path: list[int], from_name: str, to_name: str) -> tuple[list[dict], float]:
+        steps: list[dict] = []
+        total = 0.0
+        walked = 0.0
+
+        def add(text: str, kind: str, floor: Optional[int] = None):
+            step = {"order": len(steps) + 1, "text": text, "type": kind}
+            if floor is not None:
+                step["floor"] = floor
+            steps.append(step)
+
+        def flush_walk(towards: int):
+            nonlocal walked
+            if walked < 1:
+                return
+            node = self.nodes[towards]
+            target = f" toward {node.label}" if node.label else ""
+            prefix = f"Exit {from_name} and walk" if not steps else "Walk"
+            floor = node.floor if len(steps) else None
+            add(f"{prefix} {round(walked)}m along the corridor{target}", "walk", floor)
+            walked = 0.0
+
+        i = 0
+        while i < len(path) - 1:
+            a, b = path[i], path[i + 1]
+            w, kind = self._edge(a, b)
+            total += w
+
+            if kind in VERTICAL_KINDS:
+                flush_walk(a)
+                # Merge consecutive flights/lift hops into one instruction
+                j = i + 1
+                while j < len(path) - 1:
+                    w2, kind2 = self._edge(path[j], path[j + 1])
+                    if kind2 != kind:
+                        break
+                    total += w2
+                    j += 1
+                start_floor, end_floor = self.nodes[a].floor, self.nodes[path[j]].floor
+                means = "stairs" if kind == "stairs" else "lift"
+                add(f"Take the {means} from floor {start_floor} to floor {end_floor}", kind, end_floor)
+                i = j
+                continue
+
+            walked += w
+            if i + 2 < len(path):
+                turn = self._turn(a, b, path[i + 2])
+                if turn and self._edge(b, path[i + 2])[1] not in VERTICAL_KINDS:
+                    flush_walk(b)
+                    add(turn, "turn", self.nodes[b].floor)
+            i += 1
+
+        flush_walk(path[-1])
+        add(f"{to_name} will be ahead of you. You have arrived at your destination.", "walk", self.nodes[path[-1]].floor)
+        return steps, total
+
+
+# Module level graph, swapped atomically on reload so in-flight requests keep a consistent view
+campus_graph = CampusGraph([], [])
+location_labels: dict[str, str] = {}
+
+
+async def load_campus_graph(db: AsyncSession, precompute: bool = False) -> CampusGraph:
+    global campus_graph, location_labels
+
+    node_rows = (await db.execute(select(models.WalkwayNode))).scalars().all()
+    edge_rows = (await db.execute(select(models.WalkwayEdge))).scalars().all()
+    label_rows = (await db.execute(select(models.Location.id, models.Location.label))).all()
+
+    nodes = [
+        Node(id=n.id, location_id=n.location_id, label=n.label, floor=n.floor or 0, x=n.x or 0.0, y=n.y or 0.0)
+        for n in node_rows
+    ]
+    edges = [(e.from_node_id, e.to_node_id, e.distance_m, e.kind or "walk", bool(e.one_way)) for e in edge_rows]
+
+    campus_graph = CampusGraph(nodes, edges, precompute=precompute)
+    location_labels = {loc_id: label for loc_id, label in label_rows}
+    return campus_graph
+
+
+# Location writes keep the step labels current without a full graph reload
+def set_location_label(location_id: str, label: str):
+    location_labels[location_id] = label
+
+
+def forget_location(location_id: str):
+    location_labels.pop(location_id, None)
+
+
+async def load_location_labels(db: AsyncSession) -> dict[str, str]:
+    global location_labels
+    label_rows = (await db.execute(select(models.Location.id, models.Location.label))).all()
+    location_labels = {loc_id: label for loc_id, label in label_rows}
+    return location_labels
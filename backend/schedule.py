@@ -0,0 +1,243 @@
+import asyncio
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import AsyncSessionLocal
+from settings import settings
+
+# Channel the timetable/override triggers (migrations/010) publish on
+SCHEDULE_CHANNEL = "schedule_changes"
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+# Ended overrides are dropped from the index, so "at T" queries can only look back this far
+PAST_QUERY_GRACE = timedelta(minutes=5)
+
+campus_tz = ZoneInfo(settings.CAMPUS_TIMEZONE)
+
+
+def minute_of_week(at: datetime) -> int:
+    local = at.astimezone(campus_tz)
+    return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+def bit_indexes(bits: int) -> list[int]:
+    # Positions of the set bits, lowest first (string scan beats shifting for wide ints)
+    return [i for i, c in enumerate(reversed(bin(bits)[2:])) if c == "1"]
+
+
+class AvailabilityIndex:
+    """Answers "who is available at T" for the whole directory.
+
+    Every faculty member gets a dense slot and every set of people is a Python
+    int used as a bitset. The weekly timetable is flattened into a sorted list of
+    minute-of-week boundaries; each segment between two boundaries stores the
+    bitsets of people scheduled free and scheduled busy. A lookup is one bisect
+    plus a handful of bitwise ops:
+
+        available = (manual & ~scheduled) | free, then one-off overrides on top
+
+    where "manual" is the old availability toggle, which still applies outside
+    any scheduled interval.
+    """
+
+    def __init__(self):
+        self.slots: dict[int, int] = {} # faculty id -> bit position
+        self.ids: list[int] = []
+        self.manual = 0
+        self.role_bits: dict[str, int] = {}
+        self.bounds: list[int] = [0, MINUTES_PER_WEEK]
+        self.free: list[int] = [0]
+        self.busy: list[int] = [0]
+        # (starts_at, ends_at, bit, available), sorted by start
+        self.overrides: list[tuple[datetime, datetime, int, bool]] = []
+        self.override_starts: list[datetime] = []
+        self.built_at: Optional[float] = None
+
+    def _slot(self, faculty_id: int) -> int:
+        slot = self.slots.get(faculty_id)
+        if slot is None:
+            slot = self.slots[faculty_id] = len(self.ids)
+            self.ids.append(faculty_id)
+        return slot
+
+    # ---- incremental updates from the faculty write endpoints ----
+    def set_faculty(self, faculty_id: int, availability: bool, role: Optional[str]):
+        bit = 1 << self._slot(faculty_id)
+        self.manual = self.manual | bit if availability else self.manual & ~bit
+        for name in list(self.role_bits):
+            self.role_bits[name] &= ~bit
+        if role:
+            self.role_bits[role] = self.role_bits.get(role, 0) | bit
+
+    def remove_faculty(self, faculty_id: int):
+        slot = self.slots.get(faculty_id)
+        if slot is None:
+            return
+        mask = ~(1 << slot)
+        self.manual &= mask
+        self.role_bits = {name: bits & mask for name, bits in self.role_bits.items()}
+        self.free = [bits & mask for bits in self.free]
+        self.busy = [bits & mask for bits in self.busy]
+        self.overrides = [o for o in self.overrides if o[2] != 1 << slot]
+        self.override_starts = [o[0] for o in self.overrides]
+
+    def apply_event(self, event: dict):
+        # Manual toggles made by other workers (events.py)
+        if event.get("type") != "faculty" or "id" not in event:
+            return
+        if event.get("op") == "delete":
+            self.remove_faculty(event["id"])
+        else:
+            self.set_faculty(event["id"], bool(event.get("availability")), event.get("role"))
+
+    # ---- full build ----
+    def build(self, faculty_rows, weekly_rows, override_rows):
+        self.slots, self.ids, self.manual, self.role_bits = {}, [], 0, {}
+        for faculty_id, availability, role in faculty_rows:
+            self.set_faculty(faculty_id, availability, role)
+
+        # Sweep over interval edges; counters keep overlapping entries for the same person correct
+        edges: dict[int, list[tuple[int, bool, int]]] = {}
+        for faculty_id, weekday, start_minute, end_minute, available in weekly_rows:
+            if faculty_id not in self.slots or end_minute <= start_minute:
+                continue
+            slot = self.slots[faculty_id]
+            base = weekday * MINUTES_PER_DAY
+            edges.setdefault(base + start_minute, []).append((slot, available, 1))
+            edges.setdefault(base + end_minute, []).append((slot, available, -1))
+
+        self.bounds = sorted(set(edges) | {0, MINUTES_PER_WEEK})
+        self.free, self.busy = [], []
+        active = {True: Counter(), False: Counter()}
+        free_bits = busy_bits = 0
+        for boundary in self.bounds[:-1]:
+            for slot, available, delta in edges.get(boundary, ()):
+                counts = active[available]
+                counts[slot] += delta
+                bit = 1 << slot
+                on = counts[slot] > 0
+                if available:
+                    free_bits = free_bits | bit if on else free_bits & ~bit
+                else:
+                    busy_bits = busy_bits | bit if on else busy_bits & ~bit
+            self.free.append(free_bits)
+            self.busy.append(busy_bits & ~free_bits) # free wins when a person has both
+
+        oldest = datetime.now(campus_tz) - PAST_QUERY_GRACE
+        self.overrides = sorted(
+            (starts_at, ends_at, 1 << self.slots[faculty_id], available)
+            for faculty_id, starts_at, ends_at, available in override_rows
+            if faculty_id in self.slots and ends_at > oldest
+        )
+        self.override_starts = [o[0] for o in self.overrides]
+        self.built_at = time.time()
+
+    # ---- queries ----
+    def _bits_at(self, at: datetime) -> int:
+        segment = bisect_right(self.bounds, minute_of_week(at)) - 1
+        scheduled = self.free[segment] | self.busy[segment]
+        bits = (self.manual & ~scheduled) | self.free[segment]
+        for starts_at, ends_at, bit, available in self.overrides[:bisect_right(self.override_starts, at)]:
+            if ends_at > at:
+                bits = bits | bit if available else bits & ~bit
+        return bits
+
+    def available_bits(self, at: datetime, within_minutes: int = 0) -> int:
+        """Everyone available at `at`, or at any moment in [at, at + within_minutes]."""
+        bits = self._bits_at(at)
+        if within_minutes <= 0:
+            return bits
+
+        # Availability can only change at a timetable boundary or an override edge inside the window
+        end = at + timedelta(minutes=within_minutes)
+        points = set()
+        start_mow = minute_of_week(at)
+        for offset in range(0, within_minutes + 1, MINUTES_PER_WEEK):
+            for boundary in self.bounds:
+                delta = (boundary - start_mow) % MINUTES_PER_WEEK + offset
+                if 0 < delta <= within_minutes:
+                    points.add(at + timedelta(minutes=delta))
+        first = bisect_left(self.override_starts, at)
+        for starts_at, ends_at, _, _ in self.overrides[first:]:
+            if starts_at > end:
+                break
+            points.add(starts_at)
+        for starts_at, ends_at, _, _ in self.overrides:
+            if at < ends_at <= end:
+                points.add(ends_at)
+        for point in points:
+            bits |= self._bits_at(point)
+        return bits
+
+    def ids_of(self, bits: int) -> list[int]:
+        return [self.ids[slot] for slot in bit_indexes(bits)]
+
+    def available_ids(self, at: datetime, within_minutes: int = 0, role: Optional[str] = None) -> list[int]:
+        bits = self.available_bits(at, within_minutes)
+        if role is not None:
+            bits &= self.role_bits.get(role, 0)
+        return self.ids_of(bits)
+
+    def count(self, bits: int, role: Optional[str] = None) -> int:
+        if role is not None:
+            bits &= self.role_bits.get(role, 0)
+        return bin(bits).count("1")
+
+    def is_available(self, faculty_id: int, at: datetime) -> Optional[bool]:
+        slot = self.slots.get(faculty_id)
+        if slot is None:
+            return None
+        return bool(self._bits_at(at) >> slot & 1)
+
+
+availability_index = AvailabilityIndex()
+
+
+async def load_availability_index(db: AsyncSession) -> AvailabilityIndex:
+    faculty_rows = (await db.execute(select(models.Faculty.id, models.Faculty.availability, models.Faculty.role))).all()
+    weekly_rows = (await db.execute(select(
+        models.FacultySchedule.faculty_id,
+        models.FacultySchedule.weekday,
+        models.FacultySchedule.start_minute,
+        models.FacultySchedule.end_minute,
+        models.FacultySchedule.available,
+    ))).all()
+    override_rows = (await db.execute(select(
+        models.AvailabilityOverride.faculty_id,
+        models.AvailabilityOverride.starts_at,
+        models.AvailabilityOverride.ends_at,
+        models.AvailabilityOverride.available,
+    ))).all()
+    availability_index.build(faculty_rows, weekly_rows, override_rows)
+    return availability_index
+
+
+_reload_pending = False
+
+
+def reload_soon(event: Optional[dict] = None, delay: float = 0.5):
+    """Timetable/override edits made by other workers (events.py): one rebuild per burst."""
+    global _reload_pending
+    if _reload_pending:
+        return
+    _reload_pending = True
+
+    async def reload():
+        global _reload_pending
+        await asyncio.sleep(delay)
+        _reload_pending = False
+        try:
+            async with AsyncSessionLocal() as session:
+                await load_availability_index(session)
+        except Exception as e:
+            print(f"Error reloading availability schedules: {e}")
+
+    asyncio.ensure_future(reload())
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from datetime import datetime
+from typing import List, Literal, Optional, Union
 
 # ---- FlashNews Schemas ----
 class FlashNewsBase(BaseModel):
@@ -7,9 +8,9 @@ class FlashNewsBase(BaseModel):
 
 class FlashNews(FlashNewsBase):
     id: int
+    expires_at: Optional[datetime] = None
     
-    class Config:
-        orm_mode = True # Tells Pydantic to read data from ORM models
+    model_config = ConfigDict(from_attributes=True) # Tells Pydantic to read data from ORM models
 
 # ---- Location Schemas ----
 class LocationBase(BaseModel):
@@ -17,11 +18,14 @@ class LocationBase(BaseModel):
     label: str
     subtitle: Optional[str] = None
     type: Optional[str] = 'location'
+    building: Optional[str] = None
+    floor: Optional[int] = None
+    x: Optional[float] = None # campus map metres
+    y: Optional[float] = None
 
 class Location(LocationBase):
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # ---- Faculty Schemas ----
 class FacultyBase(BaseModel):
@@ -39,8 +43,14 @@ class FacultyBase(BaseModel):
 class Faculty(FacultyBase):
     id: int
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# Faculty with the location row embedded, and a location with everyone sitting there
+class FacultyWithLocation(Faculty):
+    location: Optional[Location] = None
+
+class LocationWithFaculty(Location):
+    faculty: List[Faculty] = []
 
 # ---- Login Schemas ----
 class UserLogin(BaseModel):
@@ -56,6 +66,7 @@ class LoginResponse(BaseModel):
     message: str
     username: Optional[str] = None # For successful Admin login
     faculty_id: Optional[int] = None # For successful Faculty login
+    token: Optional[str] = None # Session token, send as "Authorization: Bearer <token>"
 
 # Schema for updating just the availability
 class FacultyAvailabilityUpdate(BaseModel):
@@ -72,17 +83,34 @@ class FacultyProfileUpdate(BaseModel):
     phone_number: Optional[str] = None
     courses_taken: Optional[List[str]] = None
 
+# Admin batch edits may also move faculty between schools/rooms and flip availability
+class FacultyBatchUpdate(FacultyProfileUpdate):
+    school: Optional[str] = None
+    availability: Optional[bool] = None
+    location_id: Optional[str] = None
+
 # Schema for CREATING a location 
 class LocationCreate(BaseModel):
     id: str 
     label: str
     subtitle: Optional[str] = None
     type: Optional[str] = 'location'
+    building: Optional[str] = None
+    floor: Optional[int] = None
+    x: Optional[float] = None
+    y: Optional[float] = None
 
 class LocationUpdate(BaseModel):
     label: Optional[str] = None
     subtitle: Optional[str] = None
     type: Optional[str] = 'location'
+    building: Optional[str] = None
+    floor: Optional[int] = None
+    x: Optional[float] = None
+    y: Optional[float] = None
+
+class NearbyLocation(Location):
+    distance_m: float # straight-line distance plus a per-floor penalty, not a walking route
 
 class DeleteResponse(BaseModel):
     success: bool
@@ -104,6 +132,9 @@ class FacultyCreate(BaseModel):
 # Schema for CREATING flash news
 class FlashNewsCreate(BaseModel):
     message: str 
+    # Either an absolute expiry or a lifetime in hours; neither means FLASH_NEWS_DEFAULT_TTL_HOURS
+    expires_at: Optional[datetime] = None
+    ttl_hours: Optional[float] = Field(None, gt=0)
 
 # Schema for Analytics Data
 class AnalyticsData(BaseModel):
@@ -112,4 +143,129 @@ class AnalyticsData(BaseModel):
     available_faculty: int
     unavailable_faculty: int
     available_hods: int
-    available_ccs: int
\ No newline at end of file
+    available_ccs: int
+
+# ---- Route Schemas ----
+class RouteStep(BaseModel):
+    order: int
+    text: str
+    type: Optional[str] = 'walk' # walk / turn / stairs / elevator
+    floor: Optional[int] = None
+
+class RouteEndpoint(BaseModel):
+    id: str
+    name: str
+    floor: int
+
+class RouteResult(BaseModel):
+    from_: RouteEndpoint = Field(alias="from")
+    to: RouteEndpoint
+    distance_m: int
+    estimated_time_min: int
+    steps: List[RouteStep]
+
+    model_config = ConfigDict(populate_by_name=True)
+
+# ---- Bulk Import Schemas ----
+class BulkImportError(BaseModel):
+    line: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    skipped: int
+    errors: List[BulkImportError] = []
+
+# ---- Availability Schedule Schemas ----
+class ScheduleEntry(BaseModel):
+    weekday: int = Field(ge=0, le=6) # 0 = Monday
+    start_minute: int = Field(ge=0, le=1440) # minutes since midnight, campus time
+    end_minute: int = Field(ge=0, le=1440)
+    available: bool = False
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.end_minute <= self.start_minute:
+            raise ValueError("end_minute must be after start_minute")
+        return self
+
+class AvailabilityOverrideCreate(BaseModel):
+    starts_at: datetime
+    ends_at: datetime
+    available: bool = False
+    reason: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.ends_at <= self.starts_at:
+            raise ValueError("ends_at must be after starts_at")
+        return self
+
+class AvailabilityOverride(AvailabilityOverrideCreate):
+    id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class FacultyScheduleData(BaseModel):
+    faculty_id: int
+    weekly: List[ScheduleEntry] = []
+    overrides: List[AvailabilityOverride] = []
+
+class AvailabilityAt(BaseModel):
+    at: datetime
+    within_minutes: int
+    role: Optional[str] = None
+    count: int
+    faculty_ids: List[int]
+
+# ---- Flash News Delta Schema ----
+class FlashNewsDelta(BaseModel):
+    version: int # pass back as ?version= to long-poll
+    latest_id: int # pass back as ?since_id=
+    items: List[FlashNews] # only items newer than since_id
+    active_ids: List[int] # everything still live; drop any local item not in here
+
+# ---- Batch Mutation Schemas ----
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    entity: Literal["faculty", "location", "flash_news"]
+    id: Optional[Union[int, str]] = None # required for update/delete
+    data: Optional[dict] = None # FacultyCreate / FacultyBatchUpdate / LocationCreate / LocationUpdate / FlashNewsCreate
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(min_length=1, max_length=5000)
+
+class BatchOperationResult(BaseModel):
+    index: int
+    status: Literal["created", "updated", "deleted", "not_found", "conflict"]
+    id: Optional[Union[int, str]] = None
+
+class BatchResult(BaseModel):
+    statements: int # SQL statements the whole batch took
+    results: List[BatchOperationResult]
+
+# ---- Availability Trend Schemas ----
+class AvailabilityTrendBucket(BaseModel):
+    bucket_start: datetime
+    avg_available: Optional[float] = None # mean available faculty over the bucket's snapshots
+    avg_total: Optional[float] = None
+    availability_ratio: Optional[float] = None
+    went_available: int = 0 # toggles to available logged in this bucket
+    went_unavailable: int = 0
+
+class AvailabilityTrend(BaseModel):
+    granularity: str
+    since: datetime
+    until: datetime
+    department: Optional[str] = None
+    role: Optional[str] = None
+    buckets: List[AvailabilityTrendBucket]
+
+# ---- Search Schema ----
+class SearchResult(BaseModel):
+    type: Literal["faculty", "location"]
+    id: str
+    label: str
+    subtitle: str = ""
+    location_id: Optional[str] = None # where to route to (a faculty member's cabin location)
+    score: float
@@ -0,0 +1,281 @@
+import asyncio
+import heapq
+import re
+import unicodedata
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import AsyncSessionLocal
+
+# Field weights: a hit on the name/label beats one on the department, a course or the designation
+WEIGHTS = {"name": 3.0, "label": 3.0, "cabin_number": 2.5, "subtitle": 1.5, "department": 1.0, "courses_taken": 1.0, "designation": 0.5}
+RESULT_CACHE_SIZE = 2048 # recent queries; keystroke prefixes repeat a lot across kiosks
+MAX_PREFIX = 10 # longer query tokens are checked against the 10 char prefix bucket
+FUZZY_MIN_LENGTH = 3 # shorter tokens are too ambiguous to correct
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    # Fold accents and case, so "José" is found by "jose"
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return TOKEN_RE.findall(folded)
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"^{token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent swaps cost 1), giving up past `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def typo_budget(token: str) -> int:
+    return 0 if len(token) < FUZZY_MIN_LENGTH else 1 if len(token) < 8 else 2
+
+
+class SearchIndex:
+    """Typeahead over faculty and locations, entirely in memory.
+
+    Every searchable field is tokenized into words; each word is posted under its
+    documents (with the best field weight it appears in) and under its prefixes,
+    so the last, half typed word of a query is a dict lookup. Words also go into
+    a trigram table; when a query word has no exact/prefix hit, the words sharing
+    its trigrams are checked with a bounded edit distance (1 typo under 8 letters,
+    2 beyond), so "prof sharam" still finds Professor Sharma (designation is
+    indexed, at a low weight). Every query word has to
+    match; documents are ranked by summed (weight x match quality), with a bonus
+    when the label itself starts with the query.
+
+    Writes go through upsert/remove, so the endpoints keep it current without
+    a rebuild; build() is for startup and the periodic safety net. Results are
+    cached per query until the next write that changes a document, which is
+    what keeps one and two letter queries (matching most of the directory) cheap.
+    """
+
+    def __init__(self):
+        self.docs: dict[tuple[str, str], dict] = {} # (type, id) -> result fields
+        self.labels: dict[tuple[str, str], str] = {} # normalized label, for the starts-with bonus
+        self.doc_tokens: dict[tuple[str, str], set[str]] = {}
+        self.postings: dict[str, dict[tuple[str, str], float]] = {} # word -> doc -> field weight
+        self.prefixes: dict[str, set[str]] = {} # prefix -> words
+        self.trigram_words: dict[str, set[str]] = {}
+        self.results: dict[tuple, list[dict]] = {}
+        self.pending: set[int] = set() # faculty ids changed by other workers, re-read shortly
+
+    # ---- maintenance ----
+    def _add_word(self, word: str):
+        for length in range(1, min(len(word), MAX_PREFIX) + 1):
+            self.prefixes.setdefault(word[:length], set()).add(word)
+        if len(word) >= FUZZY_MIN_LENGTH:
+            for gram in trigrams(word):
+                self.trigram_words.setdefault(gram, set()).add(word)
+
+    def _drop_word(self, word: str):
+        for length in range(1, min(len(word), MAX_PREFIX) + 1):
+            words = self.prefixes.get(word[:length])
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self.prefixes[word[:length]]
+        for gram in trigrams(word):
+            words = self.trigram_words.get(gram)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self.trigram_words[gram]
+
+    def _upsert(self, key: tuple[str, str], doc: dict, fields: dict[str, list[str]]):
+        weights: dict[str, float] = {}
+        for field, texts in fields.items():
+            for text in texts:
+                for word in tokenize(text):
+                    weights[word] = max(weights.get(word, 0.0), WEIGHTS[field])
+        if self.docs.get(key) == doc and self.doc_tokens.get(key) == set(weights) \
+                and all(self.postings[word].get(key) == weight for word, weight in weights.items()):
+            return # nothing searchable changed: keep the cached results
+        self.remove(*key)
+        self.docs[key] = doc
+        self.labels[key] = " ".join(tokenize(doc["label"]))
+        self.doc_tokens[key] = set(weights)
+        for word, weight in weights.items():
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = {}
+                self._add_word(word)
+            posting[key] = weight
+
+    def remove(self, type_: str, id_):
+        key = (type_, str(id_))
+        if key not in self.docs:
+            return
+        self.results.clear()
+        self.docs.pop(key, None)
+        self.labels.pop(key, None)
+        for word in self.doc_tokens.pop(key, ()):
+            posting = self.postings.get(word)
+            if posting is None:
+                continue
+            posting.pop(key, None)
+            if not posting:
+                del self.postings[word]
+                self._drop_word(word)
+
+    def upsert_faculty(self, faculty):
+        # faculty: ORM row or anything with the same attributes
+        subtitle = " • ".join(part for part in (faculty.department, faculty.designation) if part)
+        doc = {"type": "faculty", "id": str(faculty.id), "label": faculty.name, "subtitle": subtitle, "location_id": faculty.location_id}
+        self._upsert(("faculty", str(faculty.id)), doc, {
+            "name": [faculty.name],
+            "department": [faculty.department or ""],
+            "designation": [faculty.designation or ""],
+            "courses_taken": list(faculty.courses_taken or []),
+            "cabin_number": [faculty.cabin_number or ""],
+        })
+
+    def upsert_location(self, location: dict):
+        doc = {"type": "location", "id": location["id"], "label": location["label"], "subtitle": location.get("subtitle") or "", "location_id": location["id"]}
+        self._upsert(("location", location["id"]), doc, {"label": [location["label"]], "subtitle": [location.get("subtitle") or ""]})
+
+    def sync_locations(self, locations):
+        # Bring the location documents in line with the table; unchanged ones keep the result cache
+        seen = set()
+        for location in locations:
+            seen.add(location["id"])
+            self.upsert_location(location)
+        for type_, id_ in [key for key in self.docs if key[0] == "location" and key[1] not in seen]:
+            self.remove(type_, id_)
+
+    def build(self, faculty, locations):
+        self.docs, self.labels, self.doc_tokens, self.postings, self.prefixes, self.trigram_words = {}, {}, {}, {}, {}, {}
+        self.results = {}
+        for row in faculty:
+            self.upsert_faculty(row)
+        for location in locations:
+            self.upsert_location(location)
+
+    # ---- queries ----
+    def _matches(self, token: str) -> dict[tuple[str, str], float]:
+        # doc -> best score this query word earns in it
+        scores: dict[tuple[str, str], float] = {}
+        words = self.prefixes.get(token[:MAX_PREFIX], ())
+        if len(token) > MAX_PREFIX:
+            words = [word for word in words if word.startswith(token)]
+        for word in words:
+            # Exact word 1.0, prefixes a bit less the more is left to type
+            quality = 1.0 if word == token else 0.6 + 0.3 * len(token) / len(word)
+            for key, weight in self.postings[word].items():
+                scores[key] = max(scores.get(key, 0.0), weight * quality)
+        if scores or typo_budget(token) == 0:
+            return scores
+
+        budget = typo_budget(token)
+        grams = trigrams(token)
+        shared: dict[str, int] = {}
+        for gram in grams:
+            for word in self.trigram_words.get(gram, ()):
+                shared[word] = shared.get(word, 0) + 1
+        # A word within `budget` edits keeps most of the trigrams; skip the rest before the DP
+        needed = max(1, len(grams) - 3 * budget)
+        for word, count in shared.items():
+            if count < needed:
+                continue
+            # Typeahead: the word may still be half typed, so also compare against the word's own prefix
+            distance = min(edit_distance(token, word, budget), edit_distance(token, word[:len(token)], budget))
+            if distance > budget:
+                continue
+            quality = 0.5 - 0.15 * distance
+            for key, weight in self.postings[word].items():
+                scores[key] = max(scores.get(key, 0.0), weight * quality)
+        return scores
+
+    def search(self, query: str, types: Optional[set[str]] = None, limit: int = 10) -> list[dict]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        cache_key = (tuple(tokens), frozenset(types) if types else None, limit)
+        cached = self.results.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Intersect starting from the most selective word so the running totals stay small
+        matches = sorted((self._matches(token) for token in set(tokens)), key=len)
+        totals = {key: score for key, score in matches[0].items() if types is None or key[0] in types}
+        for scores in matches[1:]:
+            totals = {key: total + scores[key] for key, total in totals.items() if key in scores}
+
+        phrase = " ".join(tokens)
+        def rank(item):
+            key, score = item
+            label = self.labels[key]
+            if label.startswith(phrase):
+                score += 2.0
+            return score, -len(label)
+        best = heapq.nlargest(limit, totals.items(), key=rank)
+        results = [{**self.docs[key], "score": round(rank((key, score))[0], 3)} for key, score in best]
+        if len(self.results) >= RESULT_CACHE_SIZE:
+            self.results.clear()
+        self.results[cache_key] = results
+        return results
+
+    # ---- other workers' writes (events.py) ----
+    def apply_event(self, event: dict):
+        if event.get("type") != "faculty" or "id" not in event:
+            return
+        if event.get("op") == "delete":
+            self.remove("faculty", event["id"])
+            return
+        if event.get("indexed") is False:
+            return # e.g. an availability toggle (migrations/012)
+        # The NOTIFY payload has no names, so re-read the changed rows (a burst becomes one query)
+        if not self.pending:
+            asyncio.get_running_loop().call_later(0.5, lambda: asyncio.ensure_future(self.refresh_pending()))
+        self.pending.add(event["id"])
+
+    async def refresh_pending(self):
+        ids, self.pending = self.pending, set()
+        try:
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(select(models.Faculty).where(models.Faculty.id.in_(ids)))).scalars().all()
+            for row in rows:
+                self.upsert_faculty(row)
+        except Exception as e:
+            print(f"Error refreshing search index: {e}")
+
+    def stats(self) -> dict:
+        return {"documents": len(self.docs), "words": len(self.postings), "prefixes": len(self.prefixes), "cached_queries": len(self.results)}
+
+
+search_index = SearchIndex()
+
+
+async def load_search_index(db: AsyncSession) -> SearchIndex:
+    faculty = (await db.execute(select(models.Faculty))).scalars().all()
+    locations = (await db.execute(select(models.Location.id, models.Location.label, models.Location.subtitle))).all()
+    search_index.build(faculty, (row._asdict() for row in locations))
+    return search_index
+
+
+async def load_search_locations(db: AsyncSession) -> SearchIndex:
+    locations = (await db.execute(select(models.Location.id, models.Location.label, models.Location.subtitle))).all()
+    search_index.sync_locations(row._asdict() for row in locations)
+    return search_index
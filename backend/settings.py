@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -9,6 +10,87 @@ class Settings(BaseSettings):
     DB_PORT: int
     DB_DATABASE: str
 
+    # Engine / pool tuning (see database.py). SQL echo is a throughput sink, keep it off outside local debugging
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    SLOW_QUERY_MS: float = 200.0
+    # Pooled connections opened (and hot statements prepared on) at startup, capped at DB_POOL_SIZE (see warmup.py)
+    WARMUP_CONNECTIONS: int = 5
+    WARMUP_RETRY_SECONDS: float = 5.0
+
+    # Admission control in front of the handlers (see admission.py). Limits are per route template and per worker, 0 = unlimited
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_ROUTE_LIMITS: dict[str, int] = {"/api/faculty": 16, "/api/locations": 16, "/api/faculty/with-location": 8}
+    ADMISSION_DEFAULT_LIMIT: int = 24
+    ADMISSION_QUEUE_SIZE: int = 64 # waiters per route before shedding outright
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 1.0 # well under DB_POOL_TIMEOUT, a quick 503 beats a slow 500
+    ADMISSION_RETRY_AFTER_SECONDS: float = 1.0
+    # Per-client token buckets (requests per minute, burst); X-Forwarded-For is only trusted behind our own proxy
+    RATE_LIMIT_LOGIN_PER_MINUTE: float = 10.0
+    RATE_LIMIT_LOGIN_BURST: int = 5
+    RATE_LIMIT_WRITE_PER_MINUTE: float = 120.0
+    RATE_LIMIT_WRITE_BURST: int = 30
+    TRUST_FORWARDED_FOR: bool = False
+
+    # Per-request profiles (see profiling.py): "X-Profile: 1" from an admin, or a random sample. Off = nothing installed
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    # While any profile runs, the whole process's GIL switch interval drops to half of this so the sampler
+    # thread gets to look; every other request on the worker pays for the extra switching in the meantime
+    PROFILING_INTERVAL_MS: float = 2.0
+    PROFILING_KEEP: int = 50
+
+    # Session tokens issued at login (see auth.py). Set SESSION_SECRET when running more than one worker
+    SESSION_SECRET: Optional[str] = None
+    SESSION_TTL_SECONDS: int = 8 * 3600
+    AUTH_REQUIRED: bool = False # reject directory writes without a session token; admin-only operational endpoints always need one
+    AUTH_THREADS: int = 4 # threads for password hash checks
+
+    # Precompute next hops towards every location at startup so /api/route is O(path length)
+    ROUTE_PRECOMPUTE: bool = True
+
+    # In-process cache for the directory list endpoints (see cache.py)
+    CACHE_TTL_SECONDS: float = 30.0
+    CACHE_MAX_ENTRIES: int = 256
+    # Full /api/faculty and /api/locations bodies are pre-encoded and rebuilt on writes; this only bounds staleness across workers
+    SNAPSHOT_MAX_AGE_SECONDS: float = 300.0
+    # Multi-worker deployments: share the faculty/locations snapshots through this mmap file (see shared_snapshot.py)
+    SHARED_SNAPSHOT_PATH: Optional[str] = None
+
+    # One LISTEN connection per process feeding /api/faculty/stream (see events.py)
+    LIVE_EVENTS_ENABLED: bool = True
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+
+    # Serve /api/analytics from in-memory counters instead of the DB (see analytics.py)
+    ANALYTICS_COUNTERS_ENABLED: bool = False
+    ANALYTICS_RECONCILE_SECONDS: float = 300.0
+
+    # Flash news expiry and the /api/flash-news/updates long-poll (see news.py). 0 hours = never expire
+    FLASH_NEWS_DEFAULT_TTL_HOURS: float = 7 * 24
+    FLASH_NEWS_PRUNE_SECONDS: float = 300.0
+    FLASH_NEWS_LONG_POLL_SECONDS: float = 25.0
+
+    # Availability change log + hourly/daily occupancy rollups (see history.py)
+    HISTORY_ENABLED: bool = True
+    HISTORY_FLUSH_SECONDS: float = 2.0
+    HISTORY_QUEUE_SIZE: int = 10000
+    HISTORY_SAMPLE_SECONDS: int = 300 # occupancy snapshot interval
+
+    # Full rebuild of the location-derived indexes (search, nearest grid, route labels); local writes and
+    # location NOTIFYs (migrations/011) update them right away, this covers a missed notification
+    SEARCH_REBUILD_SECONDS: float = 300.0
+
+    # Campus map tile pyramid (see tiles.py, needs Pillow). MAP_SOURCE_PATH is sliced at startup when the store is missing or older
+    MAP_TILE_STORE: str = "map_tiles.bin"
+    MAP_SOURCE_PATH: Optional[str] = None
+    MAP_MAX_UPLOAD_MB: float = 25.0
+
+    # Weekly timetables are interpreted in campus local time (see schedule.py)
+    CAMPUS_TIMEZONE: str = "Asia/Kolkata"
+
     @property
     def DATABASE_URL_ASYNC(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_DATABASE}"
@@ -0,0 +1,158 @@
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+# Data file layout (little endian):
+#   header  MAGIC, section count (u32)
+#   table   per section: name (16 bytes, NUL padded), built_at (f64, unix time), offset (u64), length (u64)
+#   bodies  the encoded sections back to back
+# A section body is the exact JSON the list endpoint sends, not a struct-of-arrays copy of the rows:
+# every reader would otherwise have to encode the rows again per request, which is the cost the
+# snapshot exists to avoid. Only the header and the section table are fixed-width structs.
+MAGIC = b"INSNAP01"
+HEADER = struct.Struct("<8sI")
+ENTRY = struct.Struct("<16sdQQ")
+GENERATION = struct.Struct("<Q")
+
+
+@dataclass
+class SharedEntry:
+    body: memoryview
+    built_at: float
+
+
+class SharedSnapshotStore:
+    """Directory snapshots shared by every worker through one memory-mapped file.
+
+    The data file is never modified in place: a writer (holding an flock on
+    "<path>.lock", plus a thread lock since an flock doesn't exclude threads
+    sharing the descriptor) writes a complete new file next to it, os.replace()s it in and
+    bumps the generation counter in "<path>.gen". Readers compare that counter
+    with the generation they mapped and remap when it moved, so a request costs
+    an 8 byte read and hands out a memoryview into the page cache; every worker
+    shares the same physical pages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock_fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self._thread_lock = threading.Lock() # plain Lock: may be released from another thread than the one that took it
+        gen_fd = os.open(path + ".gen", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(gen_fd).st_size < GENERATION.size:
+                os.ftruncate(gen_fd, GENERATION.size)
+            self._gen = mmap.mmap(gen_fd, GENERATION.size)
+        finally:
+            os.close(gen_fd)
+        self.generation = -1
+        self._map: Optional[mmap.mmap] = None
+        self._sections: dict[str, SharedEntry] = {}
+        self.remaps = 0
+        self.publishes = 0
+
+    # ---- readers ----
+    def current_generation(self) -> int:
+        return GENERATION.unpack_from(self._gen)[0]
+
+    def _remap(self, generation: int):
+        try:
+            with open(self.path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError): # ValueError: empty file
+            self._map, self._sections = None, {}
+            self.generation = generation
+            return
+
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a directory snapshot file")
+        view = memoryview(data)
+        sections = {}
+        for i in range(count):
+            name, built_at, offset, length = ENTRY.unpack_from(data, HEADER.size + i * ENTRY.size)
+            sections[name.rstrip(b"\0").decode()] = SharedEntry(view[offset:offset + length], built_at)
+        # The old map is not closed explicitly: responses may still be sending from it
+        self._map, self._sections = data, sections
+        self.generation = generation
+        self.remaps += 1
+
+    def read(self, name: str) -> Optional[SharedEntry]:
+        generation = self.current_generation()
+        if generation != self.generation:
+            self._remap(generation)
+        return self._sections.get(name)
+
+    # ---- writer ----
+    def try_lock(self) -> bool:
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            self._thread_lock.release()
+            return False
+
+    def lock(self):
+        self._thread_lock.acquire()
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def unlock(self):
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+
+    def publish(self, name: str, body: bytes, locked: bool = False):
+        """Replace one section. Blocking (file IO + lock), run it in a thread."""
+        if not locked:
+            self.lock()
+        try:
+            # Start from whatever the other workers published last
+            self.read(name)
+            sections = {key: (bytes(entry.body), entry.built_at) for key, entry in self._sections.items()}
+            sections[name] = (body, time.time())
+
+            table_end = HEADER.size + len(sections) * ENTRY.size
+            offset, table, bodies = table_end, [], []
+            for key, (data, built_at) in sections.items():
+                table.append(ENTRY.pack(key.encode()[:16], built_at, offset, len(data)))
+                bodies.append(data)
+                offset += len(data)
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", prefix=os.path.basename(self.path) + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(HEADER.pack(MAGIC, len(sections)))
+                    f.writelines(table)
+                    f.writelines(bodies)
+                os.chmod(tmp_path, 0o644) # mkstemp creates 0600
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            GENERATION.pack_into(self._gen, 0, self.current_generation() + 1)
+            self.publishes += 1
+        finally:
+            if not locked:
+                self.unlock()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "generation": self.generation,
+            "sections": {name: {"bytes": len(entry.body), "built_at": entry.built_at} for name, entry in self._sections.items()},
+            "remaps": self.remaps,
+            "publishes": self.publishes,
+        }
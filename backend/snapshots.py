@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from shared_snapshot import SharedSnapshotStore
+
+# Failed rebuilds are retried after 1s, 2s, 4s ... up to a minute; readers get the last good body meanwhile
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+
+
+class DirectorySnapshot:
+    """Pre-encoded JSON body for one unfiltered directory list (or anything
+    else built from the DB that should only change on writes, e.g. bundle.py).
+
+    Rebuilt when a write invalidates it, not on a timer; reads never encode
+    anything. Right after a write the next reader waits for the rebuild instead
+    of getting the old bytes, so admin screens that refetch after saving see
+    their change. max_age_seconds is only a safety net for writes made by other
+    worker processes that this one never hears about.
+
+    With a SharedSnapshotStore (bytes bodies only) the snapshot lives in one
+    mmap file for all workers: whoever rebuilds publishes it, everyone else
+    serves the published bytes, and only one worker refreshes it on max age.
+
+    A failed rebuild is logged and retried with backoff; until one succeeds,
+    readers get the last good body (only the very first build fails requests).
+    """
+
+    def __init__(self, name: str, build: Callable[[AsyncSession], Awaitable[Any]], max_age_seconds: float = 300.0,
+                 shared: Optional[SharedSnapshotStore] = None):
+        self.name = name
+        self.max_age_seconds = max_age_seconds
+        self._build = build
+        self.shared = shared
+        self.body: Optional[Any] = None
+        self.built_at = 0.0
+        self.version = 0
+        self._dirty = shared is None # shared: try the published copy before building our own
+        self._task: Optional[asyncio.Task] = None
+        self._retry: Optional[asyncio.TimerHandle] = None
+        self.hits = 0 # served without waiting for a build
+        self.misses = 0 # had to wait for one
+        self.failures = 0 # consecutive failed rebuilds
+
+    @property
+    def stale(self) -> bool:
+        return self._dirty or self.body is None or time.monotonic() - self.built_at > self.max_age_seconds
+
+    async def _rebuild(self):
+        try:
+            while self._dirty:
+                # Writes landing mid-build set _dirty again and trigger another pass
+                self._dirty = False
+                async with AsyncSessionLocal() as session:
+                    body = await self._build(session)
+                if self.shared is not None:
+                    await asyncio.to_thread(self.shared.publish, self.name, body)
+                self.body = body
+                self.built_at = time.monotonic()
+                self.version += 1
+            self.failures = 0
+        except Exception as e:
+            self._dirty = True
+            self.failures += 1
+            delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (self.failures - 1))
+            print(f"Error rebuilding {self.name} snapshot (retrying in {delay:g}s): {e}")
+            if self._retry is None:
+                self._retry = asyncio.get_running_loop().call_later(delay, self._retry_rebuild)
+            raise
+
+    def _retry_rebuild(self):
+        self._retry = None
+        if self._dirty:
+            self._ensure_rebuild()
+
+    def _ensure_rebuild(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._rebuild())
+            # Failures are logged in _rebuild; don't also warn about an unretrieved exception
+            self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._task
+
+    def invalidate(self, remote: bool = False):
+        if remote and self.shared is not None:
+            return # the worker that made the write republishes, we pick it up via the generation counter
+        self._dirty = True
+        try:
+            self._ensure_rebuild() # rebuild eagerly, off the request path
+        except RuntimeError:
+            pass # no running loop (e.g. called at import/shutdown); the next get() rebuilds
+
+    async def _refresh_shared(self) -> Any:
+        # Max age ran out: one worker (whoever gets the lock) rebuilds, the rest keep serving
+        if not self.shared.try_lock():
+            return None
+        try:
+            async with AsyncSessionLocal() as session:
+                body = await self._build(session)
+            await asyncio.to_thread(self.shared.publish, self.name, body, True)
+            return body
+        finally:
+            self.shared.unlock()
+
+    async def get(self) -> Any:
+        if self.shared is not None and not self._dirty:
+            entry = self.shared.read(self.name)
+            if entry is not None:
+                if time.time() - entry.built_at <= self.max_age_seconds:
+                    self.hits += 1
+                    return entry.body # zero-copy view into the shared file
+                self.misses += 1
+                return await self._refresh_shared() or entry.body
+        if self.stale and not (self._retry is not None and self.body is not None):
+            # (while backing off after a failure, the last good body is served without another attempt)
+            self.misses += 1
+            self._dirty = True
+            try:
+                await asyncio.shield(self._ensure_rebuild())
+            except Exception:
+                if self.body is None:
+                    raise
+            return self.body
+        self.hits += 1
+        return self.body
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "version": self.version,
+            "age_seconds": round(time.monotonic() - self.built_at, 1) if self.body is not None else None,
+            "failing": self.failures,
+        }
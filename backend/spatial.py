@@ -0,0 +1,136 @@
+import heapq
+import math
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models, schemas
+
+# Channel the locations trigger (migrations/011) publishes on
+LOCATION_CHANNEL = "location_changes"
+# Grid cell edge in campus metres; a few rooms per cell keeps both the ring scan and the cells short
+CELL_SIZE_M = 25.0
+# Changing floors (stairs/lift) counts as this much extra walking
+FLOOR_PENALTY_M = 15.0
+
+
+class LocationGrid:
+    """Uniform grid over location coordinates for k-nearest queries by type.
+
+    Every located room sits in one cell of the "all types" grid and one cell of
+    its own type's grid. A query scans rings of cells outward from the origin and
+    stops once the k-th best distance is closer than anything the next ring could
+    hold. Planar distance is the lower bound; the floor penalty only adds to it.
+    Locations without coordinates are simply not indexed. Each indexed entry keeps
+    the location's public fields too, so a query never needs the DB.
+    """
+
+    def __init__(self, cell_size: float = CELL_SIZE_M, floor_penalty: float = FLOOR_PENALTY_M):
+        self.cell_size = cell_size
+        self.floor_penalty = floor_penalty
+        self.points: dict[str, tuple[float, float, int, Optional[str]]] = {} # id -> (x, y, floor, type)
+        self.details: dict[str, dict] = {} # id -> schemas.Location fields
+        self.grids: dict[Optional[str], dict[tuple[int, int], set[str]]] = {None: {}} # type (None = any) -> cell -> ids
+        self.extent: Optional[tuple[int, int, int, int]] = None # min/max cell indexes ever used
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    # ---- incremental updates from the location write endpoints ----
+    def upsert(self, location: dict):
+        location_id, x, y, type_ = location["id"], location.get("x"), location.get("y"), location.get("type")
+        self.remove(location_id)
+        if x is None or y is None:
+            return
+        self.points[location_id] = (x, y, location.get("floor") or 0, type_)
+        self.details[location_id] = location
+        cell = self._cell(x, y)
+        for key in (None, type_):
+            self.grids.setdefault(key, {}).setdefault(cell, set()).add(location_id)
+        cx, cy = cell
+        if self.extent is None:
+            self.extent = (cx, cy, cx, cy)
+        else:
+            min_x, min_y, max_x, max_y = self.extent
+            self.extent = (min(min_x, cx), min(min_y, cy), max(max_x, cx), max(max_y, cy))
+
+    def remove(self, location_id: str):
+        point = self.points.pop(location_id, None)
+        if point is None:
+            return
+        del self.details[location_id]
+        x, y, _, type_ = point
+        cell = self._cell(x, y)
+        for key in (None, type_):
+            cells = self.grids.get(key, {})
+            members = cells.get(cell)
+            if members is not None:
+                members.discard(location_id)
+                if not members:
+                    del cells[cell]
+
+    def build(self, locations):
+        self.points, self.details, self.grids, self.extent = {}, {}, {None: {}}, None
+        for location in locations:
+            self.upsert(location)
+
+    # ---- queries ----
+    def distance(self, x: float, y: float, floor: int, point: tuple) -> float:
+        px, py, pfloor, _ = point
+        return math.hypot(px - x, py - y) + abs(pfloor - floor) * self.floor_penalty
+
+    def nearest(self, x: float, y: float, floor: int = 0, k: int = 5, type_: Optional[str] = None,
+                exclude: Optional[str] = None) -> list[tuple[float, str]]:
+        cells = self.grids.get(type_)
+        if not cells or self.extent is None:
+            return []
+        cx, cy = self._cell(x, y)
+        min_x, min_y, max_x, max_y = self.extent
+        # Only rings that overlap the extent can hold anything: a far-off origin starts at the first one
+        # that touches it, and the scan ends at the one that covers it
+        first_ring = max(min_x - cx, cx - max_x, min_y - cy, cy - max_y, 0)
+        last_ring = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0)
+
+        best: list[tuple[float, str]] = [] # max-heap of the k best, as (-distance, id)
+        for ring in range(first_ring, last_ring + 1):
+            # Anything in this ring is at least (ring - 1) cells away from the origin
+            if len(best) == k and -best[0][0] <= (ring - 1) * self.cell_size:
+                break
+            for cell in ring_cells(cx, cy, ring, self.extent):
+                for location_id in cells.get(cell, ()):
+                    if location_id == exclude:
+                        continue
+                    dist = self.distance(x, y, floor, self.points[location_id])
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist, location_id))
+                    elif dist < -best[0][0]:
+                        heapq.heapreplace(best, (-dist, location_id))
+        return sorted((-neg, location_id) for neg, location_id in best)
+
+
+def ring_cells(cx: int, cy: int, ring: int, extent: tuple[int, int, int, int]):
+    # The cells of one ring, clipped to the extent so a distant origin costs no more than a near one
+    min_x, min_y, max_x, max_y = extent
+    if ring == 0:
+        yield cx, cy
+        return
+    low_x, high_x = max(cx - ring, min_x), min(cx + ring, max_x)
+    for y in (cy - ring, cy + ring):
+        if min_y <= y <= max_y:
+            for x in range(low_x, high_x + 1):
+                yield x, y
+    low_y, high_y = max(cy - ring + 1, min_y), min(cy + ring - 1, max_y)
+    for x in (cx - ring, cx + ring):
+        if min_x <= x <= max_x:
+            for y in range(low_y, high_y + 1):
+                yield x, y
+
+
+location_grid = LocationGrid()
+
+
+async def load_location_grid(db: AsyncSession) -> LocationGrid:
+    result = await db.execute(select(models.Location).where(models.Location.x.is_not(None), models.Location.y.is_not(None)))
+    location_grid.build(schemas.Location.model_validate(row).model_dump() for row in result.scalars())
+    return location_grid
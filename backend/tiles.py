@@ -0,0 +1,237 @@
+import asyncio
+import fcntl
+import hashlib
+import io
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+try:
+    from PIL import Image
+except ImportError: # optional: no map tiles without it, the frontend falls back to the bundled image
+    Image = None
+
+# Store file layout (little endian):
+#   header    MAGIC, manifest length (u32)
+#   manifest  JSON: version, width, height, tile_size, max_zoom, tiles {"z/x/y": [offset, length, hash]}
+#   tiles     the encoded JPEG tiles back to back (offsets are from the end of the manifest)
+MAGIC = b"INTILE01"
+HEADER = struct.Struct("<8sI")
+TILE_SIZE = 256
+JPEG_QUALITY = 82
+# Readers look for a new store file at most this often
+RECHECK_SECONDS = 1.0
+
+
+def build_pyramid(source_path: str, store_path: str, tile_size: int = TILE_SIZE, quality: int = JPEG_QUALITY) -> dict:
+    """Slice an image into a zoom pyramid and write the store file.
+
+    Runs in a worker process (CPU bound, holds the GIL for seconds on a large
+    map). Zoom max_zoom is full resolution and every level below halves it, down
+    to zoom 0 where the whole map fits one tile. Edge tiles are cropped, not
+    padded.
+    """
+    with open(source_path, "rb") as f:
+        source = f.read()
+    version = hashlib.sha256(source).hexdigest()[:16]
+    with Image.open(io.BytesIO(source)) as opened:
+        level = opened.convert("RGB")
+    width, height = level.size
+    max_zoom = max(0, math.ceil(math.log2(max(width, height) / tile_size)))
+
+    tiles, bodies, position = {}, [], 0
+    for zoom in range(max_zoom, -1, -1):
+        if zoom != max_zoom:
+            level = level.resize((max(1, math.ceil(level.width / 2)), max(1, math.ceil(level.height / 2))), Image.Resampling.LANCZOS)
+        for ty in range(math.ceil(level.height / tile_size)):
+            for tx in range(math.ceil(level.width / tile_size)):
+                box = (tx * tile_size, ty * tile_size, min((tx + 1) * tile_size, level.width), min((ty + 1) * tile_size, level.height))
+                buffer = io.BytesIO()
+                level.crop(box).save(buffer, "JPEG", quality=quality, optimize=True)
+                body = buffer.getvalue()
+                tiles[f"{zoom}/{tx}/{ty}"] = [position, len(body), hashlib.sha256(body).hexdigest()[:16]]
+                bodies.append(body)
+                position += len(body)
+
+    manifest = {"version": version, "width": width, "height": height, "tile_size": tile_size, "max_zoom": max_zoom, "tiles": tiles}
+    encoded = json.dumps(manifest, separators=(",", ":")).encode()
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(store_path) or ".", prefix=os.path.basename(store_path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(encoded)))
+            f.write(encoded)
+            f.writelines(bodies)
+        os.chmod(tmp_path, 0o644) # mkstemp creates 0600
+        os.replace(tmp_path, store_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {"version": version, "width": width, "height": height, "max_zoom": max_zoom, "tiles": len(tiles)}
+
+
+class TileStore:
+    """Map tiles served straight out of one memory-mapped file.
+
+    The file is only ever replaced whole (build_pyramid writes a new one and
+    os.replace()s it in), so a reader notices a new pyramid by its inode/mtime,
+    checked at most every RECHECK_SECONDS, and remaps. Tiles are memoryviews into
+    the page cache, shared by every worker process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.manifest: Optional[dict] = None
+        self.error: Optional[str] = None # set while the file on disk isn't a readable store
+        self._map: Optional[mmap.mmap] = None
+        self._base = 0
+        self._identity = None
+        self._checked_at = 0.0
+        self.remaps = 0
+
+    def refresh(self, force: bool = False):
+        """Pick up a replaced store file. Raises ValueError while the file is corrupt (until it's replaced again)."""
+        now = time.monotonic()
+        if force or now - self._checked_at >= RECHECK_SECONDS:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self.manifest, self._map, self._identity, self.error = None, None, None, None
+                return
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if identity != self._identity:
+                self._identity = identity
+                self._load()
+        if self.error:
+            raise ValueError(self.error)
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, length = HEADER.unpack_from(data)
+            if magic != MAGIC:
+                raise ValueError("bad magic")
+            manifest = json.loads(bytes(data[HEADER.size:HEADER.size + length]))
+        except (ValueError, struct.error, OSError) as e: # ValueError covers an empty file and bad JSON
+            self.manifest, self._map = None, None
+            self.error = f"{self.path} is not a map tile store ({e})"
+            return
+        # The old map is not closed explicitly: responses may still be sending from it
+        self.manifest, self._map, self._base, self.error = manifest, data, HEADER.size + length, None
+        self.remaps += 1
+
+    def tile(self, version: str, zoom: int, x: int, y: int) -> Optional[tuple[memoryview, str]]:
+        self.refresh()
+        if self.manifest is None or self.manifest["version"] != version:
+            return None
+        entry = self.manifest["tiles"].get(f"{zoom}/{x}/{y}")
+        if entry is None:
+            return None
+        offset, length, tile_hash = entry
+        start = self._base + offset
+        return memoryview(self._map)[start:start + length], tile_hash
+
+
+class MapTiles:
+    """The tile store plus (re)building it in a background process.
+
+    Uploaded maps are kept next to the store ("<path>.source") so a restart can
+    rebuild from the latest upload. Builds take an flock on "<path>.lock", so of
+    several workers starting together only one slices the map.
+    """
+
+    def __init__(self, store_path: str):
+        self.store = TileStore(store_path)
+        self.source_path = store_path + ".source"
+        self.building = False
+        self.last_error: Optional[str] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._build_lock = asyncio.Lock() # one build per worker; the flock covers the other workers
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def save_source(self, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.source_path) or ".", prefix=os.path.basename(self.source_path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.source_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def is_current(self, source_path: str) -> bool:
+        # Blocking (reads the source), run it in a thread
+        try:
+            self.store.refresh(force=True)
+        except ValueError:
+            return False # corrupt store: rebuild it
+        if self.store.manifest is None:
+            return False
+        with open(source_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16] == self.store.manifest["version"]
+
+    async def rebuild(self, source_path: str, wait: bool = True) -> Optional[dict]:
+        """Slice source_path into a new pyramid; None if a build is already running and wait is False."""
+        if not wait and self._build_lock.locked():
+            return None
+        async with self._build_lock:
+            # A fresh fd per build: closing it is what releases the flock
+            lock_fd = os.open(self.store.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                while True:
+                    try:
+                        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if not wait:
+                            return None
+                        await asyncio.sleep(0.5) # polled rather than a blocking flock in a thread, so cancelling works
+                if self._executor is None:
+                    # spawn, not fork: the API process has threads (profiler, asyncpg, thread pools) a fork would copy mid-flight
+                    self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+                self.building = True
+                try:
+                    loop = asyncio.get_running_loop()
+                    built = await loop.run_in_executor(self._executor, build_pyramid, source_path, self.store.path)
+                except Exception as e:
+                    self.last_error = str(e)
+                    raise
+                self.last_error = None
+                self.store.refresh(force=True)
+                return built
+            finally:
+                self.building = False
+                os.close(lock_fd)
+
+    def summary(self) -> Optional[dict]:
+        # What clients need to lay tiles out; the tile index itself stays server side
+        self.store.refresh()
+        manifest = self.store.manifest
+        if manifest is None:
+            return None
+        fields = ("version", "width", "height", "tile_size", "max_zoom")
+        return {**{key: manifest[key] for key in fields}, "tile_url": f"/api/map/tiles/{manifest['version']}/{{z}}/{{x}}/{{y}}.jpg"}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def verify_image(data: bytes):
+    # Header check only (cheap); decoding problems surface from the build
+    with Image.open(io.BytesIO(data)) as image:
+        image.verify()
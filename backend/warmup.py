@@ -0,0 +1,71 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class Readiness:
+    """What /readyz reports: not ready until every startup warmup step has succeeded.
+
+    Each warmup step is timed and its error (if any) kept, so a slow or failed
+    cold start shows up in the probe body instead of only in the logs.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = time.monotonic()
+        self.warm_seconds: Optional[float] = None
+        self.steps: dict[str, dict] = {}
+
+    async def step(self, name: str, run: Callable[[], Awaitable]):
+        start = time.perf_counter()
+        error = None
+        try:
+            await run()
+        except Exception as e:
+            print(f"Error warming up {name}: {e}")
+            error = str(e)
+        self.steps[name] = {"ms": round((time.perf_counter() - start) * 1000, 1), "error": error}
+
+    @property
+    def failed(self) -> list[str]:
+        return [name for name, step in self.steps.items() if step["error"]]
+
+    def mark_ready(self):
+        self.ready = True
+        self.warm_seconds = round(time.monotonic() - self.started_at, 3)
+
+    def status(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "warming",
+            "warm_seconds": self.warm_seconds,
+            "failed": self.failed,
+            "steps": self.steps,
+        }
+
+
+readiness = Readiness()
+
+
+async def warm_pool(engine: AsyncEngine, connections: int, statements: list):
+    """Open `connections` pooled connections at once and run the hot statements on each.
+
+    asyncpg prepares statements (and introspects their types) per connection, and
+    SQLAlchemy compiles each statement shape once per engine, so running the real
+    statements here means the first requests on any pooled connection skip both.
+    The connections go back to the pool (up to pool_size stay open) when we're done.
+    """
+    opened = await asyncio.gather(*[engine.connect() for _ in range(connections)], return_exceptions=True)
+    conns = [conn for conn in opened if not isinstance(conn, BaseException)]
+    try:
+        async def prepare(conn):
+            for stmt in statements:
+                await conn.execute(stmt)
+        await asyncio.gather(*[prepare(conn) for conn in conns])
+    finally:
+        for conn in conns:
+            await conn.close()
+    failed = [conn for conn in opened if isinstance(conn, BaseException)]
+    if failed:
+        raise failed[0]
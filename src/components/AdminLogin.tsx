@@ -1,4 +1,5 @@
 import React, { useState } from 'react';
+import { saveSessionToken } from '../lib/session';
 import { Lock, User, AlertCircle } from 'lucide-react';
 
 interface AdminLoginProps {
@@ -28,6 +29,7 @@ export const AdminLogin: React.FC<AdminLoginProps> = ({ onLogin }) => {
       const data = await response.json(); 
 
       if (response.ok && data.success) {
+        saveSessionToken(data.token);
         onLogin(data.username); // Call the onLogin prop passed from AdminPanel
       } else {
         setError(data.message || 'Login failed. Please try again.');
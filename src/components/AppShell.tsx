@@ -6,9 +6,9 @@ import { AdminPanel } from './AdminPanel';
 import { FacultyPanel } from './FacultyPanel';
 import { Dashboard } from './Dashboard';
 import { FlashNewsTicker } from './FlashNewsTicker';
+import { CampusMap } from './CampusMap';
 import { Navigation, MapPin, Settings, Code , User, Mail, Github, Linkedin,X,Bug,Users, LogIn} from 'lucide-react';
 import mainLogo from '../assets/mainLogo.jpg';
-import campusMap from '../assets/cammap.jpg';
 
 export const AppShell: React.FC = () => {
   const [activeTab, setActiveTab] = useState<'route' | 'faculty' | 'admin' | 'facultyPanel'>('route');
@@ -35,15 +35,11 @@ export const AppShell: React.FC = () => {
       {showCampusMap ? (
       // When showCampusMap is TRUE, we render the map
       <div className="flex-grow flex items-center justify-center p-4">
-        <div className="relative glass-panel p-4 rounded-xl shadow-lg max-w-full lg:max-w-4xl">
+        <div className="relative glass-panel p-4 rounded-xl shadow-lg w-full max-w-full lg:max-w-4xl">
           <button onClick={() => setShowCampusMap(false)} className="absolute top-4 right-4 p-2 rounded-full glass-panel text-gray-400 hover:text-white transition-colors z-20">
             <X size={20} />
           </button>
-          <img 
-            src={campusMap} 
-            alt="Campus Map" 
-            className="w-full h-auto rounded-lg neon-border" 
-          />
+          <CampusMap />
         </div>
       </div>
     ) : (
@@ -0,0 +1,116 @@
+import React, { useState, useEffect, useRef } from 'react';
+import { ZoomIn, ZoomOut } from 'lucide-react';
+import campusMap from '../assets/cammap.jpg';
+
+interface MapManifest {
+  version: string;
+  width: number;
+  height: number;
+  tile_size: number;
+  max_zoom: number;
+  tile_url: string;
+}
+
+// Pixel size of a zoom level; the backend halves (rounding up) once per level below max_zoom
+const levelSize = (manifest: MapManifest, zoom: number) => {
+  let width = manifest.width;
+  let height = manifest.height;
+  for (let z = manifest.max_zoom; z > zoom; z--) {
+    width = Math.max(1, Math.ceil(width / 2));
+    height = Math.max(1, Math.ceil(height / 2));
+  }
+  return { width, height };
+};
+
+export const CampusMap: React.FC = () => {
+  const [manifest, setManifest] = useState<MapManifest | null>(null);
+  const [failed, setFailed] = useState(false);
+  const [zoomSteps, setZoomSteps] = useState(0); // levels above the one that fits the screen
+  const [containerWidth, setContainerWidth] = useState(0);
+  const containerRef = useRef<HTMLDivElement>(null);
+
+  useEffect(() => {
+    fetch('http://localhost:8000/api/map')
+      .then(response => {
+        if (!response.ok) throw new Error('No map tiles');
+        return response.json();
+      })
+      .then(setManifest)
+      .catch(() => setFailed(true)); // no tiles yet (or no backend): show the bundled map
+  }, []);
+
+  useEffect(() => {
+    const element = containerRef.current;
+    if (!element) return;
+    const observer = new ResizeObserver(entries => setContainerWidth(entries[0].contentRect.width));
+    observer.observe(element);
+    return () => observer.disconnect();
+  }, [manifest]);
+
+  if (failed) {
+    return <img src={campusMap} alt="Campus Map" className="w-full h-auto rounded-lg neon-border" />;
+  }
+
+  // Lowest zoom that is still sharp at this width on this screen, then whatever the user zoomed in
+  const wanted = containerWidth * (window.devicePixelRatio || 1);
+  let fitZoom = 0;
+  if (manifest) {
+    while (fitZoom < manifest.max_zoom && levelSize(manifest, fitZoom).width < wanted) fitZoom++;
+  }
+  const zoom = manifest ? Math.min(fitZoom + zoomSteps, manifest.max_zoom) : 0;
+  const level = manifest ? levelSize(manifest, zoom) : { width: 1, height: 1 };
+  const displayWidth = containerWidth * 2 ** (zoom - fitZoom);
+
+  const tiles = [];
+  if (manifest && containerWidth > 0) {
+    const size = manifest.tile_size;
+    for (let y = 0; y * size < level.height; y++) {
+      for (let x = 0; x * size < level.width; x++) {
+        tiles.push(
+          <img
+            key={`${zoom}/${x}/${y}`}
+            src={manifest.tile_url.replace('{z}', String(zoom)).replace('{x}', String(x)).replace('{y}', String(y))}
+            alt=""
+            loading="lazy" // only tiles scrolled into view get fetched
+            draggable={false}
+            className="absolute select-none"
+            style={{
+              left: `${(x * size / level.width) * 100}%`,
+              top: `${(y * size / level.height) * 100}%`,
+              width: `${(Math.min(size, level.width - x * size) / level.width) * 100}%`,
+              height: `${(Math.min(size, level.height - y * size) / level.height) * 100}%`,
+            }}
+          />
+        );
+      }
+    }
+  }
+
+  return (
+    <div className="relative">
+      <div ref={containerRef} className="w-full max-h-[75vh] overflow-auto rounded-lg neon-border">
+        <div className="relative" style={{ width: displayWidth, height: displayWidth * level.height / level.width }}>
+          {tiles}
+        </div>
+      </div>
+      {manifest && (
+        <div className="absolute bottom-4 right-4 flex flex-col gap-2 z-20">
+          <button
+            onClick={() => setZoomSteps(steps => Math.min(steps + 1, manifest.max_zoom - fitZoom))}
+            disabled={zoom >= manifest.max_zoom}
+            className="p-2 rounded-full glass-panel text-gray-400 hover:text-white transition-colors disabled:opacity-40"
+          >
+            <ZoomIn size={20} />
+          </button>
+          <button
+            onClick={() => setZoomSteps(steps => Math.max(steps - 1, 0))}
+            disabled={zoomSteps === 0}
+            className="p-2 rounded-full glass-panel text-gray-400 hover:text-white transition-colors disabled:opacity-40"
+          >
+            <ZoomOut size={20} />
+          </button>
+        </div>
+      )}
+    </div>
+  );
+};
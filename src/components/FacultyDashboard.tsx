@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { authHeaders } from '../lib/session';
 import { LogOut, User, CheckCircle, XCircle, Edit, Save, Phone, MapPin, GraduationCap, X, AlertCircle } from 'lucide-react';
 
 // --- Define Dropdown Options ---
@@ -169,7 +170,7 @@ export const FacultyDashboard: React.FC<FacultyDashboardProps> = ({
     try {
       const response = await fetch(`http://localhost:8000/api/faculty/${facultyId}/availability`, {
         method: 'PUT',
-        headers: { 'Content-Type': 'application/json' },
+        headers: authHeaders(),
         body: JSON.stringify({ availability: newAvailability }),
       });
       const updatedFacultyData = await response.json();
@@ -241,7 +242,7 @@ export const FacultyDashboard: React.FC<FacultyDashboardProps> = ({
     try {
         const response = await fetch(`http://localhost:8000/api/faculty/${facultyId}`, {
             method: 'PUT',
-            headers: { 'Content-Type': 'application/json' },
+            headers: authHeaders(),
             body: JSON.stringify(updatePayload),
         });
         const updatedFacultyData = await response.json();
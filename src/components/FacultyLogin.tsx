@@ -1,4 +1,5 @@
 import React, { useState } from 'react';
+import { saveSessionToken } from '../lib/session';
 import { LogIn, User, AlertCircle } from 'lucide-react';
 
 interface FacultyLoginProps {
@@ -26,6 +27,7 @@ export const FacultyLogin: React.FC<FacultyLoginProps> = ({ onLogin }) => {
       const data = await response.json();
 
       if (response.ok && data.success) {
+        saveSessionToken(data.token);
         onLogin(data.faculty_id); 
       } else {
         setError(data.message || 'Login failed. Please check your username.');
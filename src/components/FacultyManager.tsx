@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { authHeaders } from '../lib/session';
 import { Plus, Edit, Trash2, Users, Save, X, Phone, MapPin, AlertCircle, CheckCircle, RefreshCw, XCircle } from 'lucide-react'; // Added XCircle
 
 // --- Define Dropdown Options ---
@@ -46,6 +47,7 @@ interface Faculty {
   phone_number: string;
   availability: boolean;
   location_id: string; // location_id is text
+  location?: Location | null; // embedded by /api/faculty/with-location
 }
 
 // Interface for locations dropdown
@@ -86,7 +88,7 @@ export const FacultyManager: React.FC = () => {
     setError(null);
     try {
       const [facultyRes, locationsRes] = await Promise.all([
-        fetch('http://localhost:8000/api/faculty'),
+        fetch('http://localhost:8000/api/faculty/with-location'), // location comes embedded, no client-side join
         fetch('http://localhost:8000/api/locations')
       ]);
       if (!facultyRes.ok) throw new Error('Failed to fetch faculty');
@@ -161,7 +163,7 @@ export const FacultyManager: React.FC = () => {
     try {
       const response = await fetch(url, {
         method: method,
-        headers: { 'Content-Type': 'application/json' },
+        headers: authHeaders(),
         body: JSON.stringify(payload),
       });
 
@@ -171,10 +173,12 @@ export const FacultyManager: React.FC = () => {
         throw new Error(resultData.detail || `Failed to ${isAdding ? 'add' : 'update'} faculty`);
       }
 
+      // Write endpoints return the bare row; attach the location we already have for the dropdown
+      const saved: Faculty = { ...resultData, location: locations.find(loc => loc.id === resultData.location_id) ?? null };
       if (isAdding) {
-        setFaculty(prev => [...prev, resultData]);
+        setFaculty(prev => [...prev, saved]);
       } else {
-        setFaculty(prev => prev.map(f => f.id === editingId ? resultData : f));
+        setFaculty(prev => prev.map(f => f.id === editingId ? saved : f));
       }
 
       handleCancel(); // Reset form
@@ -206,6 +210,7 @@ export const FacultyManager: React.FC = () => {
     try {
         const response = await fetch(`http://localhost:8000/api/faculty/${id}`, {
             method: 'DELETE',
+            headers: authHeaders(),
         });
         const resultData = await response.json();
         if (!response.ok) {
@@ -236,7 +241,7 @@ export const FacultyManager: React.FC = () => {
     try {
       const response = await fetch(`http://localhost:8000/api/faculty/${id}/availability`, {
         method: 'PUT',
-        headers: { 'Content-Type': 'application/json' },
+        headers: authHeaders(),
         body: JSON.stringify({ availability: newAvailability }),
       });
       const updatedFacultyData = await response.json();
@@ -425,7 +430,7 @@ export const FacultyManager: React.FC = () => {
             </div>
             {/* Extra details */}
               <div className="faculty-extra-details"> {/* Use className */}
-                  {facultyMember.cabin_number && <p><MapPin size={14} className="inline mr-1"/> Cabin: <span>{facultyMember.cabin_number}</span> {facultyMember.location_id && <span className="text-xs text-gray-500">(Loc: {facultyMember.location_id})</span>}</p>}
+                  {facultyMember.cabin_number && <p><MapPin size={14} className="inline mr-1"/> Cabin: <span>{facultyMember.cabin_number}</span> {facultyMember.location_id && <span className="text-xs text-gray-500">(Loc: {facultyMember.location?.label ?? facultyMember.location_id})</span>}</p>}
                   {facultyMember.phone_number && <p><Phone size={14} className="inline mr-1"/> Phone: <span>{facultyMember.phone_number}</span></p>}
                   {facultyMember.courses_taken && facultyMember.courses_taken.length > 0 && (<p>Courses: <span>{facultyMember.courses_taken.join(', ')}</span></p> )}
               </div>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { SearchableDropdown } from './SearchableDropdown';
 import { FacultyCard } from './FacultyCard';
 import { HodAvailability } from './HodAvailability';
@@ -29,6 +29,13 @@ export const FindFaculty: React.FC<FindFacultyProps> = ({ onRouteToFaculty }) =>
   // 2. Add state for faculty data
   const [allFaculty, setAllFaculty] = useState<Faculty[]>([]);
   const [isLoadingFaculty, setIsLoadingFaculty] = useState(true);
+  // Filters are applied by the API (GET /api/faculty?school=&role=&designation=)
+  const [filteredFaculty, setFilteredFaculty] = useState<Faculty[]>([]);
+  const [resyncCount, setResyncCount] = useState(0); // bumped when the live stream says to refetch
+  // Who is available right now by timetable, overrides and the manual toggle (GET /api/availability)
+  const [availableIds, setAvailableIds] = useState<Set<number> | null>(null);
+  const [availabilityTick, setAvailabilityTick] = useState(0);
+  const availabilityTimer = useRef<number | null>(null);
 
   useEffect(() => {
     fetch('http://localhost:8000/api/faculty')
@@ -43,6 +50,62 @@ export const FindFaculty: React.FC<FindFacultyProps> = ({ onRouteToFaculty }) =>
       });
   }, []);
 
+  useEffect(() => {
+    const controller = new AbortController();
+    fetch('http://localhost:8000/api/availability', { signal: controller.signal })
+      .then(res => res.json())
+      .then((data: { faculty_ids: number[] }) => setAvailableIds(new Set(data.faculty_ids)))
+      .catch(err => {
+        if (err.name !== 'AbortError') console.error("Failed to fetch availability:", err);
+      });
+    return () => controller.abort();
+  }, [availabilityTick]);
+
+  // Timetable slots start and end without any event, so re-read every minute too
+  useEffect(() => {
+    const timer = window.setInterval(() => setAvailabilityTick(tick => tick + 1), 60_000);
+    return () => window.clearInterval(timer);
+  }, []);
+
+  // A burst of toggles (e.g. at class change) becomes one availability fetch
+  const refreshAvailabilitySoon = () => {
+    if (availabilityTimer.current !== null) return;
+    availabilityTimer.current = window.setTimeout(() => {
+      availabilityTimer.current = null;
+      setAvailabilityTick(tick => tick + 1);
+    }, 500);
+  };
+
+  // Live availability deltas instead of re-fetching the whole list
+  useEffect(() => {
+    const source = new EventSource('http://localhost:8000/api/faculty/stream');
+    source.addEventListener('faculty', (e) => {
+      const change = JSON.parse((e as MessageEvent).data);
+      const apply = (list: Faculty[]) => list.map(faculty =>
+        faculty.id === change.id ? { ...faculty, availability: change.availability, role: change.role } : faculty
+      );
+      setAllFaculty(apply);
+      setFilteredFaculty(apply);
+      refreshAvailabilitySoon(); // the toggle only counts outside scheduled slots
+    });
+    source.addEventListener('resync', () => {
+      fetch('http://localhost:8000/api/faculty')
+        .then(res => res.json())
+        .then((data: Faculty[]) => setAllFaculty(data))
+        .catch(err => console.error("Failed to refresh faculty:", err));
+      setResyncCount(count => count + 1); // re-runs the filtered fetch too
+      refreshAvailabilitySoon();
+    });
+    return () => {
+      source.close();
+      if (availabilityTimer.current !== null) window.clearTimeout(availabilityTimer.current);
+    };
+  }, []);
+
+  // The availability flag on a faculty row is only the manual toggle; show the effective one
+  const withAvailability = (faculty: Faculty): Faculty =>
+    availableIds ? { ...faculty, availability: availableIds.has(faculty.id) } : faculty;
+
   const facultyOptions = allFaculty.map(faculty => ({
     id: faculty.id.toString(),
     label: faculty.name,
@@ -76,18 +139,41 @@ export const FindFaculty: React.FC<FindFacultyProps> = ({ onRouteToFaculty }) =>
   ];
 
 
-  const selectedFacultyData = allFaculty.find(
+  const selectedRow = allFaculty.find(
     faculty => faculty.id.toString() === selectedFaculty
   );
+  const selectedFacultyData = selectedRow && withAvailability(selectedRow);
   
-  const filteredFaculty = (selectedSchool !== null || selectedRole !== null || selectedDesignation !== null) 
-    ? allFaculty.filter(faculty => {
-        const schoolMatch = selectedSchool ? faculty.school === selectedSchool : true;
-        const roleMatch = selectedRole ? faculty.role === selectedRole : true;
-        const designationMatch = selectedDesignation ? faculty.designation === selectedDesignation : true;
-        return schoolMatch && roleMatch && designationMatch;
-      })
-    : [];
+  useEffect(() => {
+    if (selectedSchool === null && selectedRole === null && selectedDesignation === null) {
+      setFilteredFaculty([]);
+      return;
+    }
+    const params = new URLSearchParams({ limit: '100' });
+    if (selectedSchool) params.set('school', selectedSchool);
+    if (selectedRole) params.set('role', selectedRole);
+    if (selectedDesignation) params.set('designation', selectedDesignation);
+
+    // Show the first page right away, then follow X-Next-Cursor until the last one
+    const controller = new AbortController();
+    const fetchPages = async () => {
+      let cursor: string | null = null;
+      let results: Faculty[] = [];
+      do {
+        if (cursor) params.set('cursor', cursor);
+        const res = await fetch(`http://localhost:8000/api/faculty?${params}`, { signal: controller.signal });
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const page: Faculty[] = await res.json();
+        results = [...results, ...page];
+        setFilteredFaculty(results);
+        cursor = res.headers.get('X-Next-Cursor');
+      } while (cursor);
+    };
+    fetchPages().catch(err => {
+      if (err.name !== 'AbortError') console.error("Failed to fetch filtered faculty:", err);
+    });
+    return () => controller.abort();
+  }, [selectedSchool, selectedRole, selectedDesignation, resyncCount]);
 
   return (
     <div 
@@ -99,6 +185,7 @@ export const FindFaculty: React.FC<FindFacultyProps> = ({ onRouteToFaculty }) =>
       <SearchableDropdown
         label="Search Faculty by Name"
         options={facultyOptions}
+        searchTypes="faculty"
         value={selectedFaculty}
         onChange={(value) => {
             setSelectedFaculty(value);
@@ -125,7 +212,7 @@ export const FindFaculty: React.FC<FindFacultyProps> = ({ onRouteToFaculty }) =>
         className={`transition-all duration-500 ease-in-out overflow-hidden ${isHodListVisible ? 'max-h-96' : 'max-h-0'}`}
       >
         {/* 5. Pass fetched data to HodAvailability */}
-        <HodAvailability allFaculty={allFaculty} />
+        <HodAvailability allFaculty={allFaculty.map(withAvailability)} />
       </div>
     </div>
       
@@ -185,7 +272,7 @@ export const FindFaculty: React.FC<FindFacultyProps> = ({ onRouteToFaculty }) =>
         filteredFaculty.map(faculty => (
           <FacultyCard
             key={faculty.id}
-            faculty={faculty}
+            faculty={withAvailability(faculty)}
             onRouteToFaculty={() => onRouteToFaculty(
               faculty.location_id.toString(),
               faculty.cabin_number
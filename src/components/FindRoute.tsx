@@ -2,7 +2,6 @@ import React, { useState, useEffect } from 'react';
 import { SearchableDropdown } from './SearchableDropdown';
 import { RouteSteps } from './RouteSteps';
 import { Navigation, MapPin } from 'lucide-react';
-import { mockRoute } from '../data/mockData'; 
 
 interface Location {
   id: string;
@@ -53,10 +52,19 @@ export const FindRoute: React.FC<FindRouteProps> = ({
       return;
     }
     setIsLoading(true);
-    setTimeout(() => {
-      setRouteResult(mockRoute);
+    try {
+      const params = new URLSearchParams({ from: fromLocation, to: toLocation });
+      const response = await fetch(`http://localhost:8000/api/route?${params}`);
+      const data = await response.json();
+      if (!response.ok) throw new Error(data.detail || 'Failed to fetch route');
+      setRouteResult(data);
+    } catch (err) {
+      console.error("Failed to fetch route:", err);
+      setRouteResult(null);
+      alert(err instanceof Error ? err.message : 'Failed to fetch route');
+    } finally {
       setIsLoading(false);
-    }, 1000);
+    }
   };
   
   const handleSwapLocations = () => {
@@ -93,6 +101,7 @@ export const FindRoute: React.FC<FindRouteProps> = ({
       <SearchableDropdown
         label="From"
         options={locations} // 4. Use state variable
+        searchTypes="location"
         value={fromLocation}
         onChange={(value) => setFromLocation(value)}
         placeholder={isLoadingLocations ? "Loading locations..." : "Select starting location..."}
@@ -118,6 +127,7 @@ export const FindRoute: React.FC<FindRouteProps> = ({
       <SearchableDropdown
         label="To"
         options={locations} // 5. Use state variable
+        searchTypes="location"
         value={toLocation}
         onChange={(value) => setToLocation(value)}
         placeholder={isLoadingLocations ? "Loading locations..." : "Select destination..."}
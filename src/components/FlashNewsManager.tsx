@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { authHeaders } from '../lib/session';
 import { Plus, Trash2, Save, Bell, AlertCircle } from 'lucide-react';
 
 interface FlashNews {
@@ -47,7 +48,7 @@ export const FlashNewsManager: React.FC = () => {
     try {
       const response = await fetch('http://localhost:8000/api/flash-news', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: authHeaders(),
         body: JSON.stringify({ message: trimmedMessage }),
       });
       const resultData = await response.json();
@@ -71,6 +72,7 @@ export const FlashNewsManager: React.FC = () => {
     try {
       const response = await fetch(`http://localhost:8000/api/flash-news/${id}`, {
         method: 'DELETE',
+        headers: authHeaders(),
       });
       const resultData = await response.json();
       if (!response.ok) {
@@ -6,6 +6,14 @@ import { Megaphone, ChevronDown, AlertCircle } from 'lucide-react';
 interface FlashNews {
   id: number;
   message: string;
+  expires_at?: string | null;
+}
+
+interface FlashNewsDelta {
+  version: number;
+  latest_id: number;
+  items: FlashNews[];
+  active_ids: number[];
 }
 
 export const FlashNewsTicker: React.FC = () => {
@@ -16,25 +24,51 @@ export const FlashNewsTicker: React.FC = () => {
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
-  // 3. Use useEffect to fetch data when the component loads
+  // 3. Fetch once, then long-poll for changes so an idle ticker costs an empty 204 every ~25s
   useEffect(() => {
-    // Fetch data from your FastAPI backend
-    fetch('http://localhost:8000/api/flash-news')
-      .then(response => {
-        if (!response.ok) {
-          throw new Error('Network response was not ok');
+    let cancelled = false;
+    const controller = new AbortController();
+
+    const poll = async () => {
+      let sinceId = 0;
+      let version: number | null = null;
+      let current: FlashNews[] = [];
+      while (!cancelled) {
+        try {
+          const params = new URLSearchParams({ since_id: String(sinceId) });
+          if (version !== null) {
+            params.set('version', String(version));
+            params.set('wait', '25');
+          }
+          const response = await fetch(`http://localhost:8000/api/flash-news/updates?${params}`, { signal: controller.signal });
+          if (!response.ok) {
+            throw new Error('Network response was not ok');
+          }
+          if (response.status !== 204) {
+            const delta: FlashNewsDelta = await response.json();
+            const live = new Set(delta.active_ids);
+            current = [...current.filter(item => live.has(item.id)), ...delta.items];
+            sinceId = delta.latest_id;
+            version = delta.version;
+            setNews(current);
+          }
+          setError(null);
+          setIsLoading(false);
+        } catch (err) {
+          if (cancelled) return;
+          console.error("Failed to fetch flash news:", err);
+          setError("Could not load news. Is the backend server running?");
+          setIsLoading(false);
+          await new Promise(resolve => setTimeout(resolve, 5000)); // back off before retrying
         }
-        return response.json();
-      })
-      .then((data: FlashNews[]) => {
-        setNews(data);
-        setIsLoading(false);
-      })
-      .catch(err => {
-        console.error("Failed to fetch flash news:", err);
-        setError("Could not load news. Is the backend server running?");
-        setIsLoading(false);
-      });
+      }
+    };
+    poll();
+
+    return () => {
+      cancelled = true;
+      controller.abort();
+    };
   }, []); // The empty array [] means this runs only once on mount
 
   // 4. Handle Loading state
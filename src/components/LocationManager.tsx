@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { authHeaders } from '../lib/session';
 import { Plus, Edit, Trash2, MapPin, Save, X, AlertCircle } from 'lucide-react';
 
 interface Location {
@@ -83,7 +84,7 @@ export const LocationManager: React.FC = () => {
     try {
       const response = await fetch(url, {
         method: method,
-        headers: { 'Content-Type': 'application/json' },
+        headers: authHeaders(),
         body: JSON.stringify(payload),
       });
 
@@ -125,6 +126,7 @@ export const LocationManager: React.FC = () => {
     try {
         const response = await fetch(`http://localhost:8000/api/locations/${id}`, {
             method: 'DELETE',
+            headers: authHeaders(),
         });
 
         const resultData = await response.json();
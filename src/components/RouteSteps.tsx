@@ -9,8 +9,8 @@ interface RouteStep {
 }
 
 interface RouteResult {
-  from: { id: number; name: string; floor: number };
-  to: { id: number; name: string; floor: number };
+  from: { id: string; name: string; floor: number };
+  to: { id: string; name: string; floor: number };
   distance_m: number;
   estimated_time_min: number;
   steps: RouteStep[];
@@ -14,6 +14,8 @@ interface SearchableDropdownProps {
   value: string;
   onChange: (value: string) => void;
   placeholder?: string;
+  // Rank typed queries on the server (GET /api/search) instead of scanning `options` per keystroke
+  searchTypes?: 'faculty' | 'location';
 }
 
 export const SearchableDropdown: React.FC<SearchableDropdownProps> = ({
@@ -21,13 +23,35 @@ export const SearchableDropdown: React.FC<SearchableDropdownProps> = ({
   options,
   value,
   onChange,
-  placeholder = "Select an option"
+  placeholder = "Select an option",
+  searchTypes
 }) => {
   const [isOpen, setIsOpen] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
+  const [remoteOptions, setRemoteOptions] = useState<Option[] | null>(null);
   const dropdownRef = useRef<HTMLDivElement>(null);
 
-  const filteredOptions = options.filter(option =>
+  useEffect(() => {
+    if (!searchTypes || !searchTerm.trim()) {
+      setRemoteOptions(null);
+      return;
+    }
+    // One request per keystroke; the previous one is aborted so results never arrive out of order
+    const controller = new AbortController();
+    const params = new URLSearchParams({ q: searchTerm, types: searchTypes, limit: '20' });
+    fetch(`http://localhost:8000/api/search?${params}`, { signal: controller.signal })
+      .then(res => {
+        if (!res.ok) throw new Error(`search failed: ${res.status}`);
+        return res.json();
+      })
+      .then((data: Option[]) => setRemoteOptions(data))
+      .catch(err => {
+        if (err.name !== 'AbortError') setRemoteOptions(null); // fall back to local filtering
+      });
+    return () => controller.abort();
+  }, [searchTerm, searchTypes]);
+
+  const filteredOptions = remoteOptions ?? options.filter(option =>
     option.label.toLowerCase().includes(searchTerm.toLowerCase()) ||
     option.subtitle.toLowerCase().includes(searchTerm.toLowerCase())
   );
@@ -0,0 +1,14 @@
+// Session token issued by /api/admin/login and /api/faculty/login
+const TOKEN_KEY = 'insider_navs_token';
+
+export const saveSessionToken = (token?: string | null) => {
+  if (token) sessionStorage.setItem(TOKEN_KEY, token);
+};
+
+export const authHeaders = (): Record<string, string> => {
+  const token = sessionStorage.getItem(TOKEN_KEY);
+  return {
+    'Content-Type': 'application/json',
+    ...(token ? { Authorization: `Bearer ${token}` } : {}),
+  };
+};